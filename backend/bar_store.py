@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+import pandas as pd
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 저장 위치 / 갱신 주기 (환경변수로 변경 가능)
+# 갱신 주기 동안은 저장분을 그대로 쓰므로, 기본값(300초)이면 요청마다 받던 예전 방식보다 최대 5분 늦은 봉을 줄 수 있음
+BAR_CACHE_DIR = os.getenv("BAR_CACHE_DIR", "bar_cache")
+BAR_REFRESH_SECONDS = float(os.getenv("BAR_REFRESH_SECONDS", "300"))
+
+
+def normalize_bars(df):
+    """yfinance 결과를 날짜 인덱스 + OHLCV 단일 컬럼 형태로 정리"""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS, dtype=float)
+
+    df = df.copy()
+    # 최신 yfinance는 단일 종목도 (Price, Ticker) 멀티 컬럼으로 반환
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    df = df[BAR_COLUMNS].astype(float)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = 'Date'
+
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df
+
+
+def window_bars(df, period="2mo", end=None):
+    """yf.download(period=...)와 같은 구간으로 자름. end가 없으면 오늘 기준"""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS, dtype=float)
+
+    months = int(period[:-2]) if period.endswith("mo") else 2
+    end = pd.Timestamp.now().normalize() if end is None else end
+    cutoff = end - pd.DateOffset(months=months)
+    return df[df.index >= cutoff]
+
+
+def select_ticker(raw, ticker):
+    """멀티 티커 다운로드 결과에서 한 종목의 OHLCV만 꺼냄"""
+    if raw is None or raw.empty:
+        return None
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return raw
+    if ticker in raw.columns.get_level_values(0):
+        return raw[ticker]
+    if ticker in raw.columns.get_level_values(1):
+        return raw.xs(ticker, axis=1, level=1)
+    return None
+
+
+class BarStore:
+    """종목별 일봉을 로컬 디스크(parquet)에 보관하고, 마지막 저장일 이후 봉만 추가로 받아오는 캐시
+
+    yfinance 는 실제로 다운로드할 때만 import 한다. 마지막 동기화 후 refresh_seconds 동안은 네트워크 조회 없이
+    저장분을 반환하므로 (기본 BAR_REFRESH_SECONDS=300) 장중 마지막 봉은 그만큼 늦을 수 있다.
+    새로 받은 봉이 없으면(다운로드 실패 / 빈 응답) 파일을 다시 쓰지 않아 다음 요청에서 다시 조회한다.
+    """
+
+    def __init__(self, root=BAR_CACHE_DIR, refresh_seconds=BAR_REFRESH_SECONDS):
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, ticker):
+        return os.path.join(self.root, f"{ticker}.parquet")
+
+    def read(self, ticker):
+        """디스크에 저장된 봉 읽기 (없으면 None)"""
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"Bar cache read error for {ticker}: {e}, refetching")
+            return None
+
+    def write(self, ticker, df):
+        """임시 파일에 쓴 뒤 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)"""
+        path = self.path(ticker)
+        # 같은 종목을 여러 스레드 / 프로세스가 동시에 쓸 수 있으므로 임시 파일 이름은 쓰는 쪽마다 다르게
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def is_fresh(self, ticker):
+        """마지막 동기화 후 refresh_seconds가 지나지 않았으면 네트워크 조회 생략"""
+        path = self.path(ticker)
+        if not os.path.exists(path):
+            return False
+        return time.time() - os.path.getmtime(path) < self.refresh_seconds
+
+    def merge(self, stored, fetched):
+        """새로 받은 봉을 저장분 뒤에 붙임 (겹치는 날짜는 새 값으로 교체)"""
+        if stored is None or stored.empty:
+            return fetched
+        if fetched.empty:
+            return stored
+        stored = stored[stored.index < fetched.index.min()]
+        return pd.concat([stored, fetched])
+
+    def sync(self, ticker, period="2mo"):
+        """마지막 저장일 이후의 봉만 받아와 저장분에 추가"""
+        import yfinance as yf
+
+        stored = self.read(ticker)
+
+        if stored is None or stored.empty:
+            print(f"Bar cache miss for {ticker}, downloading {period}")
+            raw = yf.download(ticker, period=period, interval="1d", progress=False)
+        else:
+            # 마지막 봉은 장중에 계속 바뀌므로 마지막 저장일부터 다시 받음
+            start = stored.index[-1].strftime('%Y-%m-%d')
+            print(f"Bar cache update for {ticker} from {start}")
+            raw = yf.download(ticker, start=start, interval="1d", progress=False)
+
+        fetched = normalize_bars(raw).dropna()
+        if fetched.empty:
+            # 파일을 다시 쓰면 수정 시각이 바뀌어 오래된 봉이 refresh_seconds 동안 새것으로 취급됨
+            return stored
+        df = self.merge(stored, fetched)
+
+        self.write(ticker, df)
+        return df
+
+    def sync_many(self, tickers, period="2mo"):
+        """여러 종목을 멀티 티커 다운로드로 한 번에 동기화 (신규 종목 / 기존 종목 각각 1회)"""
+        import yfinance as yf
+
+        stored = {ticker: self.read(ticker) for ticker in tickers}
+        new_tickers = [t for t in tickers if stored[t] is None or stored[t].empty]
+        old_tickers = [t for t in tickers if t not in new_tickers]
+
+        requests = []
+        if new_tickers:
+            requests.append((new_tickers, {"period": period}))
+        if old_tickers:
+            start = min(stored[t].index[-1] for t in old_tickers).strftime('%Y-%m-%d')
+            requests.append((old_tickers, {"start": start}))
+
+        result = {}
+        for group, kwargs in requests:
+            print(f"Bar cache batch download for {len(group)} tickers ({kwargs})")
+            raw = yf.download(group, interval="1d", group_by="ticker", progress=False, **kwargs)
+            for ticker in group:
+                fetched = normalize_bars(select_ticker(raw, ticker)).dropna()
+                if fetched.empty:
+                    result[ticker] = stored[ticker]
+                    continue
+                df = self.merge(stored[ticker], fetched)
+                self.write(ticker, df)
+                result[ticker] = df
+        return result
+
+    def window(self, df, period="2mo"):
+        """기존 yf.download(period=...)와 같은 구간으로 잘라서 지표 값이 달라지지 않게 함"""
+        return window_bars(df, period)
+
+    def load(self, ticker, period="2mo"):
+        """저장분을 먼저 읽고, 오래된 경우에만 증분 동기화 후 최근 period 구간 반환"""
+        df = self.read(ticker) if self.is_fresh(ticker) else None
+        if df is None:
+            df = self.sync(ticker, period=period)
+        return self.window(df, period)
+
+    def load_many(self, tickers, period="2mo"):
+        """여러 종목 조회. 오래된 종목들만 모아서 한 번에 다운로드"""
+        frames = {}
+        stale = []
+        for ticker in dict.fromkeys(tickers):
+            df = self.read(ticker) if self.is_fresh(ticker) else None
+            if df is None:
+                stale.append(ticker)
+            else:
+                frames[ticker] = df
+
+        if stale:
+            frames.update(self.sync_many(stale, period=period))
+
+        return {ticker: self.window(frames.get(ticker), period) for ticker in tickers}
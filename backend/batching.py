@@ -0,0 +1,121 @@
+import asyncio
+import os
+from collections import defaultdict
+
+import numpy as np
+
+# 배치 최대 크기 / 모으는 시간 창 (환경변수로 변경 가능)
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "256"))
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "2"))
+
+
+def _bucket(value):
+    """히스토그램 구간 (1, 2, 4, 8, ...)"""
+    bucket = 1
+    while bucket < value:
+        bucket *= 2
+    return bucket
+
+
+class MicroBatcher:
+    """동시에 들어온 예측 요청을 모아 model_type 별로 한 번씩 배치 forward
+
+    predictors: {model_type: numpy (배치, 14) -> numpy (배치, 2)}
+    직전 배치가 1건이면(동시 요청이 없으면) 기다리지 않고 바로 처리하고,
+    동시 요청이 들어오기 시작하면 window_ms 동안 모아서 처리한다.
+    """
+
+    def __init__(self, predictors, max_batch_size=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS):
+        self.predictors = predictors
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self.queue = None
+        self._task = None
+        self._last_batch_size = 1
+        self.batch_sizes = defaultdict(int)
+        self.queue_depths = defaultdict(int)
+        self.batches = 0
+        self.requests = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, model_type, features):
+        """요청 하나를 큐에 넣고 해당 행의 Q값을 기다림"""
+        if model_type not in self.predictors:
+            raise ValueError(f"Unknown model_type: {model_type}")
+        features = np.asarray(features, dtype=np.float32)
+        if features.ndim != 1:
+            raise ValueError(f"features must be a 1-D row, got shape {features.shape}")
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((model_type, features, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self.window if self._last_batch_size > 1 else 0)
+
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # 처리 시점에 쌓여 있던 요청 수 (이번 배치 + 아직 대기 중)
+            self.queue_depths[_bucket(len(batch) + self.queue.qsize())] += 1
+            self._last_batch_size = len(batch)
+            self.batches += 1
+            self.requests += len(batch)
+            self.batch_sizes[_bucket(len(batch))] += 1
+
+            # 길이가 다른 행이 섞이면 그 행끼리만 따로 묶여 실패하도록 길이도 키에 포함
+            groups = defaultdict(list)
+            for model_type, features, future in batch:
+                groups[model_type, len(features)].append((features, future))
+
+            for (model_type, _), items in groups.items():
+                try:
+                    states = np.stack([features for features, _ in items])
+                    # forward는 스레드에서 실행해 이벤트 루프(요청 수신)를 막지 않음
+                    q_values = await asyncio.to_thread(self.predictors[model_type], states)
+                except Exception as e:
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future), row in zip(items, q_values):
+                    if not future.done():
+                        future.set_result(row)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "queue_depth_histogram": {str(k): v for k, v in sorted(self.queue_depths.items())},
+        }
@@ -0,0 +1,232 @@
+"""추천 경로 단계별 벤치마크
+
+로컬 일봉 파일(기본 AAPL.csv)만 사용해서 네트워크 없이 단계별 소요 시간을 잰다.
+    bars.*          일봉 파일 읽기 / 메모리 공급자 조회 (period 구간 자르기 포함)
+    features.*      NumPy 지표 엔진으로 상태 벡터 계산 (종목 1개 / --tickers 개)
+    tensor.*        상태 벡터 -> float32 배치 / torch 텐서
+    forward.*       런타임별 매수+매도 융합 forward (배치 1 ~ 4096)
+    serialize.*     main.py 추천 응답 / model_server.py PredictionResponse JSON 직렬화
+
+    python benchmark.py --json bench.json
+    python benchmark.py --baseline bench.json            # 기준보다 느려진 단계가 있으면 종료 코드 1
+    python benchmark.py --save-baseline bench.json --runtimes torch numpy int8
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from indicators import latest_features
+from inference import load_predictor
+from market_data import LocalFileProvider, MemoryProvider, read_bar_file
+
+BATCH_SIZES = [1, 4, 16, 64, 256, 1024, 4096]
+
+
+def measure(func, repeat=50, warmup=3, min_seconds=0.0):
+    """func 를 반복 실행한 시간 통계 (ms)"""
+    for _ in range(warmup):
+        func()
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - start < min_seconds:
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    times = np.array(times) * 1e3
+    return {
+        "n": len(times),
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p90_ms": float(np.percentile(times, 90)),
+        "min_ms": float(times.min()),
+    }
+
+
+def synthetic_frames(df, count, seed=0):
+    """기준 일봉에 종목마다 다른 랜덤 워크 배율을 곱해 종목 count 개 생성 (항상 같은 결과)"""
+    rng = np.random.default_rng(seed)
+    frames = [df]
+    for _ in range(count - 1):
+        scale = np.exp(np.cumsum(rng.normal(0, 0.01, len(df))))
+        frame = df.copy()
+        for column in ['Open', 'High', 'Low', 'Close']:
+            frame[column] = frame[column] * scale
+        frames.append(frame)
+    return frames
+
+
+def bench_bars(path, repeat):
+    root, filename = os.path.split(os.path.abspath(path))
+    ticker = os.path.splitext(filename)[0]
+    local = LocalFileProvider(root)
+    memory = MemoryProvider({ticker: read_bar_file(path)})
+    return {
+        "bars.read_file": measure(lambda: read_bar_file(path), repeat),
+        # 파일이 바뀌지 않았으면 다시 파싱하지 않는 local 공급자 (서버에서의 일반적인 경우)
+        "bars.local_provider": measure(lambda: local.load(ticker), repeat),
+        "bars.memory_provider": measure(lambda: memory.load(ticker), repeat),
+    }
+
+
+def bench_features(frames, repeat):
+    window = frames[0]
+    return {
+        "features.1_ticker": measure(lambda: latest_features([window]), repeat),
+        f"features.{len(frames)}_tickers": measure(lambda: latest_features(frames), max(repeat // 5, 5)),
+    }
+
+
+def bench_tensor(state, repeat):
+    results = {
+        "tensor.numpy_batch_1": measure(lambda: np.array([state], dtype=np.float32), repeat * 10),
+    }
+    try:
+        import torch
+    except ImportError:
+        return results
+    states = np.array([state], dtype=np.float32)
+    results["tensor.torch_from_numpy_1"] = measure(lambda: torch.from_numpy(states), repeat * 10)
+    big = np.repeat(states, 4096, axis=0)
+    results["tensor.torch_from_numpy_4096"] = measure(lambda: torch.from_numpy(big), repeat * 10)
+    return results
+
+
+def bench_forward(runtimes, state, batch_sizes, buy_model, sell_model, repeat):
+    results = {}
+    for runtime in runtimes:
+        predictor = load_predictor(buy_model, sell_model, runtime=runtime)
+        for batch_size in batch_sizes:
+            states = np.repeat(np.asarray(state, dtype=np.float32)[None, :], batch_size, axis=0)
+            stats = measure(lambda: predictor.predict(states), repeat if batch_size <= 256 else max(repeat // 5, 5))
+            stats["per_row_us"] = stats["p50_ms"] * 1e3 / batch_size
+            results[f"forward.{runtime}.batch_{batch_size}"] = stats
+    return results
+
+
+def bench_serialize(q_values, repeat):
+    from fastapi.encoders import jsonable_encoder
+
+    # main.final_recommendation 과 같은 형태의 응답
+    recommendation = {
+        "symbol": "AAPL",
+        "action": "BUY",
+        "confidence": float(abs(max(q_values))),
+        "recommended_qty": 10,
+        "reason": "DQN buy model prediction (Price: 200)",
+        "date": "2025-05-29",
+        "price": 199.98,
+        "model_version": "v1",
+    }
+    results = {
+        "serialize.recommendation": measure(lambda: json.dumps(jsonable_encoder(recommendation)), repeat * 10),
+        "serialize.recommendation_batch_100": measure(
+            lambda: json.dumps(jsonable_encoder([recommendation] * 100)), repeat),
+    }
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        from model_server import PredictionResponse
+    except ImportError:
+        return results
+
+    def prediction():
+        response = PredictionResponse(action=int(np.argmax(q_values)), q_values=list(q_values),
+                                      confidence=float(max(q_values) - min(q_values)), model_version="v1")
+        return response.model_dump_json()
+
+    results["serialize.prediction_response"] = measure(prediction, repeat * 10)
+    return results
+
+
+def compare(results, baseline, threshold, min_ms):
+    """p50 기준으로 threshold 이상 느려진 단계 목록 (min_ms 보다 짧은 단계는 잡음이라 제외)"""
+    regressions = []
+    for name, stats in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None or max(base["p50_ms"], stats["p50_ms"]) < min_ms:
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"] if base["p50_ms"] > 0 else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append((name, base["p50_ms"], stats["p50_ms"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage-level benchmark for the recommendation path")
+    parser.add_argument("--bars", default="AAPL.csv", help="기준 일봉 파일 (csv / parquet / feather)")
+    parser.add_argument("--tickers", type=int, default=100, help="다종목 지표 계산 벤치마크의 종목 수")
+    parser.add_argument("--runtimes", nargs="+", default=["torch", "numpy"], help="forward 벤치마크할 DQN_RUNTIME")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--buy-model", default="buy_model.pth")
+    parser.add_argument("--sell-model", default="sell_model.pth")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--threads", type=int, help="torch 스레드 수 고정")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--save-baseline", help="이번 결과를 기준 결과로 저장")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 이 이 비율 이상 느려지면 회귀 (기본 20%%)")
+    parser.add_argument("--min-ms", type=float, default=0.01, help="이보다 짧은 단계는 회귀 판정에서 제외")
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    bars = read_bar_file(args.bars)
+    # 서버와 같은 2개월 구간으로 지표 계산
+    window = MemoryProvider({"bench": bars}).load("bench", period="2mo")
+    frames = synthetic_frames(window, args.tickers)
+    state = latest_features(frames[:1])[0]
+
+    stages = {}
+    stages.update(bench_bars(args.bars, args.repeat))
+    stages.update(bench_features(frames, args.repeat))
+    stages.update(bench_tensor(state, args.repeat))
+    stages.update(bench_forward(args.runtimes, state, args.batch_sizes, args.buy_model, args.sell_model, args.repeat))
+    q_values = load_predictor(args.buy_model, args.sell_model, runtime=args.runtimes[0]).predict(state[None, :])[0, 0]
+    stages.update(bench_serialize(q_values.tolist(), args.repeat))
+
+    results = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "torch": sys.modules["torch"].__version__ if "torch" in sys.modules else None,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "bars": args.bars,
+            "bar_rows": len(bars),
+            "tickers": args.tickers,
+            "runtimes": args.runtimes,
+        },
+        "stages": stages,
+    }
+
+    for name, stats in stages.items():
+        extra = f"  ({stats['per_row_us']:.2f} us/row)" if "per_row_us" in stats else ""
+        print(f"{name:<40} p50 {stats['p50_ms']:9.4f} ms  p90 {stats['p90_ms']:9.4f} ms{extra}")
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than baseline by more than {args.threshold * 100:.0f}%:")
+            for name, before, after, ratio in regressions:
+                print(f"  {name}: {before:.4f} -> {after:.4f} ms (x{ratio:.2f})")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""server.py 모델 핫 리로드 점검
+
+빈 MODEL_DIR 로 server.py 를 띄워 /health/ready 가 503 인지 확인한 뒤,
+버전 디렉터리(MODEL_DIR/<버전>/buy_model.pth, sell_model.pth)를 설치하고
+감시 스레드가 그 버전을 올려 서버가 준비 완료(200)로 바뀌는지 확인한다.
+
+    python check_hot_reload.py
+    python check_hot_reload.py --timeout 30 --version v1
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that server.py picks up a model installed after an empty start")
+    parser.add_argument("--buy-model", default=os.path.join(HERE, "buy_model.pth"))
+    parser.add_argument("--sell-model", default=os.path.join(HERE, "sell_model.pth"))
+    parser.add_argument("--version", default="v1", help="설치할 버전 디렉터리 이름")
+    parser.add_argument("--timeout", type=float, default=20.0, help="준비 완료를 기다릴 최대 시간 (초)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hot-reload-")
+    model_dir = os.path.join(workdir, "models")
+    os.makedirs(model_dir)
+    # fallback 경로(작업 디렉터리의 buy_model.pth, sell_model.pth)가 보이지 않도록 빈 디렉터리에서 시작
+    os.chdir(workdir)
+    os.environ.update({"MODEL_DIR": model_dir, "MODEL_POLL_SECONDS": "0.2",
+                       "MODEL_SETTLE_SECONDS": "0", "FAST_START": "0"})
+    sys.path.insert(0, HERE)
+
+    from fastapi.testclient import TestClient
+    import server
+
+    try:
+        with TestClient(server.app) as client:
+            response = client.get("/health/ready")
+            assert response.status_code == 503, f"빈 MODEL_DIR 인데 준비 완료: {response.status_code}"
+            print(f"empty MODEL_DIR -> /health/ready {response.status_code}")
+
+            # 다른 디렉터리에 복사한 뒤 한 번에 옮겨서 감시 스레드가 반쯤 복사된 파일을 보지 않게 함
+            staging = os.path.join(workdir, "staging")
+            os.makedirs(staging)
+            shutil.copy(args.buy_model, os.path.join(staging, "buy_model.pth"))
+            shutil.copy(args.sell_model, os.path.join(staging, "sell_model.pth"))
+            os.rename(staging, os.path.join(model_dir, args.version))
+
+            deadline = time.time() + args.timeout
+            while True:
+                response = client.get("/health/ready")
+                if response.status_code == 200 or time.time() > deadline:
+                    break
+                time.sleep(0.1)
+            assert response.status_code == 200, f"{args.timeout}s 안에 준비 완료되지 않음: {response.json()}"
+            assert server.registry.version == args.version, f"버전 불일치: {server.registry.version}"
+            print(f"installed {args.version} -> /health/ready {response.status_code}")
+    finally:
+        server.registry.stop()
+        os.chdir(HERE)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
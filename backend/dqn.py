@@ -0,0 +1,95 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+INPUT_DIM = 14
+OUTPUT_DIM = 2
+
+
+class DQN(nn.Module):
+    def __init__(self, input_dim, output_dim):
+        super(DQN, self).__init__()
+        self.fc1 = nn.Linear(input_dim, 256)
+        self.fc2 = nn.Linear(256, 512)
+        self.fc3 = nn.Linear(512, 512)
+        self.fc4 = nn.Linear(512, 256)
+        self.fc5 = nn.Linear(256, output_dim)
+
+    def forward(self, x):
+        x = F.relu(self.fc1(x))
+        x = F.relu(self.fc2(x))
+        x = F.relu(self.fc3(x))
+        x = F.relu(self.fc4(x))
+        return self.fc5(x)
+
+
+class FusedDQN(nn.Module):
+    """같은 구조의 DQN 여러 개(매수/매도)를 가중치를 쌓아 배치 행렬곱 한 번으로 평가
+
+    입력 (배치, 14) -> 출력 (모델 수, 배치, 2). 모델마다 따로 forward 하는 것과 같은 값.
+    """
+
+    LAYERS = ['fc1', 'fc2', 'fc3', 'fc4', 'fc5']
+
+    def __init__(self, models):
+        super(FusedDQN, self).__init__()
+        self.num_models = len(models)
+        for name in self.LAYERS:
+            layers = [getattr(model, name) for model in models]
+            # (모델 수, 입력, 출력) / (모델 수, 1, 출력)
+            weight = torch.stack([layer.weight.detach().t() for layer in layers]).contiguous()
+            bias = torch.stack([layer.bias.detach() for layer in layers]).unsqueeze(1)
+            self.register_buffer(f"{name}_weight", weight)
+            self.register_buffer(f"{name}_bias", bias)
+
+    def forward(self, x):
+        x = x.unsqueeze(0).expand(self.num_models, -1, -1)
+        for i, name in enumerate(self.LAYERS):
+            x = torch.baddbmm(getattr(self, f"{name}_bias"), x, getattr(self, f"{name}_weight"))
+            if i < len(self.LAYERS) - 1:
+                x = F.relu(x)
+        return x
+
+    def predict(self, states):
+        """numpy (배치, 14) -> numpy (모델 수, 배치, 2)"""
+        with torch.no_grad():
+            return self(torch.as_tensor(states, dtype=torch.float32)).numpy()
+
+
+def load_dqn(path, input_dim=INPUT_DIM, output_dim=OUTPUT_DIM):
+    model = DQN(input_dim, output_dim)
+    model.load_state_dict(torch.load(path, map_location=torch.device('cpu')))
+    model.eval()
+    return model
+
+
+if __name__ == "__main__":
+    # 분리된 모델과 결과 비교: python dqn.py [buy_model.pth] [sell_model.pth]
+    import sys
+    import time
+
+    paths = sys.argv[1:3] if len(sys.argv) > 2 else ["buy_model.pth", "sell_model.pth"]
+    models = [load_dqn(path) for path in paths]
+    fused = FusedDQN(models)
+
+    torch.manual_seed(0)
+    for batch_size in (1, 7, 256, 4096):
+        states = torch.randn(batch_size, INPUT_DIM) * 10
+        with torch.no_grad():
+            expected = torch.stack([model(states) for model in models])
+            actual = fused(states)
+        torch.testing.assert_close(actual, expected, rtol=1e-5, atol=1e-3)
+        assert torch.equal(actual.argmax(-1), expected.argmax(-1))
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            for _ in range(20):
+                [model(states) for model in models]
+        separate = (time.perf_counter() - start) / 20
+        start = time.perf_counter()
+        for _ in range(20):
+            fused.predict(states)
+        together = (time.perf_counter() - start) / 20
+        print(f"batch {batch_size:>5}: separate {separate * 1e3:.3f} ms, fused {together * 1e3:.3f} ms")
+
+    print("OK: fused outputs match the separate models")
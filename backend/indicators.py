@@ -0,0 +1,200 @@
+import numpy as np
+
+# DQN 입력 상태 벡터 (14개) 순서
+FEATURE_NAMES = [
+    'Open_Change', 'High_Change', 'Low_Change', 'Close_Change', 'Volume_Change',
+    'EWM20_Change', 'FastK', 'SlowD', 'SlowJ',
+    'MACD', 'MACDS', 'MACDO', 'CCI', 'RSI'
+]
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def stack_panel(frames):
+    """종목별 OHLCV DataFrame 목록을 (종목 x 일자) 배열로 쌓음
+
+    종목마다 봉 개수가 다를 수 있으므로 마지막 봉 기준으로 오른쪽 정렬하고
+    앞쪽 빈 칸은 NaN으로 채운다.
+    """
+    length = max(len(df) for df in frames)
+    panel = {col: np.full((len(frames), length), np.nan) for col in PRICE_COLUMNS}
+    for i, df in enumerate(frames):
+        n = len(df)
+        if n == 0:
+            continue
+        for col in PRICE_COLUMNS:
+            panel[col][i, length - n:] = df[col].to_numpy(dtype=float)
+    return panel
+
+
+def _shift(x):
+    out = np.full_like(x, np.nan)
+    out[:, 1:] = x[:, :-1]
+    return out
+
+
+def _diff(x):
+    return x - _shift(x)
+
+
+def _ewm(x, alpha, min_periods):
+    """pandas ewm(alpha, adjust=False, min_periods) 와 같은 재귀식 (앞쪽 NaN은 건너뜀)"""
+    out = np.full_like(x, np.nan)
+    prev = np.full(x.shape[0], np.nan)
+    count = np.zeros(x.shape[0])
+    for t in range(x.shape[1]):
+        xt = x[:, t]
+        valid = ~np.isnan(xt)
+        started = ~np.isnan(prev)
+        prev = np.where(valid, np.where(started, (1 - alpha) * prev + alpha * xt, xt), prev)
+        count += valid
+        out[:, t] = np.where(count >= min_periods, prev, np.nan)
+    return out
+
+
+def _rolling(x, window):
+    """(종목, 일자, window) 슬라이딩 뷰. 앞쪽 window-1 칸은 NaN"""
+    padded = np.concatenate([np.full((x.shape[0], window - 1), np.nan), x], axis=1)
+    return np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)
+
+
+def _fill(x, value):
+    return np.where(np.isnan(x), value, x)
+
+
+def compute_features(panel):
+    """전 종목 x 전 일자의 상태 벡터를 한 번에 계산 -> (종목, 일자, 14)
+
+    ta 라이브러리(EMAIndicator, StochasticOscillator, MACD, CCIIndicator,
+    RSIIndicator)와 같은 식, 같은 결측값 처리(fillna)를 따른다.
+    """
+    open_, high, low = panel['Open'], panel['High'], panel['Low']
+    close, volume = panel['Close'], panel['Volume']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 변화량
+        open_change = _fill(_diff(open_), 0)
+        high_change = _fill(_diff(high), 0)
+        low_change = _fill(_diff(low), 0)
+        close_change = _fill(_diff(close), 0)
+        volume_change = _fill(_diff(volume), 0)
+
+        # EMA20 변화량
+        ema20 = _ewm(close, 2 / 21, 20)
+        ewm20_change = _fill(_diff(ema20), 0)
+
+        # KDJ (window=5, smooth_window=3)
+        smin = _rolling(low, 5).min(axis=-1)
+        smax = _rolling(high, 5).max(axis=-1)
+        stoch_k = 100 * (close - smin) / (smax - smin)
+        stoch_d = _rolling(stoch_k, 3).mean(axis=-1)
+        fast_k = _fill(stoch_k, 50)
+        slow_d = _fill(stoch_d, 50)
+        slow_j = _fill(3 * fast_k - 2 * slow_d, 50)
+
+        # MACD (12, 26, 9)
+        macd_line = _ewm(close, 2 / 13, 12) - _ewm(close, 2 / 27, 26)
+        macd_signal = _ewm(macd_line, 2 / 10, 9)
+        macd = _fill(macd_line, 0)
+        macds = _fill(macd_signal, 0)
+        macdo = _fill(macd - macds, 0)
+
+        # CCI (window=14, constant=0.015)
+        typical_price = _rolling((high + low + close) / 3.0, 14)
+        tp_mean = typical_price.mean(axis=-1)
+        tp_mad = np.abs(typical_price - tp_mean[..., None]).mean(axis=-1)
+        cci = _fill((typical_price[..., -1] - tp_mean) / (0.015 * tp_mad), 0)
+
+        # RSI (Wilder, window=14). 첫 봉의 diff(NaN)는 ta와 같이 0으로 취급
+        started = ~np.isnan(close)
+        close_diff = _diff(close)
+        up = np.where(close_diff > 0, close_diff, 0.0)
+        down = np.where(close_diff < 0, -close_diff, 0.0)
+        up[~started] = np.nan
+        down[~started] = np.nan
+        ema_up = _ewm(up, 1 / 14, 14)
+        ema_down = _ewm(down, 1 / 14, 14)
+        rsi = np.where(ema_down == 0, 100, 100 - (100 / (1 + ema_up / ema_down)))
+        rsi = _fill(rsi, 50)
+
+    features = np.stack([
+        open_change, high_change, low_change, close_change, volume_change,
+        ewm20_change, fast_k, slow_d, slow_j,
+        macd, macds, macdo, cci, rsi
+    ], axis=-1)
+    return _fill(features, 0)
+
+
+def latest_features(frames):
+    """종목별 마지막 봉의 상태 벡터 -> (종목, 14)"""
+    return compute_features(stack_panel(frames))[:, -1, :]
+
+
+def ta_reference_features(df_origin):
+    """기존 ta 라이브러리 기반 계산 (정합성 검증용)"""
+    import pandas as pd
+    from ta.momentum import RSIIndicator, StochasticOscillator
+    from ta.trend import MACD, CCIIndicator, EMAIndicator
+
+    df = pd.DataFrame(index=df_origin.index)
+    df['Open_Change'] = df_origin['Open'].diff(1).fillna(0)
+    df['High_Change'] = df_origin['High'].diff(1).fillna(0)
+    df['Low_Change'] = df_origin['Low'].diff(1).fillna(0)
+    df['Close_Change'] = df_origin['Close'].diff(1).fillna(0)
+    df['Volume_Change'] = df_origin['Volume'].diff(1).fillna(0)
+    df['EWM20_Change'] = EMAIndicator(close=df_origin['Close'], window=20).ema_indicator().diff(1).fillna(0)
+
+    stoch = StochasticOscillator(high=df_origin['High'], low=df_origin['Low'], close=df_origin['Close'],
+                                 window=5, smooth_window=3)
+    df['FastK'] = stoch.stoch().fillna(50)
+    df['SlowD'] = stoch.stoch_signal().fillna(50)
+    df['SlowJ'] = (3 * df['FastK'] - 2 * df['SlowD']).fillna(50)
+
+    macd = MACD(close=df_origin['Close'], window_slow=26, window_fast=12, window_sign=9)
+    df['MACD'] = macd.macd().fillna(0)
+    df['MACDS'] = macd.macd_signal().fillna(0)
+    df['MACDO'] = (df['MACD'] - df['MACDS']).fillna(0)
+
+    df['CCI'] = CCIIndicator(high=df_origin['High'], low=df_origin['Low'], close=df_origin['Close'],
+                             window=14).cci().fillna(0)
+    df['RSI'] = RSIIndicator(close=df_origin['Close'], window=14).rsi().fillna(50)
+    return df[FEATURE_NAMES].fillna(0).to_numpy(dtype=float)
+
+
+def check_parity(frames, rtol=1e-7, atol=1e-6):
+    """ta 기반 계산과 NumPy 엔진 결과 비교. 가장 큰 오차를 지표별로 반환"""
+    panel = compute_features(stack_panel(frames))
+    length = panel.shape[1]
+    worst = np.zeros(len(FEATURE_NAMES))
+    for i, df in enumerate(frames):
+        expected = ta_reference_features(df)
+        actual = panel[i, length - len(df):, :]
+        np.testing.assert_allclose(actual, expected, rtol=rtol, atol=atol,
+                                   err_msg=f"frame {i} ({len(df)} bars)")
+        worst = np.maximum(worst, np.abs(actual - expected).max(axis=0))
+    return dict(zip(FEATURE_NAMES, worst))
+
+
+if __name__ == "__main__":
+    # 정합성 검증: python indicators.py [csv 경로]
+    import sys
+    import pandas as pd
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "AAPL.csv"
+    bars = pd.read_csv(path, index_col=0)[PRICE_COLUMNS].astype(float)
+
+    # 길이가 다른 구간 + 가격을 흔든 종목을 섞어 패널 정렬까지 함께 검증
+    rng = np.random.default_rng(0)
+    frames = []
+    for length in (21, 26, 34, 42, 60, 120, len(bars)):
+        frame = bars.iloc[-length:].copy()
+        frame[['Open', 'High', 'Low', 'Close']] *= rng.uniform(0.5, 2.0)
+        frames.append(frame)
+    # 고가 = 저가 인 구간 (스토캐스틱 0/0)
+    flat = bars.iloc[-40:].copy()
+    flat.iloc[:10, :4] = 100.0
+    frames.append(flat)
+
+    for name, error in check_parity(frames).items():
+        print(f"{name:>14}: max abs error {error:.3e}")
+    print(f"OK: {len(frames)} frames match ta")
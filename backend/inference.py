@@ -0,0 +1,135 @@
+import os
+import time
+import numpy as np
+
+from numpy_dqn import NumpyDQN, NumpyFusedDQN, convert, is_stale, npz_path_for, random_weights
+
+# DQN 실행 방식: "torch" (기본), "numpy" (torch import 없이 NumPy로 forward),
+# "int8" (Linear 레이어 동적 int8 양자화)
+DQN_RUNTIME = os.getenv("DQN_RUNTIME", "torch")
+
+HEADS = ("buy", "sell")
+
+
+class DQNPredictor:
+    """매수/매도 모델 묶음. runtime 에 관계없이 numpy 배열을 받아 numpy Q값을 반환"""
+
+    def __init__(self, models, fused, runtime, loaded, paths=(None, None), load_seconds=(0.0, 0.0)):
+        self.models = dict(zip(HEADS, models))
+        self.fused = fused
+        self.runtime = runtime
+        self.loaded = dict(zip(HEADS, loaded))   # 가중치 파일에서 읽었는지 여부
+        self.paths = dict(zip(HEADS, paths))
+        self.load_seconds = dict(zip(HEADS, load_seconds))
+
+    def describe(self):
+        """모델별 로드 상태 (readiness 응답용)"""
+        return {
+            name: {
+                "loaded": self.loaded[name],
+                "path": self.paths[name],
+                "runtime": self.runtime,
+                "load_seconds": round(self.load_seconds[name], 4),
+            }
+            for name in HEADS
+        }
+
+    def predict(self, states):
+        """(배치, 14) -> (2, 배치, 2). [0] = 매수, [1] = 매도"""
+        return self.fused.predict(np.asarray(states, dtype=np.float32))
+
+    def predict_head(self, name, states):
+        """한 모델만 평가: (배치, 14) -> (배치, 2)"""
+        if name not in self.models:
+            raise ValueError("Invalid agent type")
+        states = np.asarray(states, dtype=np.float32)
+        if self.runtime in ("torch", "int8"):
+            import torch
+            with torch.no_grad():
+                return self.models[name](torch.from_numpy(states)).numpy()
+        return self.models[name](states)
+
+
+def _load_torch(paths, strict, load_seconds):
+    import torch
+    from dqn import DQN, FusedDQN, INPUT_DIM, OUTPUT_DIM
+
+    models, loaded = [], []
+    for path in paths:
+        start = time.perf_counter()
+        model = DQN(INPUT_DIM, OUTPUT_DIM)
+        if path and os.path.exists(path):
+            model.load_state_dict(torch.load(path, map_location=torch.device('cpu')))
+            print(f"Model loaded from {path}")
+            loaded.append(True)
+        elif strict:
+            raise FileNotFoundError(path)
+        else:
+            print(f"WARNING: {path} not found, using untrained model")
+            loaded.append(False)
+        model.eval()
+        models.append(model)
+        load_seconds.append(time.perf_counter() - start)
+    return models, FusedDQN(models), loaded
+
+
+class StackedModels:
+    """융합할 수 없는 모델(양자화 모델 등)을 차례로 돌려 FusedDQN 과 같은 (모델 수, 배치, 2) 형태로 반환"""
+
+    def __init__(self, models):
+        self.models = models
+
+    def predict(self, states):
+        import torch
+        with torch.no_grad():
+            x = torch.as_tensor(states, dtype=torch.float32)
+            return torch.stack([model(x) for model in self.models]).numpy()
+
+
+def quantize(model):
+    """Linear 레이어 가중치를 int8로 동적 양자화 (활성값은 실행 시 양자화)"""
+    import torch
+    import torch.nn as nn
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def _load_int8(paths, strict, load_seconds):
+    models, _, loaded = _load_torch(paths, strict, load_seconds)
+    models = [quantize(model) for model in models]
+    print("Models quantized to int8 (dynamic)")
+    return models, StackedModels(models), loaded
+
+
+def _load_numpy(paths, strict, load_seconds):
+    models, loaded = [], []
+    for path in paths:
+        start = time.perf_counter()
+        npz_path = path if not path or path.endswith(".npz") else npz_path_for(path)
+        if npz_path and npz_path != path and os.path.exists(path) and is_stale(path, npz_path):
+            # .npz 가 없거나 .pth 가 다시 학습되어 바뀌었을 때만 .pth -> .npz 변환 (torch 필요)
+            convert(path, npz_path)
+
+        if npz_path and os.path.exists(npz_path):
+            models.append(NumpyDQN.load(npz_path))
+            print(f"Model loaded from {npz_path} (numpy runtime)")
+            loaded.append(True)
+        elif strict:
+            raise FileNotFoundError(npz_path)
+        else:
+            print(f"WARNING: {npz_path} not found, using untrained model")
+            models.append(NumpyDQN(random_weights()))
+            loaded.append(False)
+        load_seconds.append(time.perf_counter() - start)
+    return models, NumpyFusedDQN(models), loaded
+
+
+def load_predictor(buy_path="buy_model.pth", sell_path="sell_model.pth", runtime=DQN_RUNTIME, strict=False):
+    """runtime 설정에 맞게 매수/매도 모델 로드. strict=False면 파일이 없을 때(경로 None 포함) 학습 안 된 모델 사용"""
+    loaders = {"torch": _load_torch, "numpy": _load_numpy, "int8": _load_int8}
+    if runtime not in loaders:
+        raise ValueError(f"Unknown DQN_RUNTIME: {runtime} (expected one of {list(loaders)})")
+
+    paths = [buy_path, sell_path]
+    load_seconds = []
+    models, fused, loaded = loaders[runtime](paths, strict, load_seconds)
+    return DQNPredictor(models, fused, runtime, loaded, paths, load_seconds)
@@ -12,6 +12,7 @@ from threading import Thread, Lock
 import time
 import random
 import json
+import metrics
 
 app = FastAPI()
 
@@ -23,6 +24,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus /metrics
+metrics.install(app)
+tr_seconds = metrics.REGISTRY.histogram("kiwoom_tr_seconds", "Kiwoom TR request round trip", ["tr", "result"])
+order_seconds = metrics.REGISTRY.histogram("kiwoom_order_seconds", "Kiwoom SendOrder latency", ["side", "result"])
+orders_total = metrics.REGISTRY.counter("kiwoom_orders_total", "Orders submitted", ["side", "result", "source"])
+agent_seconds = metrics.REGISTRY.histogram("auto_trade_agent_request_seconds", "DQN server call from the auto-trade loop", ["agent"])
+cycle_seconds = metrics.REGISTRY.histogram("auto_trade_cycle_seconds", "Auto-trade cycle duration (excluding the wait between cycles)")
+last_cycle_seconds = metrics.REGISTRY.gauge("auto_trade_last_cycle_seconds", "Duration of the most recent auto-trade cycle")
+auto_trade_active = metrics.REGISTRY.gauge("auto_trade_running", "1 while the auto-trade loop is running")
+auto_trade_active.set_function(lambda: 1 if auto_trade_running else 0)
+
 auto_trade_stocks = []
 auto_trade_running = False
 auto_trade_thread = None
@@ -198,6 +210,15 @@ class Kiwoom(QAxWidget):
                 self.tr_data = "0"
                 self.tr_received = True
 
+    def _wait_tr(self, trcode, start):
+        """TR 응답 대기 (최대 5초) 후 왕복 시간 기록"""
+        for _ in range(50):
+            time.sleep(0.1)
+            QApplication.processEvents()
+            if self.tr_received:
+                break
+        tr_seconds.observe(time.perf_counter() - start, tr=trcode, result="ok" if self.tr_received else "timeout")
+
     def connect(self):
         self.login_event_loop = QEventLoop()
         self.dynamicCall("CommConnect()")
@@ -217,14 +238,11 @@ class Kiwoom(QAxWidget):
             self.dynamicCall("SetInputValue(QString, QString)", "비밀번호입력매체구분", "00")
             self.dynamicCall("SetInputValue(QString, QString)", "조회구분", "1")
             
+            start = time.perf_counter()
             ret = self.dynamicCall("CommRqData(QString, QString, int, QString)", "계좌평가잔고내역요청", "opw00018", 0, "2000")
             
             if ret == 0:
-                for _ in range(50):
-                    time.sleep(0.1)
-                    QApplication.processEvents()
-                    if self.tr_received:
-                        break
+                self._wait_tr("opw00018", start)
             
             return self.tr_data if isinstance(self.tr_data, list) else []
 
@@ -240,14 +258,11 @@ class Kiwoom(QAxWidget):
             self.dynamicCall("SetInputValue(QString, QString)", "비밀번호", "")
             self.dynamicCall("SetInputValue(QString, QString)", "비밀번호입력매체구분", "00")
             
+            start = time.perf_counter()
             ret = self.dynamicCall("CommRqData(QString, QString, int, QString)", "예수금상세현황요청", "opw00001", 0, "2003")
             
             if ret == 0:
-                for _ in range(50):
-                    time.sleep(0.1)
-                    QApplication.processEvents()
-                    if self.tr_received:
-                        break
+                self._wait_tr("opw00001", start)
             
             return self.tr_data if isinstance(self.tr_data, dict) else {}
 
@@ -258,27 +273,28 @@ class Kiwoom(QAxWidget):
         with self.tr_lock:
             self.tr_received = False
             self.dynamicCall("SetInputValue(QString, QString)", "종목코드", code)
+            start = time.perf_counter()
             self.dynamicCall("CommRqData(QString, QString, int, QString)", "현재가조회", "opt10001", 0, "2001")
             
-            for _ in range(50):
-                time.sleep(0.1)
-                QApplication.processEvents()
-                if self.tr_received:
-                    break
+            self._wait_tr("opt10001", start)
             
             return self.tr_data
 
-    def send_order(self, order_type, code, qty, price):
+    def send_order(self, order_type, code, qty, price, source="api"):
         if not self.is_connected:
             return False
         
         order_type_code = 1 if order_type == "BUY" else 2
         hoga_gb = "03" if price == 0 else "00"
         
+        start = time.perf_counter()
         result = self.dynamicCall(
             "SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)",
             ["Order", "2000", self.account_number, order_type_code, code, qty, price, hoga_gb, ""]
         )
+        outcome = "ok" if result == 0 else "error"
+        order_seconds.observe(time.perf_counter() - start, side=order_type, result=outcome)
+        orders_total.inc(side=order_type, result=outcome, source=source)
         
         print(f"Order: {order_type} {code} {qty}@{price} => {result}")
         return result == 0
@@ -307,6 +323,7 @@ def auto_trade_loop():
             time.sleep(5)
             continue
         
+        cycle_start = time.perf_counter()
         try:
             for stock_code in auto_trade_stocks:
                 if not auto_trade_running:
@@ -329,10 +346,11 @@ def auto_trade_loop():
                     print(f"[{stock_code}] Has {current_position['qty']} shares, checking SELL agent first...")
                     
                     try:
-                        sell_response = requests.get(
-                            f"http://localhost:8001/predict/{stock_code}/sell",
-                            timeout=10
-                        )
+                        with agent_seconds.time(agent="sell"):
+                            sell_response = requests.get(
+                                f"http://localhost:8001/predict/{stock_code}/sell",
+                                timeout=10
+                            )
                         
                         if sell_response.status_code == 200:
                             sell_data = sell_response.json()
@@ -346,7 +364,7 @@ def auto_trade_loop():
                                 qty = int(current_position["qty"])
                                 print(f"[{stock_code}] SELLING {qty} shares")
                                 
-                                success = kiwoom.send_order("SELL", stock_code, qty, 0)
+                                success = kiwoom.send_order("SELL", stock_code, qty, 0, source="auto")
                                 print(f"[{stock_code}] Sell result: {success}")
                                 continue  # 매도했으면 이번 턴에서는 매수 안함
                         
@@ -355,10 +373,11 @@ def auto_trade_loop():
                 
                 # 매수 에이전트 호출 (보유량 없거나 매도 안하는 경우)
                 try:
-                    buy_response = requests.get(
-                        f"http://localhost:8001/predict/{stock_code}/buy",
-                        timeout=10
-                    )
+                    with agent_seconds.time(agent="buy"):
+                        buy_response = requests.get(
+                            f"http://localhost:8001/predict/{stock_code}/buy",
+                            timeout=10
+                        )
                     
                     if buy_response.status_code == 200:
                         buy_data = buy_response.json()
@@ -378,7 +397,7 @@ def auto_trade_loop():
                                 print(f"[{stock_code}] BUYING {qty} shares @ {current_price:,}원")
                                 print(f"[{stock_code}] Total cost: {total_cost:,}원 (Budget: {auto_trade_amount_per_stock:,}원)")
                                 
-                                success = kiwoom.send_order("BUY", stock_code, qty, 0)
+                                success = kiwoom.send_order("BUY", stock_code, qty, 0, source="auto")
                                 print(f"[{stock_code}] Buy result: {success}")
                 
                 except Exception as e:
@@ -389,7 +408,10 @@ def auto_trade_loop():
         except Exception as e:
             print(f"Auto trade loop error: {e}")
             
-        print(f"Auto trade cycle completed. Waiting 60 seconds...")
+        cycle_duration = time.perf_counter() - cycle_start
+        cycle_seconds.observe(cycle_duration)
+        last_cycle_seconds.set(cycle_duration)
+        print(f"Auto trade cycle completed in {cycle_duration:.1f}s. Waiting 60 seconds...")
         time.sleep(60)
     
     print("AUTO TRADE LOOP STOPPED")
@@ -1,16 +1,20 @@
-import yfinance as yf
-import pandas as pd
-import ta
-from ta.momentum import RSIIndicator, StochasticOscillator
-from ta.trend import MACD, CCIIndicator, EMAIndicator
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Depends
 from pydantic import BaseModel
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
+from typing import List
 from fastapi.middleware.cors import CORSMiddleware
+import numpy as np
 import uvicorn
+import asyncio
 import os
+from collections import OrderedDict
+from threading import Lock
+from cache import LRUCache
+from indicators import latest_features
+from inference import load_predictor
+import metrics
+from model_registry import ModelRegistry, UNTRAINED_VERSION
+from singleflight import SingleFlight
+from warmup import Warmup
 
 app = FastAPI()
 
@@ -21,52 +25,93 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class DQN(nn.Module):
-    def __init__(self, input_dim, output_dim):
-        super(DQN, self).__init__()
-        self.fc1 = nn.Linear(input_dim, 256)
-        self.fc2 = nn.Linear(256, 512)
-        self.fc3 = nn.Linear(512, 512)
-        self.fc4 = nn.Linear(512, 256)
-        self.fc5 = nn.Linear(256, output_dim)
-
-    def forward(self, x):
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
-        x = F.relu(self.fc3(x))
-        x = F.relu(self.fc4(x))
-        return self.fc5(x)
-
-INPUT_DIM = 14
-OUTPUT_DIM = 2
-
-# 모델 로딩 (파일이 없으면 더미 모델)
-try:
-    buy_model = DQN(INPUT_DIM, OUTPUT_DIM)
-    if os.path.exists("buy_model.pth"):
-        buy_model.load_state_dict(torch.load("buy_model.pth", map_location=torch.device('cpu')))
-        print("Buy model loaded from buy_model.pth")
-    else:
-        print("WARNING: buy_model.pth not found, using untrained model")
-    buy_model.eval()
-
-    sell_model = DQN(INPUT_DIM, OUTPUT_DIM)
-    if os.path.exists("sell_model.pth"):
-        sell_model.load_state_dict(torch.load("sell_model.pth", map_location=torch.device('cpu')))
-        print("Sell model loaded from sell_model.pth")
-    else:
-        print("WARNING: sell_model.pth not found, using untrained model")
-    sell_model.eval()
-
-    print("Buy and Sell models initialized successfully")
-
-except Exception as e:
-    print(f"Model loading error: {e}")
-    # 에러 시 더미 모델 생성
-    buy_model = DQN(INPUT_DIM, OUTPUT_DIM)
-    sell_model = DQN(INPUT_DIM, OUTPUT_DIM)
-    buy_model.eval()
-    sell_model.eval()
+# 모델 / 일봉 캐시는 warm_up()에서 준비 (FAST_START=1 이면 포트를 연 뒤 백그라운드에서)
+# 모델은 MODEL_DIR 의 새 버전을 감시하다가 백그라운드에서 로드 후 교체 (없으면 buy_model.pth, sell_model.pth)
+registry = ModelRegistry(strict=False)
+market_data = None
+warmup = Warmup()
+
+def warm_up():
+    """무거운 import(pandas, yfinance, torch)와 모델 로딩"""
+    global market_data
+
+    # 뒤 단계가 실패해도 MODEL_DIR 에 올라오는 새 버전은 로드하도록 감시는 먼저 시작
+    registry.start()
+
+    with warmup.stage("imports"):
+        import pandas  # noqa: F401
+
+    with warmup.stage("market_data"):
+        from market_data import create_provider
+        # 일봉 공급자 (MARKET_DATA_PROVIDER=yfinance | local | memory)
+        market_data = create_provider()
+        if market_data.name == "yfinance":
+            import yfinance  # noqa: F401
+
+    # 모델 로딩 + 더미 배치 워밍업 (파일이 없으면 더미 모델). DQN_RUNTIME=numpy 면 torch 없이 NumPy로 추론
+    with warmup.stage("models"):
+        if registry.refresh():
+            print(f"Buy and Sell models initialized successfully ({registry.runtime} runtime, version {registry.version})")
+        else:
+            print(f"Model loading error: {registry.failed or 'no model files'}")
+            # 에러 시 더미 모델 생성 (새 버전이 올라오면 감시 스레드가 교체)
+            registry.install(UNTRAINED_VERSION, load_predictor(None, None, runtime="numpy"))
+        warmup.models = registry.active.predictor.describe()
+
+def on_model_installed(active):
+    """모델 단계에서 워밍업이 실패했어도 감시 스레드가 새 버전을 올리면 준비 완료로 전환 (일봉 공급자는 준비된 경우만)"""
+    if warmup.error is not None and market_data is not None:
+        warmup.models = active.predictor.describe()
+        warmup.recover()
+
+registry.listeners.append(on_model_installed)
+
+def require_ready():
+    """워밍업이 끝나기 전에는 503"""
+    if not warmup.ready:
+        raise HTTPException(status_code=503, detail="Server is warming up")
+
+@app.on_event("startup")
+def start_warmup():
+    # FAST_START면 스레드만 띄우고 바로 반환 -> uvicorn이 즉시 포트를 염
+    if warmup.fast_start:
+        warmup.start(warm_up)
+
+if not warmup.fast_start:
+    warmup.start(warm_up)
+
+# (종목, 마지막 봉 날짜) 별 상태 벡터 캐시
+FEATURE_CACHE_SIZE = int(os.getenv("FEATURE_CACHE_SIZE", "1024"))
+FEATURE_CACHE_TTL = float(os.getenv("FEATURE_CACHE_TTL", "60"))
+feature_cache = LRUCache(maxsize=FEATURE_CACHE_SIZE, ttl=FEATURE_CACHE_TTL)
+
+# (종목, 마지막 봉 날짜, 모델 버전) 별 매수/매도 Q값 캐시. 새 봉이 들어오거나 모델이 바뀌면 무효화
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+prediction_cache = LRUCache(maxsize=PREDICTION_CACHE_SIZE)
+# 종목별 마지막 봉 날짜 (새 봉이 들어오면 이전 봉 예측 제거용). 스레드에서 같이 쓰므로 락, 크기는 캐시와 같게 제한
+last_bar_dates = OrderedDict()
+last_bar_dates_lock = Lock()
+registry.listeners.append(lambda active: prediction_cache.clear())
+
+# 같은 종목/기간 동시 조회는 하나로 합치고, 동시에 도는 블로킹 조회 수 제한
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+data_fetcher = SingleFlight(max_concurrency=FETCH_CONCURRENCY)
+
+# Prometheus /metrics (요청 지연시간 / 처리 중 요청 수는 미들웨어가 기록)
+metrics.install(app)
+fetch_seconds = metrics.REGISTRY.histogram("data_fetch_seconds", "Bar data load latency", ["mode"])
+feature_seconds = metrics.REGISTRY.histogram("feature_build_seconds", "State vector computation latency")
+inference_seconds = metrics.REGISTRY.histogram("inference_seconds", "Fused buy/sell forward latency")
+inference_batch_size = metrics.REGISTRY.histogram(
+    "inference_batch_size", "Rows per fused forward", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+cache_hit_ratio = metrics.REGISTRY.gauge("cache_hit_ratio", "Cache hits / lookups", ["cache"])
+cache_entries = metrics.REGISTRY.gauge("cache_entries", "Cached entries", ["cache"])
+fetch_inflight = metrics.REGISTRY.gauge("data_fetch_in_flight", "Distinct bar fetches currently running")
+fetch_inflight.set_function(lambda: data_fetcher.inflight)
+
+for cache_name, cache in (("feature", feature_cache), ("prediction", prediction_cache)):
+    cache_hit_ratio.set_function(lambda cache=cache: cache.stats()["hit_ratio"], cache=cache_name)
+    cache_entries.set_function(lambda cache=cache: len(cache), cache=cache_name)
 
 def map_korean_ticker(symbol):
     """한국 주식 코드를 yfinance 형식으로 변환"""
@@ -79,242 +124,359 @@ def get_state_from_yfinance(ticker):
     mapped_ticker = map_korean_ticker(ticker)
     try:
         print(f"Fetching data for {ticker} ({mapped_ticker})")
-        df_origin = yf.download(mapped_ticker, period="2mo", interval="1d", progress=False)
-
-        if df_origin.empty:
-            raise ValueError(f"No data available for {ticker}")
-
-        # pandas 오류 해결: dropna() 먼저 적용
-        df_origin = df_origin.dropna()
-        if len(df_origin) < 21:  # EMA20 계산을 위해 최소 21일 필요
-            raise ValueError(f"Insufficient data for {ticker} (only {len(df_origin)} days)")
-
-        df = pd.DataFrame()
+        with fetch_seconds.time(mode="single"):
+            df_origin = market_data.load(mapped_ticker, period="2mo")
+        return build_state(ticker, mapped_ticker, df_origin)
 
-        # 변화량 계산 (안전하게)
-        df['Open_Change'] = df_origin['Open'].diff(1).fillna(0)
-        df['High_Change'] = df_origin['High'].diff(1).fillna(0)
-        df['Low_Change'] = df_origin['Low'].diff(1).fillna(0)
-        df['Close_Change'] = df_origin['Close'].diff(1).fillna(0)
-        df['Volume_Change'] = df_origin['Volume'].diff(1).fillna(0)
-
-        # EMA20 계산 (안전하게)
-        try:
-            ema20 = EMAIndicator(close=df_origin['Close'], window=20)
-            ema_values = ema20.ema_indicator()
-            df['EWM20_Change'] = ema_values.diff(1).fillna(0)
-        except Exception as e:
-            print(f"EMA calculation error: {e}, using simple moving average")
-            df['EWM20_Change'] = df_origin['Close'].rolling(20).mean().diff(1).fillna(0)
-
-        # KDJ (안전하게)
-        try:
-            stoch = StochasticOscillator(
-                high=df_origin['High'],
-                low=df_origin['Low'],
-                close=df_origin['Close'],
-                window=5,
-                smooth_window=3
-            )
-            df['FastK'] = stoch.stoch().fillna(50)
-            df['SlowD'] = stoch.stoch_signal().fillna(50)
-            df['SlowJ'] = (3 * df['FastK'] - 2 * df['SlowD']).fillna(50)
-        except Exception as e:
-            print(f"KDJ calculation error: {e}, using default values")
-            df['FastK'] = pd.Series([50] * len(df_origin), index=df_origin.index)
-            df['SlowD'] = pd.Series([50] * len(df_origin), index=df_origin.index)
-            df['SlowJ'] = pd.Series([50] * len(df_origin), index=df_origin.index)
-
-        # MACD (안전하게)
-        try:
-            macd = MACD(close=df_origin['Close'], window_slow=26, window_fast=12, window_sign=9)
-            df['MACD'] = macd.macd().fillna(0)
-            df['MACDS'] = macd.macd_signal().fillna(0)
-            df['MACDO'] = (df['MACD'] - df['MACDS']).fillna(0)
-        except Exception as e:
-            print(f"MACD calculation error: {e}, using default values")
-            df['MACD'] = pd.Series([0] * len(df_origin), index=df_origin.index)
-            df['MACDS'] = pd.Series([0] * len(df_origin), index=df_origin.index)
-            df['MACDO'] = pd.Series([0] * len(df_origin), index=df_origin.index)
-
-        # CCI (안전하게)
-        try:
-            cci = CCIIndicator(
-                high=df_origin['High'],
-                low=df_origin['Low'],
-                close=df_origin['Close'],
-                window=14
-            )
-            df['CCI'] = cci.cci().fillna(0)
-        except Exception as e:
-            print(f"CCI calculation error: {e}, using default values")
-            df['CCI'] = pd.Series([0] * len(df_origin), index=df_origin.index)
+    except Exception as e:
+        print(f"yfinance error for {ticker}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get data for {ticker}: {str(e)}")
 
-        # RSI (안전하게)
+async def get_state_async(ticker, period="2mo"):
+    """get_state_from_yfinance 비동기 버전. 진행 중인 같은 종목 조회가 있으면 그 결과를 공유"""
+    key = (map_korean_ticker(ticker), period)
+    return await data_fetcher.run(key, get_state_from_yfinance, ticker)
+
+def validate_bars(ticker, df_origin):
+    """상태 벡터 계산 전 일봉 데이터 검증"""
+    if df_origin.empty:
+        raise ValueError(f"No data available for {ticker}")
+
+    # pandas 오류 해결: dropna() 먼저 적용
+    df_origin = df_origin.dropna()
+    if len(df_origin) < 21:  # EMA20 계산을 위해 최소 21일 필요
+        raise ValueError(f"Insufficient data for {ticker} (only {len(df_origin)} days)")
+    return df_origin
+
+def build_states(entries):
+    """여러 종목의 상태 벡터를 NumPy 지표 엔진으로 한 번에 계산 (같은 마지막 봉이면 캐시 사용)
+
+    entries: [(ticker, mapped_ticker, df_origin), ...]
+    반환: {ticker: (state, last_date, last_price) 또는 실패 시 Exception}
+    """
+    snapshots = {}
+    pending = []
+    for ticker, mapped_ticker, df_origin in entries:
         try:
-            rsi = RSIIndicator(close=df_origin['Close'], window=14)
-            df['RSI'] = rsi.rsi().fillna(50)
+            df_origin = validate_bars(ticker, df_origin)
         except Exception as e:
-            print(f"RSI calculation error: {e}, using default values")
-            df['RSI'] = pd.Series([50] * len(df_origin), index=df_origin.index)
-
-        # 최종 상태 벡터 (NaN 제거)
-        state_features = [
-            'Open_Change', 'High_Change', 'Low_Change', 'Close_Change', 'Volume_Change',
-            'EWM20_Change', 'FastK', 'SlowD', 'SlowJ',
-            'MACD', 'MACDS', 'MACDO', 'CCI', 'RSI'
-        ]
+            snapshots[ticker] = e
+            continue
 
-        latest_state = df[state_features].fillna(0).iloc[-1].values.astype(float)
         last_date = df_origin.index[-1].strftime('%Y-%m-%d')
-        last_price = float(df_origin['Close'].iloc[-1])
-
-        print(f"{ticker} state extracted: RSI={latest_state[-1]:.2f}, MACD={latest_state[9]:.4f}, Price={last_price:,.0f}, Date={last_date}")
-
-        return latest_state, last_date, last_price
+        cache_key = (mapped_ticker, last_date)
+        snapshot = feature_cache.get(cache_key)
+        if snapshot is not None:
+            snapshots[ticker] = snapshot
+        else:
+            pending.append((ticker, cache_key, df_origin))
+
+    if pending:
+        with feature_seconds.time():
+            states = latest_features([df_origin for _, _, df_origin in pending])
+        for (ticker, cache_key, df_origin), latest_state in zip(pending, states):
+            last_date = cache_key[1]
+            last_price = float(df_origin['Close'].iloc[-1])
+            print(f"{ticker} state extracted: RSI={latest_state[-1]:.2f}, MACD={latest_state[9]:.4f}, Price={last_price:,.0f}, Date={last_date}")
+
+            snapshot = (latest_state, last_date, last_price)
+            feature_cache.set(cache_key, snapshot)
+            snapshots[ticker] = snapshot
+
+    return snapshots
+
+def build_state(ticker, mapped_ticker, df_origin):
+    """일봉 데이터로 DQN 입력 상태 벡터 생성"""
+    snapshot = build_states([(ticker, mapped_ticker, df_origin)])[ticker]
+    if isinstance(snapshot, Exception):
+        raise snapshot
+    return snapshot
+
+def note_bar_date(mapped_ticker, last_date, model_version):
+    """새 봉이 들어오면 이전 봉 예측은 다시 쓰일 일이 없으므로 바로 제거
+
+    모델이 바뀌면 prediction_cache 전체가 비워지므로 현재 버전 키만 지우면 된다.
+    """
+    with last_bar_dates_lock:
+        previous_date = last_bar_dates.get(mapped_ticker)
+        if previous_date != last_date:
+            if previous_date is not None:
+                prediction_cache.pop((mapped_ticker, previous_date, model_version))
+            last_bar_dates[mapped_ticker] = last_date
+        last_bar_dates.move_to_end(mapped_ticker)
+        while len(last_bar_dates) > PREDICTION_CACHE_SIZE:
+            last_bar_dates.popitem(last=False)
+
+def predict_snapshots(entries, model):
+    """[(mapped_ticker, snapshot), ...] -> [(매수 Q값, 매도 Q값), ...]
+
+    (종목, 마지막 봉 날짜, 모델 버전)이 같고 상태 벡터도 그대로면 캐시된 Q값을 쓰고,
+    나머지만 융합 모델 한 번의 배치 forward로 계산한다.
+    """
+    results = [None] * len(entries)
+    pending = []
+    for i, (mapped_ticker, (state, last_date, _)) in enumerate(entries):
+        note_bar_date(mapped_ticker, last_date, model.version)
+
+        cache_key = (mapped_ticker, last_date, model.version)
+        # 같은 날짜라도 당일 봉이 갱신돼 상태 벡터가 바뀌었으면 다시 계산
+        cached = prediction_cache.get(cache_key, validate=lambda item: np.array_equal(item[0], state))
+        if cached is not None:
+            results[i] = cached[1]
+        else:
+            pending.append((i, cache_key, state))
+
+    if pending:
+        states = np.array([state for _, _, state in pending])
+        inference_batch_size.observe(len(states))
+        with inference_seconds.time():
+            buy_q, sell_q = model.predictor.predict(states).tolist()
+        for (i, cache_key, state), q_values in zip(pending, zip(buy_q, sell_q)):
+            prediction_cache.set(cache_key, (state, q_values))
+            results[i] = q_values
+    return results
+
+def decide_action(ticker, agent_type, snapshot=None):
+    """DQN 모델을 사용하여 매수/매도 결정 (snapshot을 넘기면 데이터 조회 생략)"""
+    try:
+        if agent_type not in ("buy", "sell"):
+            raise ValueError("Invalid agent type")
+        if snapshot is None:
+            snapshot = get_state_from_yfinance(ticker)
+        state, last_date, last_price = snapshot
+        model = registry.active
+        buy_q, sell_q = predict_snapshots([(map_korean_ticker(ticker), snapshot)], model)[0]
+        q_values = buy_q if agent_type == "buy" else sell_q
+
+        decision = make_decision(agent_type, q_values, last_date, last_price, model.version)
+        print(f"DQN {agent_type.upper()} for {ticker}: {decision['action']} (confidence: {decision['confidence']:.4f})")
+        return decision
 
     except Exception as e:
-        print(f"yfinance error for {ticker}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to get data for {ticker}: {str(e)}")
+        print(f"Decision error for {ticker}: {e}")
+        raise HTTPException(status_code=500, detail=f"Decision failed for {ticker}: {str(e)}")
 
-def decide_action(ticker, agent_type):
-    """DQN 모델을 사용하여 매수/매도 결정"""
+async def decide_action_async(ticker, agent_type):
+    """decide_action 비동기 버전 (데이터 조회는 single-flight + 스레드, 모델 계산도 스레드)"""
     try:
-        state, last_date, last_price = get_state_from_yfinance(ticker)
-        input_tensor = torch.FloatTensor([state])
-
-        with torch.no_grad():
-            if agent_type == "buy":
-                q_values = buy_model(input_tensor).numpy().tolist()[0]
-                action = int(torch.argmax(torch.tensor(q_values)))
-                confidence = max(q_values)
-                action_name = "BUY" if action == 1 else "HOLD"
+        snapshot = await get_state_async(ticker)
+    except Exception as e:
+        print(f"Decision error for {ticker}: {e}")
+        raise HTTPException(status_code=500, detail=f"Decision failed for {ticker}: {str(e)}")
+    return await asyncio.to_thread(decide_action, ticker, agent_type, snapshot)
+
+def make_decision(agent_type, q_values, last_date, last_price, model_version=None):
+    """Q값으로 매수/매도 에이전트의 행동과 신뢰도 결정"""
+    action = int(np.argmax(q_values))
+    confidence = max(q_values)
+    if agent_type == "buy":
+        action_name = "BUY" if action == 1 else "HOLD"
+    else:
+        action_name = "SELL" if action == 1 else "HOLD"
 
-            elif agent_type == "sell":
-                q_values = sell_model(input_tensor).numpy().tolist()[0]
-                action = int(torch.argmax(torch.tensor(q_values)))
-                confidence = max(q_values)
-                action_name = "SELL" if action == 1 else "HOLD"
+    return {
+        "action": action_name,
+        "confidence": float(abs(confidence)),
+        "reason": f"DQN {agent_type} model prediction (Price: {last_price:,.0f})",
+        "date": last_date,
+        "price": last_price,
+        "model_version": model_version
+    }
 
-            else:
-                raise ValueError("Invalid agent type")
+def decide_both(ticker, snapshot):
+    """매수/매도 모델을 융합 모델 한 번으로 평가해 두 결정을 같이 반환"""
+    state, last_date, last_price = snapshot
+    model = registry.active
+    buy_q, sell_q = predict_snapshots([(map_korean_ticker(ticker), snapshot)], model)[0]
+
+    buy_dec = make_decision("buy", buy_q, last_date, last_price, model.version)
+    sell_dec = make_decision("sell", sell_q, last_date, last_price, model.version)
+    print(f"DQN BUY/SELL for {ticker}: {buy_dec['action']}/{sell_dec['action']} "
+          f"(confidence: {buy_dec['confidence']:.4f}/{sell_dec['confidence']:.4f})")
+    return buy_dec, sell_dec
+
+def final_recommendation(symbol, buy_dec, sell_dec):
+    """매수/매도 에이전트 결정을 합쳐 최종 추천 생성"""
+    if buy_dec["action"] == "BUY" and buy_dec["confidence"] > 0.5:
+        final_action = "BUY"
+        confidence = buy_dec["confidence"]
+        reason = buy_dec["reason"]
+    elif sell_dec["action"] == "SELL" and sell_dec["confidence"] > 0.5:
+        final_action = "SELL"
+        confidence = sell_dec["confidence"]
+        reason = sell_dec["reason"]
+    else:
+        final_action = "HOLD"
+        confidence = max(buy_dec["confidence"], sell_dec["confidence"])
+        reason = "Hold (low confidence)"
 
-        print(f"DQN {agent_type.upper()} for {ticker}: {action_name} (confidence: {confidence:.4f})")
+    print(f"{symbol} final recommendation: {final_action} (confidence: {confidence:.4f})")
 
-        return {
-            "action": action_name,
-            "confidence": float(abs(confidence)),
-            "reason": f"DQN {agent_type} model prediction (Price: {last_price:,.0f})",
-            "date": last_date,
-            "price": last_price
-        }
+    return {
+        "symbol": symbol,
+        "action": final_action,
+        "confidence": confidence,
+        "recommended_qty": 10 if final_action in ["BUY", "SELL"] else 0,
+        "reason": reason,
+        "date": buy_dec["date"],
+        "price": buy_dec["price"],
+        "model_version": buy_dec["model_version"]
+    }
 
-    except Exception as e:
-        print(f"Decision error for {ticker}: {e}")
-        raise HTTPException(status_code=500, detail=f"Decision failed for {ticker}: {str(e)}")
+def hold_recommendation(symbol, error):
+    """에러 시 기본 HOLD 응답"""
+    return {
+        "symbol": symbol,
+        "action": "HOLD",
+        "confidence": 0.0,
+        "recommended_qty": 0,
+        "reason": f"Data fetch failed: {str(error)}",
+        "date": "N/A",
+        "price": 0,
+        "model_version": None
+    }
 
-@app.get("/ai/recommend")
-def ai_recommend(symbol: str = Query(...)):
+@app.get("/ai/recommend", dependencies=[Depends(require_ready)])
+async def ai_recommend(symbol: str = Query(...)):
     """AI 추천 API (GET 방식)"""
     print(f"AI recommendation request: {symbol}")
     try:
-        # 매수 및 매도 모델로부터 결정 받기
-        buy_dec = decide_action(symbol, "buy")
-        sell_dec = decide_action(symbol, "sell")
-
-        # 최종 결정 로직
-        if buy_dec["action"] == "BUY" and buy_dec["confidence"] > 0.5:
-            final_action = "BUY"
-            confidence = buy_dec["confidence"]
-            reason = buy_dec["reason"]
-        elif sell_dec["action"] == "SELL" and sell_dec["confidence"] > 0.5:
-            final_action = "SELL"
-            confidence = sell_dec["confidence"]
-            reason = sell_dec["reason"]
-        else:
-            final_action = "HOLD"
-            confidence = max(buy_dec["confidence"], sell_dec["confidence"])
-            reason = "Hold (low confidence)"
+        # 상태 벡터는 한 번만 만들고 매수/매도 모델이 같이 사용
+        snapshot = await get_state_async(symbol)
+        # 지표 조합 + 모델 forward는 스레드에서 (이벤트 루프를 막지 않음)
+        buy_dec, sell_dec = await asyncio.to_thread(decide_both, symbol, snapshot)
+        return final_recommendation(symbol, buy_dec, sell_dec)
 
-        result = {
-            "symbol": symbol,
-            "action": final_action,
-            "confidence": confidence,
-            "recommended_qty": 10 if final_action in ["BUY", "SELL"] else 0,
-            "reason": reason,
-            "date": buy_dec["date"],
-            "price": buy_dec["price"]
-        }
+    except Exception as e:
+        print(f"AI recommend error for {symbol}: {e}")
+        return hold_recommendation(symbol, e)
+
+class BatchRecommendRequest(BaseModel):
+    symbols: List[str]
 
-        print(f"{symbol} final recommendation: {final_action} (confidence: {confidence:.4f})")
-        return result
+@app.post("/ai/recommend/batch", dependencies=[Depends(require_ready)])
+def ai_recommend_batch(request: BatchRecommendRequest):
+    """여러 종목 AI 추천 (멀티 티커 다운로드 1회 + 모델별 배치 추론 1회)"""
+    symbols = request.symbols
+    print(f"AI batch recommendation request: {len(symbols)} symbols")
 
+    results = {}
+    snapshots = {}
+    try:
+        mapped = {symbol: map_korean_ticker(symbol) for symbol in symbols}
+        with fetch_seconds.time(mode="batch"):
+            bars = market_data.load_many(list(mapped.values()), period="2mo")
     except Exception as e:
-        print(f"AI recommend error for {symbol}: {e}")
-        # 에러 시 기본 HOLD 응답
-        return {
-            "symbol": symbol,
-            "action": "HOLD",
-            "confidence": 0.0,
-            "recommended_qty": 0,
-            "reason": f"Data fetch failed: {str(e)}",
-            "date": "N/A",
-            "price": 0
-        }
+        print(f"Batch data fetch error: {e}")
+        return [hold_recommendation(symbol, e) for symbol in symbols]
+
+    entries = [(symbol, mapped[symbol], bars[mapped[symbol]]) for symbol in dict.fromkeys(symbols)]
+    for symbol, snapshot in build_states(entries).items():
+        if isinstance(snapshot, Exception):
+            print(f"AI recommend error for {symbol}: {snapshot}")
+            results[symbol] = hold_recommendation(symbol, snapshot)
+        else:
+            snapshots[symbol] = snapshot
+
+    if snapshots:
+        model = registry.active
+        q_values = predict_snapshots([(mapped[symbol], snapshot) for symbol, snapshot in snapshots.items()], model)
+
+        for (symbol, (_, last_date, last_price)), (buy_q, sell_q) in zip(snapshots.items(), q_values):
+            buy_dec = make_decision("buy", buy_q, last_date, last_price, model.version)
+            sell_dec = make_decision("sell", sell_q, last_date, last_price, model.version)
+            results[symbol] = final_recommendation(symbol, buy_dec, sell_dec)
+
+    return [results[symbol] for symbol in symbols]
 
 # 추가: 분리된 매수 에이전트 API
-@app.get("/predict/{ticker}/buy")
-def predict_buy(ticker: str):
+@app.get("/predict/{ticker}/buy", dependencies=[Depends(require_ready)])
+async def predict_buy(ticker: str):
     """매수 에이전트 전용 API"""
     print(f"BUY agent prediction for {ticker}")
     try:
-        return decide_action(ticker, "buy")
+        return await decide_action_async(ticker, "buy")
     except Exception as e:
         return {
             "action": "HOLD",
             "confidence": 0.0,
             "reason": f"Error: {str(e)}",
             "date": "N/A",
-            "price": 0
+            "price": 0,
+            "model_version": None
         }
 
 # 추가: 분리된 매도 에이전트 API
-@app.get("/predict/{ticker}/sell")
-def predict_sell(ticker: str):
+@app.get("/predict/{ticker}/sell", dependencies=[Depends(require_ready)])
+async def predict_sell(ticker: str):
     """매도 에이전트 전용 API"""
     print(f"SELL agent prediction for {ticker}")
     try:
-        return decide_action(ticker, "sell")
+        return await decide_action_async(ticker, "sell")
     except Exception as e:
         return {
             "action": "HOLD",
             "confidence": 0.0,
             "reason": f"Error: {str(e)}",
             "date": "N/A",
-            "price": 0
+            "price": 0,
+            "model_version": None
         }
 
-@app.get("/predict/{ticker}/{agent}")
-def predict_ticker(ticker: str, agent: str):
+@app.get("/predict/{ticker}/{agent}", dependencies=[Depends(require_ready)])
+async def predict_ticker(ticker: str, agent: str):
     """개별 예측 API (매수/매도 모델 개별 테스트용)"""
-    return decide_action(ticker, agent)
+    return await decide_action_async(ticker, agent)
 
 @app.get("/health")
 def health_check():
     """서버 상태 확인"""
+    model = registry.active
     return {
-        "status": "healthy",
-        "buy_model_loaded": buy_model is not None,
-        "sell_model_loaded": sell_model is not None,
+        "status": "healthy" if warmup.ready else "starting",
+        "buy_model_loaded": model is not None and model.predictor.loaded["buy"],
+        "sell_model_loaded": model is not None and model.predictor.loaded["sell"],
+        "runtime": model.predictor.runtime if model is not None else None,
+        "model_version": registry.version,
+        "market_data": market_data.name if market_data is not None else None,
+        "data_fetch": data_fetcher.stats(),
+        "feature_cache": feature_cache.stats(),
+        "prediction_cache": prediction_cache.stats(),
         "port": 8001,
         "message": "DQN AI Server Running"
     }
 
-@app.get("/test/{symbol}")
-def test_data_fetch(symbol: str):
+@app.get("/health/live")
+def liveness():
+    """프로세스가 살아 있는지 (워밍업 중에도 200)"""
+    return warmup.liveness()
+
+@app.get("/health/ready")
+def readiness():
+    """요청을 받을 준비가 됐는지. 모델별 로드 상태 / 워밍업 단계별 소요 시간 포함"""
+    status = warmup.readiness()
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=status)
+    status["models"] = registry.active.predictor.describe()
+    status["model_version"] = registry.version
+    return status
+
+@app.get("/models")
+def model_versions():
+    """서비스 중인 모델 버전, 교체 기록, 로드 실패한 버전"""
+    return registry.describe()
+
+@app.post("/models/reload", dependencies=[Depends(require_ready)])
+def reload_models():
+    """감시 주기를 기다리지 않고 새 버전 확인 (로드 + 워밍업이 끝나야 반환)"""
+    swapped = registry.refresh()
+    return {"swapped": swapped, "model_version": registry.version}
+
+@app.get("/test/{symbol}", dependencies=[Depends(require_ready)])
+async def test_data_fetch(symbol: str):
     """데이터 가져오기 테스트용"""
     try:
-        state, date, price = get_state_from_yfinance(symbol)
+        state, date, price = await get_state_async(symbol)
         return {
             "symbol": symbol,
             "date": date,
@@ -337,15 +499,21 @@ def root():
     return {
         "message": "DQN AI Trading Server",
         "port": 8001,
-        "models_loaded": buy_model is not None and sell_model is not None,
+        "models_loaded": registry.active is not None and all(registry.active.predictor.loaded.values()),
+        "model_version": registry.version,
         "endpoints": [
             "/ai/recommend?symbol=005930",
+            "/ai/recommend/batch",
             "/predict/005930/buy",
             "/predict/005930/sell",
             "/predict/005930/buy",
             "/predict/005930/sell",
             "/test/005930",
-            "/health"
+            "/health",
+            "/health/live",
+            "/health/ready",
+            "/models",
+            "/metrics"
         ]
     }
 
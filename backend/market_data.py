@@ -0,0 +1,143 @@
+import os
+import pandas as pd
+
+from bar_store import normalize_bars, window_bars
+
+# 일봉 데이터 출처: "yfinance" (기본, 로컬 parquet 캐시 + 증분 다운로드),
+# "local" (디렉터리의 CSV / parquet / feather 파일), "memory" (메모리에 올린 고정 데이터)
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+# local / memory 공급자가 읽는 디렉터리 (<종목>.csv, <종목>.parquet, <종목>.feather)
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", ".")
+
+FILE_READERS = {
+    ".parquet": pd.read_parquet,
+    ".feather": pd.read_feather,
+    ".csv": lambda path: pd.read_csv(path, index_col=0),
+}
+
+
+def read_bar_file(path):
+    """일봉 파일 하나를 날짜 인덱스 + OHLCV 형태로 읽음"""
+    df = FILE_READERS[os.path.splitext(path)[1]](path)
+    if "Date" in df.columns:
+        df = df.set_index("Date")
+    if not isinstance(df.index, pd.DatetimeIndex):
+        # "2024-05-29 00:00:00-04:00" 처럼 거래소 시간대가 붙은 값은 UTC로 바꾸면 날짜가 밀리므로 날짜 부분만 사용
+        df.index = pd.to_datetime(df.index.astype(str).str[:10])
+    return normalize_bars(df).dropna()
+
+
+class MarketDataProvider:
+    """일봉 공급자 인터페이스. load / load_many 모두 BarStore 와 같은 형태(날짜 인덱스 + OHLCV)로 반환"""
+
+    name = None
+
+    def load(self, ticker, period="2mo"):
+        raise NotImplementedError
+
+    def load_many(self, tickers, period="2mo"):
+        """여러 종목 조회. 데이터가 없거나 읽지 못한 종목은 빈 DataFrame (다른 종목 결과에는 영향 없음)"""
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = self.load(ticker, period)
+            except Exception as e:
+                # 파일 없음뿐 아니라 깨진 파일 / 파싱 오류도 그 종목만 실패 처리
+                print(f"Market data error for {ticker}: {type(e).__name__}: {e}")
+                frames[ticker] = window_bars(None)
+        return frames
+
+
+class YFinanceProvider(MarketDataProvider):
+    """yfinance + 로컬 parquet 캐시 (기존 동작)"""
+
+    name = "yfinance"
+
+    def __init__(self, store=None):
+        if store is None:
+            from bar_store import BarStore
+            store = BarStore()
+        self.store = store
+
+    def load(self, ticker, period="2mo"):
+        return self.store.load(ticker, period=period)
+
+    def load_many(self, tickers, period="2mo"):
+        return self.store.load_many(tickers, period=period)
+
+
+class LocalFileProvider(MarketDataProvider):
+    """디렉터리의 종목별 파일에서 읽기 (네트워크 없음)
+
+    구간은 오늘이 아니라 파일의 마지막 봉 기준으로 잘라서, 오래된 고정 데이터로도
+    항상 같은 결과가 나온다. 파일이 바뀌면(mtime) 다시 읽는다.
+    """
+
+    name = "local"
+
+    def __init__(self, root=MARKET_DATA_DIR):
+        self.root = root
+        self._frames = {}
+
+    def path(self, ticker):
+        # 005930.KS 는 005930.KS.csv 가 없으면 005930.csv 도 찾음
+        names = [ticker, ticker.split(".")[0]]
+        for name in dict.fromkeys(names):
+            for extension in FILE_READERS:
+                path = os.path.join(self.root, name + extension)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def read(self, ticker):
+        path = self.path(ticker)
+        if path is None:
+            raise FileNotFoundError(f"No bar file for {ticker} in {self.root}")
+        mtime = os.path.getmtime(path)
+        cached = self._frames.get(ticker)
+        if cached is None or cached[0] != (path, mtime):
+            cached = ((path, mtime), read_bar_file(path))
+            self._frames[ticker] = cached
+        return cached[1]
+
+    def load(self, ticker, period="2mo"):
+        df = self.read(ticker)
+        return window_bars(df, period, end=df.index[-1] if not df.empty else None)
+
+
+class MemoryProvider(MarketDataProvider):
+    """메모리에 올린 고정 일봉 (테스트 / 벤치마크용). root를 주면 그 디렉터리 파일을 시작할 때 모두 읽어 둠"""
+
+    name = "memory"
+
+    def __init__(self, frames=None, root=None):
+        self.frames = {}
+        if root is not None:
+            for filename in sorted(os.listdir(root)):
+                ticker, extension = os.path.splitext(filename)
+                if extension in FILE_READERS:
+                    self.add(ticker, read_bar_file(os.path.join(root, filename)))
+        for ticker, df in (frames or {}).items():
+            self.add(ticker, df)
+
+    def add(self, ticker, df):
+        self.frames[ticker] = normalize_bars(df).dropna()
+
+    def load(self, ticker, period="2mo"):
+        df = self.frames.get(ticker)
+        if df is None:
+            df = self.frames.get(ticker.split(".")[0])
+        if df is None:
+            raise KeyError(f"No in-memory bars for {ticker}")
+        return window_bars(df, period, end=df.index[-1] if not df.empty else None)
+
+
+def create_provider(name=MARKET_DATA_PROVIDER, root=MARKET_DATA_DIR):
+    """설정값으로 공급자 생성"""
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "local":
+        return LocalFileProvider(root)
+    if name == "memory":
+        return MemoryProvider(root=root)
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER: {name} (expected yfinance, local or memory)")
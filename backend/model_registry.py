@@ -0,0 +1,168 @@
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from inference import DQN_RUNTIME, load_predictor
+
+# 버전별 모델 디렉터리: MODEL_DIR/<버전>/buy_model.pth, sell_model.pth
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+# 새 버전 확인 주기 (초)
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "10"))
+# 복사 중인 파일을 읽지 않도록 마지막 수정 후 이 시간이 지난 파일만 로드
+MODEL_SETTLE_SECONDS = float(os.getenv("MODEL_SETTLE_SECONDS", "2"))
+# 교체 전 워밍업 배치 크기
+MODEL_WARMUP_BATCH = int(os.getenv("MODEL_WARMUP_BATCH", "8"))
+
+# 현재 서비스 중인 모델. 요청 하나는 이 튜플을 한 번만 읽어서 버전과 예측기를 같이 사용
+ActiveModel = namedtuple("ActiveModel", ["version", "predictor", "loaded_at"])
+Candidate = namedtuple("Candidate", ["version", "paths", "signature"])
+
+# 모델 파일을 하나도 못 읽어 학습 안 된 모델로 대신할 때의 버전 이름
+UNTRAINED_VERSION = "untrained"
+
+
+def _version_key(name):
+    """v2 < v10 처럼 숫자는 숫자로 비교"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class ModelRegistry:
+    """모델 디렉터리를 감시해서 새 버전을 백그라운드에서 로드 -> 워밍업 -> 교체
+
+    교체는 active 속성 한 번의 대입이라, 이미 이전 버전을 읽어 간 요청은 그대로
+    이전 버전으로 끝나고 이후 요청부터 새 버전을 사용한다 (요청을 멈추지 않음).
+    버전 디렉터리 모델을 쓰기 전까지는 fallback 경로(기존 buy_model.pth, sell_model.pth)도
+    후보로 보고, 파일 수정 시각을 버전("local-<시각>")으로 사용한다.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, fallback=("buy_model.pth", "sell_model.pth"),
+                 filenames=("buy_model.pth", "sell_model.pth"), runtime=DQN_RUNTIME, strict=True,
+                 poll_seconds=MODEL_POLL_SECONDS, settle_seconds=MODEL_SETTLE_SECONDS):
+        self.model_dir = model_dir
+        self.fallback = fallback
+        self.filenames = filenames
+        self.runtime = runtime
+        self.strict = strict
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.active = None
+        self.history = []      # 교체 기록 (최근 것이 마지막)
+        self.failed = {}       # 로드 실패한 버전 -> (signature, 에러)
+        self.listeners = []    # 교체 직후 호출: listener(active)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self):
+        active = self.active
+        return active.version if active is not None else None
+
+    def _settled(self, paths, now):
+        return all(now - os.path.getmtime(path) >= self.settle_seconds for path in paths)
+
+    def discover(self):
+        """로드 가능한 버전 후보들 (최신 순). fallback 경로는 버전 디렉터리를 쓰기 전에만 후보"""
+        now = time.time()
+        candidates = []
+        if os.path.isdir(self.model_dir):
+            for name in sorted(os.listdir(self.model_dir), key=_version_key, reverse=True):
+                paths = [os.path.join(self.model_dir, name, filename) for filename in self.filenames]
+                if all(os.path.isfile(path) for path in paths) and self._settled(paths, now):
+                    candidates.append(Candidate(name, paths, max(os.path.getmtime(path) for path in paths)))
+
+        version = self.version
+        if version is not None and version != UNTRAINED_VERSION and not version.startswith("local-"):
+            return candidates
+
+        existing = [path for path in self.fallback if path and os.path.isfile(path)]
+        if not existing or (self.strict and len(existing) < len(self.fallback)):
+            return candidates
+        if not self._settled(existing, now):
+            return candidates
+        mtime = max(os.path.getmtime(path) for path in existing)
+        version = "local-" + datetime.fromtimestamp(mtime).strftime("%Y%m%d%H%M%S")
+        return candidates + [Candidate(version, list(self.fallback), mtime)]
+
+    def load(self, candidate):
+        """후보 버전 로드 + 더미 배치로 워밍업 (서비스 중인 모델에는 영향 없음)"""
+        predictor = load_predictor(*candidate.paths, runtime=self.runtime, strict=self.strict)
+        states = np.zeros((MODEL_WARMUP_BATCH, 14), dtype=np.float32)
+        predictor.predict(states)
+        for name in predictor.models:
+            predictor.predict_head(name, states)
+        return predictor
+
+    def install(self, version, predictor):
+        """워밍업이 끝난 예측기로 교체"""
+        previous = self.version
+        self.active = ActiveModel(version, predictor, time.time())
+        self.history.append({"version": version, "previous": previous, "at": self.active.loaded_at})
+        del self.history[:-20]
+        print(f"Model version {previous} -> {version} ({predictor.runtime})")
+        for listener in self.listeners:
+            listener(self.active)
+
+    def refresh(self):
+        """현재 버전보다 새 버전이 있으면 로드해서 교체. 교체했으면 True
+
+        최신 버전 로드가 실패하면 그다음 버전을 시도하고, 현재 버전보다 오래된 버전으로는 내려가지 않는다.
+        """
+        with self._lock:
+            for candidate in self.discover():
+                if candidate.version == self.version:
+                    return False
+                failure = self.failed.get(candidate.version)
+                if failure is not None and failure[0] == candidate.signature:
+                    # 같은 파일로 다시 시도하지 않음 (파일이 바뀌면 재시도)
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    predictor = self.load(candidate)
+                except Exception as e:
+                    self.failed[candidate.version] = (candidate.signature, f"{type(e).__name__}: {e}")
+                    print(f"Model version {candidate.version} load failed, keeping {self.version}: {e}")
+                    continue
+                self.failed.pop(candidate.version, None)
+                print(f"Model version {candidate.version} loaded and warmed in {time.perf_counter() - start:.3f}s")
+                self.install(candidate.version, predictor)
+                return True
+            return False
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Model registry watch error: {e}")
+
+    def start(self):
+        """백그라운드 감시 스레드 시작"""
+        if self._thread is None and self.poll_seconds > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, daemon=True, name="model-registry")
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def describe(self):
+        active = self.active
+        return {
+            "version": active.version if active is not None else None,
+            "loaded_at": active.loaded_at if active is not None else None,
+            "models": active.predictor.describe() if active is not None else {},
+            "model_dir": os.path.abspath(self.model_dir),
+            "poll_seconds": self.poll_seconds,
+            "history": list(self.history),
+            "failed": {version: error for version, (_, error) in self.failed.items()},
+        }
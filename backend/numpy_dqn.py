@@ -0,0 +1,153 @@
+import hashlib
+import os
+import numpy as np
+
+# dqn.DQN 과 같은 구조 (14 -> 256 -> 512 -> 512 -> 256 -> 2, ReLU)
+LAYERS = ['fc1', 'fc2', 'fc3', 'fc4', 'fc5']
+LAYER_SIZES = [14, 256, 512, 512, 256, 2]
+
+
+def npz_path_for(pth_path):
+    return os.path.splitext(pth_path)[0] + ".npz"
+
+
+# .npz 안에 원본 .pth 의 수정 시각 / 해시를 같이 저장 (가중치 키와 겹치지 않는 이름)
+SOURCE_MTIME = "__source_mtime__"
+SOURCE_SHA256 = "__source_sha256__"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_stale(pth_path, npz_path):
+    """.npz 가 없거나 원본 .pth 가 변환 이후 바뀌었으면 True
+
+    수정 시각이 기록과 같으면 바로 최신으로 보고, 다르면 해시까지 비교한다
+    (복사 / 체크아웃으로 시각만 바뀐 경우는 다시 변환하지 않음).
+    """
+    if not os.path.exists(npz_path):
+        return True
+    with np.load(npz_path) as data:
+        if SOURCE_MTIME not in data.files or SOURCE_SHA256 not in data.files:
+            return True
+        mtime, sha256 = float(data[SOURCE_MTIME]), str(data[SOURCE_SHA256])
+    return os.path.getmtime(pth_path) != mtime and file_sha256(pth_path) != sha256
+
+
+def convert(pth_path, npz_path=None):
+    """PyTorch state_dict(.pth)를 float32 가중치 파일(.npz)로 변환 (이때만 torch 필요)"""
+    import torch
+
+    npz_path = npz_path or npz_path_for(pth_path)
+    state_dict = torch.load(pth_path, map_location=torch.device('cpu'))
+    arrays = {key: value.detach().numpy().astype(np.float32) for key, value in state_dict.items()}
+    arrays[SOURCE_MTIME] = np.float64(os.path.getmtime(pth_path))
+    arrays[SOURCE_SHA256] = np.str_(file_sha256(pth_path))
+    # 서버가 읽는 도중에 덮어쓰지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f"{npz_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, npz_path)
+    print(f"Converted {pth_path} -> {npz_path}")
+    return npz_path
+
+
+def random_weights(seed=None):
+    """가중치 파일이 없을 때 쓰는 학습 안 된 모델 (nn.Linear 기본 초기화와 같은 범위)"""
+    rng = np.random.default_rng(seed)
+    weights = {}
+    for name, fan_in, fan_out in zip(LAYERS, LAYER_SIZES[:-1], LAYER_SIZES[1:]):
+        bound = 1 / np.sqrt(fan_in)
+        weights[f"{name}.weight"] = rng.uniform(-bound, bound, (fan_out, fan_in)).astype(np.float32)
+        weights[f"{name}.bias"] = rng.uniform(-bound, bound, fan_out).astype(np.float32)
+    return weights
+
+
+class NumpyDQN:
+    """torch 없이 NumPy 행렬곱만으로 DQN forward"""
+
+    def __init__(self, weights):
+        # x @ W.T 대신 x @ W 로 쓰도록 미리 전치해서 연속 메모리로 보관
+        self.layers = [
+            (np.ascontiguousarray(weights[f"{name}.weight"].T, dtype=np.float32),
+             np.asarray(weights[f"{name}.bias"], dtype=np.float32))
+            for name in LAYERS
+        ]
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as data:
+            return cls({key: data[key] for key in data.files if key not in (SOURCE_MTIME, SOURCE_SHA256)})
+
+    def __call__(self, states):
+        x = np.asarray(states, dtype=np.float32)
+        for i, (weight, bias) in enumerate(self.layers):
+            x = x @ weight + bias
+            if i < len(self.layers) - 1:
+                np.maximum(x, 0, out=x)
+        return x
+
+
+class NumpyFusedDQN:
+    """여러 NumpyDQN 가중치를 쌓아 한 번의 배치 행렬곱으로 평가 (dqn.FusedDQN 과 같은 출력 형태)"""
+
+    def __init__(self, models):
+        self.num_models = len(models)
+        self.layers = [
+            (np.stack([model.layers[i][0] for model in models]),
+             np.stack([model.layers[i][1] for model in models])[:, None, :])
+            for i in range(len(LAYERS))
+        ]
+
+    def __call__(self, states):
+        x = np.asarray(states, dtype=np.float32)[None, :, :]
+        for i, (weight, bias) in enumerate(self.layers):
+            x = np.matmul(x, weight) + bias
+            if i < len(self.layers) - 1:
+                np.maximum(x, 0, out=x)
+        return x
+
+    def predict(self, states):
+        """numpy (배치, 14) -> numpy (모델 수, 배치, 2)"""
+        return self(states)
+
+
+if __name__ == "__main__":
+    # 변환: python numpy_dqn.py convert buy_model.pth [buy_model.npz]
+    # 검증: python numpy_dqn.py check [buy_model.pth sell_model.pth]
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "convert":
+        convert(*sys.argv[2:4])
+    elif command == "check":
+        import tempfile
+        import torch
+        from dqn import FusedDQN, load_dqn
+
+        paths = sys.argv[2:4] if len(sys.argv) > 3 else ["buy_model.pth", "sell_model.pth"]
+        tmp_dir = tempfile.mkdtemp()
+        torch_models = [load_dqn(path) for path in paths]
+        numpy_models = [NumpyDQN.load(convert(path, os.path.join(tmp_dir, os.path.basename(npz_path_for(path)))))
+                        for path in paths]
+
+        rng = np.random.default_rng(0)
+        for batch_size in (1, 7, 256, 4096):
+            states = (rng.standard_normal((batch_size, 14)) * 10).astype(np.float32)
+            with torch.no_grad():
+                expected = np.stack([model(torch.from_numpy(states)).numpy() for model in torch_models])
+            separate = np.stack([model(states) for model in numpy_models])
+            fused = NumpyFusedDQN(numpy_models).predict(states)
+            np.testing.assert_allclose(separate, expected, rtol=1e-4, atol=1e-4 * np.abs(expected).max())
+            np.testing.assert_allclose(fused, expected, rtol=1e-4, atol=1e-4 * np.abs(expected).max())
+            assert (separate.argmax(-1) == expected.argmax(-1)).mean() > 0.999
+        expected_fused = FusedDQN(torch_models).predict(states)
+        np.testing.assert_allclose(fused, expected_fused, rtol=1e-4, atol=1e-4 * np.abs(expected).max())
+        print("OK: NumPy runtime matches torch")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
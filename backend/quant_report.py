@@ -0,0 +1,119 @@
+"""fp32 / int8 동적 양자화 DQN 비교 리포트
+
+저장된 상태 벡터들을 두 모델에 똑같이 넣어서 행동 일치율, Q값 오차,
+지연시간, 모델 크기 차이를 출력한다.
+
+    python quant_report.py --features features.npy
+    python quant_report.py --bars AAPL.csv --save-features features.npy --json report.json
+"""
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+from indicators import PRICE_COLUMNS, compute_features, stack_panel
+from inference import load_predictor
+
+
+def features_from_bars(path):
+    """일봉 CSV의 모든 날짜에 대한 상태 벡터 (지표 워밍업 구간 제외)"""
+    bars = pd.read_csv(path, index_col=0)[PRICE_COLUMNS].astype(float).dropna()
+    return compute_features(stack_panel([bars]))[0, 33:].astype(np.float32)
+
+
+def serialized_size(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def time_forward(model, states, repeat):
+    """(행 단위 지연시간 목록, 전체 배치 1회 평균 시간)"""
+    per_row = []
+    with torch.no_grad():
+        for row in states[:repeat]:
+            x = row[None, :]
+            start = time.perf_counter()
+            model(x)
+            per_row.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(5):
+            model(states)
+        batch = (time.perf_counter() - start) / 5
+    return np.array(per_row), batch
+
+
+def compare(fp32_model, int8_model, states, repeat=500):
+    x = torch.from_numpy(states)
+    with torch.no_grad():
+        q_fp32 = fp32_model(x).numpy()
+        q_int8 = int8_model(x).numpy()
+
+    error = np.abs(q_int8 - q_fp32)
+    scale = np.abs(q_fp32).max(axis=1)
+    fp32_rows, fp32_batch = time_forward(fp32_model, x, repeat)
+    int8_rows, int8_batch = time_forward(int8_model, x, repeat)
+    fp32_size, int8_size = serialized_size(fp32_model), serialized_size(int8_model)
+
+    return {
+        "samples": len(states),
+        "action_agreement": float((q_fp32.argmax(1) == q_int8.argmax(1)).mean()),
+        "action_flips": int((q_fp32.argmax(1) != q_int8.argmax(1)).sum()),
+        "q_abs_error_mean": float(error.mean()),
+        "q_abs_error_max": float(error.max()),
+        "q_rel_error_mean": float((error.max(axis=1) / np.maximum(scale, 1e-12)).mean()),
+        "latency_row_ms": {
+            "fp32_p50": float(np.percentile(fp32_rows, 50) * 1e3),
+            "int8_p50": float(np.percentile(int8_rows, 50) * 1e3),
+            "fp32_p99": float(np.percentile(fp32_rows, 99) * 1e3),
+            "int8_p99": float(np.percentile(int8_rows, 99) * 1e3),
+        },
+        "latency_batch_ms": {"fp32": fp32_batch * 1e3, "int8": int8_batch * 1e3},
+        "model_bytes": {"fp32": fp32_size, "int8": int8_size, "ratio": int8_size / fp32_size},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 DQN fidelity report")
+    parser.add_argument("--features", help="저장된 상태 벡터 (.npy, (N, 14))")
+    parser.add_argument("--bars", default="AAPL.csv", help="--features가 없을 때 상태 벡터를 만들 일봉 CSV")
+    parser.add_argument("--save-features", help="사용한 상태 벡터를 .npy로 저장")
+    parser.add_argument("--buy-model", default="buy_model.pth")
+    parser.add_argument("--sell-model", default="sell_model.pth")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    states = np.load(args.features) if args.features else features_from_bars(args.bars)
+    states = np.ascontiguousarray(states, dtype=np.float32)
+    if args.save_features:
+        np.save(args.save_features, states)
+
+    fp32 = load_predictor(args.buy_model, args.sell_model, runtime="torch", strict=True)
+    int8 = load_predictor(args.buy_model, args.sell_model, runtime="int8", strict=True)
+
+    report = {name: compare(fp32.models[name], int8.models[name], states) for name in ("buy", "sell")}
+
+    for name, result in report.items():
+        rows, batch, size = result["latency_row_ms"], result["latency_batch_ms"], result["model_bytes"]
+        print(f"[{name}] samples={result['samples']}")
+        print(f"  action agreement: {result['action_agreement'] * 100:.2f}% ({result['action_flips']} flips)")
+        print(f"  Q error: mean abs {result['q_abs_error_mean']:.4g}, max abs {result['q_abs_error_max']:.4g}, "
+              f"mean rel {result['q_rel_error_mean'] * 100:.3f}%")
+        print(f"  latency (1 row): p50 {rows['fp32_p50']:.3f} -> {rows['int8_p50']:.3f} ms, "
+              f"p99 {rows['fp32_p99']:.3f} -> {rows['int8_p99']:.3f} ms")
+        print(f"  latency ({result['samples']} rows): {batch['fp32']:.3f} -> {batch['int8']:.3f} ms")
+        print(f"  model size: {size['fp32'] / 1024:.0f} KB -> {size['int8'] / 1024:.0f} KB ({size['ratio'] * 100:.0f}%)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,15 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
 import numpy as np
-from typing import List
+from typing import List, Optional
 from enum import Enum
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import uvicorn
+# torch 는 모델 로딩 시점(inference 로더 내부)에서만 import
+from model_registry import ModelRegistry
+from warmup import Warmup
 
 UTC = ZoneInfo("UTC")
 
@@ -24,23 +24,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# DQN 모델
-class DQN(nn.Module):
-    def __init__(self, input_dim, output_dim):
-        super(DQN, self).__init__()
-        self.fc1 = nn.Linear(input_dim, 256)
-        self.fc2 = nn.Linear(256, 512)
-        self.fc3 = nn.Linear(512, 512)
-        self.fc4 = nn.Linear(512, 256)
-        self.fc5 = nn.Linear(256, output_dim)
-
-    def forward(self, x):
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
-        x = F.relu(self.fc3(x))
-        x = F.relu(self.fc4(x))
-        return self.fc5(x)
-
 class Position(BaseModel):
     symbol: str
     name: str
@@ -71,29 +54,34 @@ class AIRecommendation(BaseModel):
     confidence: float
     recommended_qty: int
     reason: str
-
-buy_model = None
-sell_model = None
+    model_version: Optional[str] = None
+
+# 새 모델 버전은 백그라운드에서 로드 + 워밍업 후 교체
+registry = ModelRegistry(strict=True)
+warmup = Warmup()
+
+def warm_up():
+    # 모델 파일이 아직 없어도 나중에 MODEL_DIR 에 올라오면 로드하도록 감시는 먼저 시작
+    registry.start()
+    with warmup.stage("models"):
+        if not registry.refresh():
+            print(f"⚠️ 모델 로드 실패: {registry.failed or '모델 파일 없음'}")
+            raise RuntimeError("모델 로드 실패")
+        print(f"✅ 매수 / 매도 모델 로드 완료 (버전 {registry.version})")
+        warmup.models = registry.active.predictor.describe()
+
+def on_model_installed(active):
+    """워밍업 때 모델을 못 읽었어도 감시 스레드가 새 버전을 올리면 준비 완료로 전환"""
+    if warmup.error is not None:
+        warmup.models = active.predictor.describe()
+        warmup.recover()
+
+registry.listeners.append(on_model_installed)
 
 @app.on_event("startup")
 async def load_models():
-    global buy_model, sell_model
-    
-    try:
-        INPUT_DIM = 14
-        OUTPUT_DIM = 2
-        
-        buy_model = DQN(INPUT_DIM, OUTPUT_DIM)
-        buy_model.load_state_dict(torch.load("buy_model.pth", map_location='cpu'))
-        buy_model.eval()
-        print("✅ 매수 모델 로드 완료")
-        
-        sell_model = DQN(INPUT_DIM, OUTPUT_DIM)
-        sell_model.load_state_dict(torch.load("sell_model.pth", map_location='cpu'))
-        sell_model.eval()
-        print("✅ 매도 모델 로드 완료")
-    except Exception as e:
-        print(f"⚠️ 모델 로드 실패: {e}")
+    # FAST_START=1 이면 백그라운드 스레드에서 로드하고 바로 포트를 엶
+    warmup.start(warm_up)
 
 @app.get("/positions")
 def get_positions():
@@ -175,15 +163,15 @@ def search_stocks(q: str = Query(..., min_length=1)):
 
 @app.post("/ai/recommend")
 async def get_ai_recommendation(symbol: str):
-    if not buy_model or not sell_model:
+    model = registry.active
+    if model is None:
         raise HTTPException(status_code=503, detail="모델 미로드")
     
     features = np.random.rand(14).astype(np.float32)
     
-    with torch.no_grad():
-        buy_q = buy_model(torch.FloatTensor([features])).numpy()[0]
-        buy_action = int(np.argmax(buy_q))
-        buy_confidence = float(np.max(buy_q) - np.min(buy_q))
+    buy_q = model.predictor.predict_head("buy", features[None, :])[0]
+    buy_action = int(np.argmax(buy_q))
+    buy_confidence = float(np.max(buy_q) - np.min(buy_q))
     
     if buy_action == 1 and buy_confidence > 0.3:
         return AIRecommendation(
@@ -191,7 +179,8 @@ async def get_ai_recommendation(symbol: str):
             action="BUY",
             confidence=buy_confidence,
             recommended_qty=10,
-            reason=f"DQN 매수 추천 (신뢰도: {buy_confidence:.2f})"
+            reason=f"DQN 매수 추천 (신뢰도: {buy_confidence:.2f})",
+            model_version=model.version
         )
     else:
         return AIRecommendation(
@@ -199,18 +188,32 @@ async def get_ai_recommendation(symbol: str):
             action="HOLD",
             confidence=0.0,
             recommended_qty=0,
-            reason="관망"
+            reason="관망",
+            model_version=model.version
         )
 
 @app.get("/health")
 def health():
     return {
-        "status": "healthy",
-        "buy_model_loaded": buy_model is not None,
-        "sell_model_loaded": sell_model is not None,
+        "status": "healthy" if warmup.ready else "starting",
+        "buy_model_loaded": registry.active is not None,
+        "sell_model_loaded": registry.active is not None,
+        "model_version": registry.version,
         "port": 8001
     }
 
+@app.get("/health/live")
+def liveness():
+    return warmup.liveness()
+
+@app.get("/health/ready")
+def readiness():
+    """모델 로드 상태 / 워밍업 소요 시간. 준비 전이면 503"""
+    status = warmup.readiness()
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=status)
+    return status
+
 @app.get("/")
 def root():
     return {"message": "DQN Model Server (64bit)", "port": 8001}
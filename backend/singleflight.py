@@ -0,0 +1,50 @@
+import asyncio
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청은 진행 중인 작업 하나의 결과를 함께 사용
+
+    블로킹 함수(yf.download 등)는 스레드에서 실행하고, 동시에 실행되는 작업 수는
+    max_concurrency 로 제한해 FastAPI 스레드풀이 한 종류 작업으로 가득 차지 않게 한다.
+    """
+
+    def __init__(self, max_concurrency=8):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def _call(self, func, *args):
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def run(self, key, func, *args):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._call(func, *args))
+            self._inflight[key] = task
+
+            def _forget(done, key=key):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(_forget)
+        else:
+            self.coalesced += 1
+
+        # 먼저 요청한 쪽이 취소돼도 함께 기다리는 요청은 결과를 받도록 shield
+        return await asyncio.shield(task)
+
+    @property
+    def inflight(self):
+        return len(self._inflight)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": self.inflight,
+            "max_concurrency": self.max_concurrency,
+        }
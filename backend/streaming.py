@@ -0,0 +1,250 @@
+import json
+import math
+import os
+import numpy as np
+
+from indicators import FEATURE_NAMES, PRICE_COLUMNS
+
+NAN = float('nan')
+
+
+def _ewm_step(state, x, alpha, min_periods):
+    """pandas ewm(adjust=False) 재귀식 한 스텝. state = [값, 관측 수]"""
+    value, count = state
+    if not math.isnan(x):
+        value = x if math.isnan(value) else (1 - alpha) * value + alpha * x
+        count += 1
+    state[0], state[1] = value, count
+    return value if count >= min_periods else NAN
+
+
+def _normalize_date(date):
+    """봉 날짜를 'YYYY-MM-DD' 로 통일 (Timestamp 인덱스 / 시간대 포함 문자열 / 장중 틱의 날짜 문자열)"""
+    if date is None:
+        return None
+    import pandas as pd
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+
+def _fill(x, value):
+    return value if math.isnan(x) else x
+
+
+def _new_state():
+    return {
+        'date': None,
+        'bar': None,                 # 마지막 봉 (OHLCV)
+        'ema20': [NAN, 0],
+        'ema20_out': NAN,
+        'ema12': [NAN, 0],
+        'ema26': [NAN, 0],
+        'macd_signal': [NAN, 0],
+        'rsi_up': [NAN, 0],
+        'rsi_down': [NAN, 0],
+        'highs': [],                 # 최근 5개 고가
+        'lows': [],                  # 최근 5개 저가
+        'stoch_k': [],               # 최근 3개 %K
+        'typical_prices': [],        # 최근 14개 typical price
+        'vector': [0.0] * len(FEATURE_NAMES),
+    }
+
+
+class IncrementalFeatures:
+    """종목 하나의 지표 상태를 들고 있다가 봉/틱이 들어올 때마다 상태 벡터를 O(1)로 갱신
+
+    indicators.compute_features 를 같은 봉들로 돌린 마지막 행과 같은 값을 낸다.
+    같은 날짜의 봉이 다시 들어오면(장중 틱) 직전 봉까지의 상태로 되돌린 뒤 다시 반영한다.
+    """
+
+    def __init__(self, state=None, before_last=None):
+        self._state = state or _new_state()
+        self._before_last = before_last
+
+    @classmethod
+    def from_bars(cls, df_origin):
+        """과거 일봉으로 상태 초기화"""
+        features = cls()
+        for date, row in df_origin[PRICE_COLUMNS].iterrows():
+            features.update(row.to_dict(), date)
+        return features
+
+    @property
+    def last_date(self):
+        return self._state['date']
+
+    @property
+    def vector(self):
+        """현재 14개 상태 벡터"""
+        return np.array(self._state['vector'], dtype=float)
+
+    def update(self, bar, date):
+        """새 봉이면 추가, 마지막 봉과 같은 날짜면 장중 갱신으로 처리"""
+        date = _normalize_date(date)
+        if self._state['date'] == date and self._before_last is not None:
+            state = _copy_state(self._before_last)
+        else:
+            self._before_last = _copy_state(self._state)
+            state = _copy_state(self._state)
+
+        _apply_bar(state, {col: float(bar[col]) for col in PRICE_COLUMNS})
+        state['date'] = date
+        self._state = state
+        return self.vector
+
+    def to_dict(self):
+        return {'state': self._state, 'before_last': self._before_last}
+
+    @classmethod
+    def from_dict(cls, data):
+        # 예전 저장 파일은 날짜가 'YYYY-MM-DD HH:MM:SS' 형태일 수 있음
+        state = data['state']
+        state['date'] = _normalize_date(state['date'])
+        return cls(state, data.get('before_last'))
+
+
+def _copy_state(state):
+    # 값은 float / 길이가 정해진 짧은 리스트뿐이라 복사 비용도 상수
+    return {key: list(value) if isinstance(value, list) else
+            dict(value) if isinstance(value, dict) else value
+            for key, value in state.items()}
+
+
+def _push(window, value, size):
+    window.append(value)
+    if len(window) > size:
+        del window[0]
+
+
+def _apply_bar(state, bar):
+    prev = state['bar']
+    state['bar'] = bar
+    high, low, close = bar['High'], bar['Low'], bar['Close']
+
+    # 변화량
+    changes = [bar[col] - prev[col] if prev else 0.0 for col in PRICE_COLUMNS]
+
+    # EMA20 변화량
+    ema20 = _ewm_step(state['ema20'], close, 2 / 21, 20)
+    ewm20_change = _fill(ema20 - state['ema20_out'], 0)
+    state['ema20_out'] = ema20
+
+    # KDJ (window=5, smooth_window=3)
+    _push(state['highs'], high, 5)
+    _push(state['lows'], low, 5)
+    stoch_k = NAN
+    if len(state['highs']) == 5:
+        smin, smax = min(state['lows']), max(state['highs'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stoch_k = float(np.float64(100 * (close - smin)) / np.float64(smax - smin))
+    _push(state['stoch_k'], stoch_k, 3)
+    stoch_d = sum(state['stoch_k']) / 3 if len(state['stoch_k']) == 3 else NAN
+    fast_k = _fill(stoch_k, 50)
+    slow_d = _fill(stoch_d, 50)
+    slow_j = _fill(3 * fast_k - 2 * slow_d, 50)
+
+    # MACD (12, 26, 9)
+    macd_line = _ewm_step(state['ema12'], close, 2 / 13, 12) - _ewm_step(state['ema26'], close, 2 / 27, 26)
+    macd_signal = _ewm_step(state['macd_signal'], macd_line, 2 / 10, 9)
+    macd = _fill(macd_line, 0)
+    macds = _fill(macd_signal, 0)
+    macdo = _fill(macd - macds, 0)
+
+    # CCI (window=14, constant=0.015)
+    _push(state['typical_prices'], (high + low + close) / 3.0, 14)
+    cci = 0.0
+    if len(state['typical_prices']) == 14:
+        window = np.array(state['typical_prices'])
+        mean = window.mean()
+        mad = np.abs(window - mean).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cci = _fill(float((window[-1] - mean) / (0.015 * mad)), 0)
+
+    # RSI (Wilder, window=14). 첫 봉은 상승/하락폭 0
+    diff = close - prev['Close'] if prev else 0.0
+    ema_up = _ewm_step(state['rsi_up'], diff if diff > 0 else 0.0, 1 / 14, 14)
+    ema_down = _ewm_step(state['rsi_down'], -diff if diff < 0 else 0.0, 1 / 14, 14)
+    if ema_down == 0:
+        rsi = 100.0
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = float(100 - (100 / (1 + np.float64(ema_up) / np.float64(ema_down))))
+    rsi = _fill(rsi, 50)
+
+    vector = changes + [ewm20_change, fast_k, slow_d, slow_j, macd, macds, macdo, cci, rsi]
+    state['vector'] = [_fill(x, 0) for x in vector]
+
+
+class FeatureBook:
+    """종목별 IncrementalFeatures 모음 + 재시작 후에도 이어 쓰도록 파일 저장/복원"""
+
+    def __init__(self):
+        self.features = {}
+
+    def get(self, ticker):
+        return self.features.get(ticker)
+
+    def seed(self, ticker, df_origin):
+        self.features[ticker] = IncrementalFeatures.from_bars(df_origin)
+        return self.features[ticker]
+
+    def update(self, ticker, bar, date):
+        features = self.features.setdefault(ticker, IncrementalFeatures())
+        return features.update(bar, date)
+
+    def save(self, path):
+        """임시 파일에 쓴 뒤 교체"""
+        data = {ticker: features.to_dict() for ticker, features in self.features.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        book = cls()
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            book.features = {ticker: IncrementalFeatures.from_dict(item) for ticker, item in data.items()}
+        return book
+
+
+if __name__ == "__main__":
+    # 배치 엔진과 비교: python streaming.py [csv 경로]
+    import sys
+    import tempfile
+    import pandas as pd
+    from indicators import compute_features, stack_panel
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "AAPL.csv"
+    bars = pd.read_csv(path, index_col=0)[PRICE_COLUMNS].astype(float)
+    expected = compute_features(stack_panel([bars]))[0]
+
+    book = FeatureBook()
+    for i, (date, row) in enumerate(bars.iterrows()):
+        bar = row.to_dict()
+        # 장중 틱 두 번 (다른 값) 뒤에 확정 봉이 들어오는 상황
+        book.update("AAPL", dict(bar, Close=bar['Close'] * 1.01), date)
+        book.update("AAPL", dict(bar, High=bar['High'] * 1.02), date)
+        vector = book.update("AAPL", bar, date)
+        np.testing.assert_allclose(vector, expected[i], rtol=1e-7, atol=1e-6, err_msg=f"bar {i} ({date})")
+
+        if i == len(bars) // 2:
+            # 저장/복원 후에도 이어서 같은 값이 나와야 함
+            snapshot = os.path.join(tempfile.mkdtemp(), "features.json")
+            book.save(snapshot)
+            book = FeatureBook.load(snapshot)
+
+    print(f"OK: {len(bars)} bars match compute_features (with tick revisions and snapshot/restore)")
+
+    # Timestamp 인덱스로 초기화한 뒤 같은 날 틱을 'YYYY-MM-DD' 문자열로 넣어도 새 봉이 아니라 마지막 봉 갱신
+    dated = bars.set_index(pd.to_datetime(bars.index, utc=True).tz_convert('America/New_York'))
+    features = IncrementalFeatures.from_bars(dated)
+    last_date = features.last_date
+    tick = dict(bars.iloc[-1].to_dict(), Close=bars['Close'].iloc[-1] * 1.05)
+    vector = features.update(tick, last_date)
+    revised = bars.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] = tick['Close']
+    assert features.last_date == last_date == str(dated.index[-1].date()), (features.last_date, last_date)
+    np.testing.assert_allclose(vector, compute_features(stack_panel([revised]))[0][-1], rtol=1e-7, atol=1e-6)
+    print(f"OK: same-day tick ({last_date}) replaces the bar seeded from a Timestamp index")
@@ -0,0 +1,79 @@
+import os
+import time
+import traceback
+from contextlib import contextmanager
+from threading import Lock, Thread
+
+# 빠른 시작 모드: 포트를 먼저 열고 무거운 import / 모델 로딩은 백그라운드 스레드에서
+FAST_START = os.getenv("FAST_START", "0") == "1"
+
+
+class Warmup:
+    """서버 워밍업(무거운 import, 모델 로딩) 진행 상태. liveness/readiness 응답에 사용"""
+
+    def __init__(self, fast_start=FAST_START):
+        self.fast_start = fast_start
+        self.ready = False
+        self.error = None
+        self.models = {}
+        self.stages = {}
+        self._created_at = time.time()
+        self._finished_at = None
+        self._lock = Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """워밍업 단계 하나의 상태와 소요 시간 기록"""
+        start = time.perf_counter()
+        with self._lock:
+            self.stages[name] = {"status": "running", "seconds": None}
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.stages[name] = {"status": "failed", "seconds": round(time.perf_counter() - start, 4)}
+            raise
+        with self._lock:
+            self.stages[name] = {"status": "done", "seconds": round(time.perf_counter() - start, 4)}
+
+    def run(self, func):
+        """워밍업 함수 실행 후 ready 표시 (실패하면 error 기록)"""
+        try:
+            func()
+            self.ready = True
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"Warm-up failed: {self.error}")
+            traceback.print_exc()
+        finally:
+            self._finished_at = time.time()
+
+    def recover(self):
+        """워밍업은 실패했지만 이후 (모델 감시 스레드 등으로) 준비가 끝났을 때"""
+        self.error = None
+        self.ready = True
+
+    def start(self, func):
+        """FAST_START면 백그라운드 스레드에서, 아니면 바로 실행"""
+        if not self.fast_start:
+            self.run(func)
+            return None
+        thread = Thread(target=self.run, args=(func,), daemon=True, name="warmup")
+        thread.start()
+        return thread
+
+    def liveness(self):
+        return {"status": "alive", "uptime_seconds": round(time.time() - self._created_at, 3)}
+
+    def readiness(self):
+        finished = self._finished_at or time.time()
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in self.stages.items()}
+        return {
+            "ready": self.ready,
+            "fast_start": self.fast_start,
+            "error": self.error,
+            "warmup_seconds": round(finished - self._created_at, 4),
+            "models": self.models,
+            "stages": stages,
+        }
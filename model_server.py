@@ -1,13 +1,19 @@
 # model_server.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
 import numpy as np
-from typing import List
+from typing import List, Optional
 import uvicorn
+import os
+import sys
+
+# backend/ 의 공용 모듈 사용
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from batching import MicroBatcher
+import metrics
+from model_registry import ModelRegistry
+from warmup import Warmup
 
 app = FastAPI()
 
@@ -19,22 +25,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class DQN(nn.Module):
-    def __init__(self, input_dim, output_dim):
-        super(DQN, self).__init__()
-        self.fc1 = nn.Linear(input_dim, 256)
-        self.fc2 = nn.Linear(256, 512)
-        self.fc3 = nn.Linear(512, 512)
-        self.fc4 = nn.Linear(512, 256)
-        self.fc5 = nn.Linear(256, output_dim)
-
-    def forward(self, x):
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
-        x = F.relu(self.fc3(x))
-        x = F.relu(self.fc4(x))
-        return self.fc5(x)
-
 class PredictionRequest(BaseModel):
     features: List[float]
     model_type: str
@@ -43,34 +33,95 @@ class PredictionResponse(BaseModel):
     action: int
     q_values: List[float]
     confidence: float
+    model_version: Optional[str] = None
+
+class BothPredictionRequest(BaseModel):
+    features: List[float]
+
+class BothPredictionResponse(BaseModel):
+    buy: PredictionResponse
+    sell: PredictionResponse
+    model_version: Optional[str] = None
+
+# Prometheus /metrics
+metrics.install(app)
+inference_seconds = metrics.REGISTRY.histogram("inference_seconds", "DQN forward latency", ["model_type"])
+inference_batch_size = metrics.REGISTRY.histogram(
+    "inference_batch_size", "Rows per forward", ["model_type"], buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+batch_queue_depth = metrics.REGISTRY.gauge("batch_queue_depth", "Requests waiting in the micro-batch queue")
+batch_queue_depth.set_function(lambda: batcher.queue.qsize() if batcher is not None and batcher.queue is not None else 0)
+
+# MODEL_DIR 의 새 버전을 감시하다가 백그라운드에서 로드 + 워밍업 후 교체
+registry = ModelRegistry(strict=True)
+batcher = None
+warmup = Warmup()
+
+def warm_up():
+    """모델 로드 + 더미 배치 워밍업. FAST_START=1 이면 백그라운드 스레드에서 실행"""
+    # 모델 파일이 아직 없어도 나중에 MODEL_DIR 에 올라오면 로드하도록 감시는 먼저 시작
+    registry.start()
+    with warmup.stage("models"):
+        # DQN_RUNTIME=numpy 면 torch 없이 NumPy로 추론
+        if not registry.refresh():
+            print(f"모델 로드 실패: {registry.failed or '모델 파일 없음'}")
+            raise RuntimeError("모델을 로드하지 못했습니다")
+        print(f"매수/매도 모델 로드 완료: 버전 {registry.version} ({registry.runtime})")
+        warmup.models = registry.active.predictor.describe()
+
+def on_model_installed(active):
+    """워밍업 때 모델을 못 읽었어도 감시 스레드가 새 버전을 올리면 준비 완료로 전환"""
+    if warmup.error is not None:
+        warmup.models = active.predictor.describe()
+        warmup.recover()
 
-buy_model = None
-sell_model = None
+registry.listeners.append(on_model_installed)
+
+def predict_batch(name, states):
+    """배치 하나는 한 버전으로 계산하고 행마다 (Q값, 버전)을 돌려줌"""
+    model = registry.active
+    inference_batch_size.observe(len(states), model_type=name)
+    with inference_seconds.time(model_type=name):
+        q_values = model.predictor.predict_head(name, states)
+    return [(row, model.version) for row in q_values]
+
+def predict_both_batch(states):
+    """매수/매도를 융합 forward 한 번으로 계산하고 행마다 (매수 Q값, 매도 Q값, 버전)을 돌려줌"""
+    model = registry.active
+    inference_batch_size.observe(len(states), model_type="both")
+    with inference_seconds.time(model_type="both"):
+        buy_q, sell_q = model.predictor.predict(states)
+    return [(buy_row, sell_row, model.version) for buy_row, sell_row in zip(buy_q, sell_q)]
+
+def require_ready():
+    """워밍업이 끝나기 전에는 503"""
+    if not warmup.ready:
+        raise HTTPException(status_code=503, detail="모델 워밍업 중입니다")
 
 @app.on_event("startup")
 async def load_models():
-    global buy_model, sell_model
-    
-    try:
-        INPUT_DIM = 14
-        OUTPUT_DIM = 2
-        
-        buy_model = DQN(INPUT_DIM, OUTPUT_DIM)
-        buy_model.load_state_dict(torch.load("buy_model.pth", map_location='cpu'))
-        buy_model.eval()
-        print("매수 모델 로드 완료: buy_model.pth")
-        
-        sell_model = DQN(INPUT_DIM, OUTPUT_DIM)
-        sell_model.load_state_dict(torch.load("sell_model.pth", map_location='cpu'))
-        sell_model.eval()
-        print("매도 모델 로드 완료: sell_model.pth")
-        
-    except Exception as e:
-        print(f"모델 로드 실패: {e}")
+    global batcher
 
-@app.post("/predict", response_model=PredictionResponse)
+    # 동시 /predict, /predict/both 요청을 모아서 모델별 배치 forward
+    predictors = {
+        name: (lambda states, name=name: predict_batch(name, states))
+        for name in ("buy", "sell")
+    }
+    predictors["both"] = predict_both_batch
+    batcher = MicroBatcher(predictors)
+    await batcher.start()
+
+    # FAST_START면 스레드만 띄우고 바로 포트를 엶
+    warmup.start(warm_up)
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    registry.stop()
+    if batcher is not None:
+        await batcher.stop()
+
+@app.post("/predict", response_model=PredictionResponse, dependencies=[Depends(require_ready)])
 async def predict_action(request: PredictionRequest):
-    if buy_model is None or sell_model is None:
+    if registry.active is None or batcher is None:
         raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다")
     
     try:
@@ -79,38 +130,93 @@ async def predict_action(request: PredictionRequest):
         if len(features) != 14:
             raise HTTPException(status_code=400, detail=f"특징 개수 오류. 예상: 14, 실제: {len(features)}")
         
-        input_tensor = torch.FloatTensor([features])
-        
-        if request.model_type == "buy":
-            model = buy_model
-        elif request.model_type == "sell":
-            model = sell_model
-        else:
+        if request.model_type not in ("buy", "sell"):
             raise HTTPException(status_code=400, detail="model_type은 'buy' 또는 'sell'이어야 합니다")
         
-        with torch.no_grad():
-            q_values = model(input_tensor).numpy()[0]
+        q_values, model_version = await batcher.submit(request.model_type, features)
         
-        action = int(torch.argmax(torch.tensor(q_values)))
+        action = int(np.argmax(q_values))
         confidence = max(q_values) - min(q_values)
         
         return PredictionResponse(
             action=action,
             q_values=q_values.tolist(),
-            confidence=confidence
+            confidence=confidence,
+            model_version=model_version
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"예측 실패: {str(e)}")
 
+def to_prediction(q_values, model_version=None):
+    action = int(np.argmax(q_values))
+    confidence = float(max(q_values) - min(q_values))
+    return PredictionResponse(action=action, q_values=q_values.tolist(), confidence=confidence,
+                              model_version=model_version)
+
+@app.post("/predict/both", response_model=BothPredictionResponse, dependencies=[Depends(require_ready)])
+async def predict_both(request: BothPredictionRequest):
+    """매수/매도 모델을 융합 모델 한 번의 forward로 같이 평가"""
+    if registry.active is None or batcher is None:
+        raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다")
+
+    features = np.array(request.features, dtype=np.float32)
+    if len(features) != 14:
+        raise HTTPException(status_code=400, detail=f"특징 개수 오류. 예상: 14, 실제: {len(features)}")
+
+    try:
+        # /predict 와 같은 배처를 거쳐 동시 요청끼리 융합 forward 한 번으로 묶음
+        buy_q, sell_q, model_version = await batcher.submit("both", features)
+        return BothPredictionResponse(buy=to_prediction(buy_q, model_version),
+                                      sell=to_prediction(sell_q, model_version),
+                                      model_version=model_version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"예측 실패: {str(e)}")
+
+@app.get("/batching/stats")
+async def batching_stats():
+    """마이크로 배치 큐 길이 / 배치 크기 분포"""
+    if batcher is None:
+        raise HTTPException(status_code=503, detail="배처가 시작되지 않았습니다")
+    return batcher.stats()
+
 @app.get("/health")
 async def health_check():
+    model = registry.active
     return {
-        "status": "healthy",
-        "buy_model_loaded": buy_model is not None,
-        "sell_model_loaded": sell_model is not None
+        "status": "healthy" if warmup.ready else "starting",
+        "buy_model_loaded": model is not None,
+        "sell_model_loaded": model is not None,
+        "runtime": model.predictor.runtime if model is not None else None,
+        "model_version": registry.version
     }
 
+@app.get("/health/live")
+async def liveness():
+    """프로세스 생존 여부 (워밍업 중에도 200)"""
+    return warmup.liveness()
+
+@app.get("/health/ready")
+async def readiness():
+    """모델별 로드 상태와 워밍업 단계별 소요 시간. 준비 전이면 503"""
+    status = warmup.readiness()
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=status)
+    status["models"] = registry.active.predictor.describe()
+    status["model_version"] = registry.version
+    return status
+
+@app.get("/models")
+async def model_versions():
+    """서비스 중인 모델 버전, 교체 기록, 로드 실패한 버전"""
+    return registry.describe()
+
+@app.post("/models/reload", dependencies=[Depends(require_ready)])
+def reload_models():
+    """감시 주기를 기다리지 않고 새 버전 확인 (로드 + 워밍업이 끝나야 반환)"""
+    swapped = registry.refresh()
+    return {"swapped": swapped, "model_version": registry.version}
+
 @app.get("/")
 async def root():
     return {"message": "PyTorch DQN 모델 서버 실행 중"}
@@ -0,0 +1,455 @@
+import os
+import random
+import threading
+from collections import deque, namedtuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import torch.optim as optim
+
+Transition = namedtuple('Transition', ('state', 'action', 'reward', 'next_state', 'done'))
+
+
+class DQN(nn.Module):
+    """학습용 Q 네트워크 (main.ipynb 와 같은 구조)"""
+
+    def __init__(self, input_dim, output_dim):
+        super(DQN, self).__init__()
+        self.fc1 = nn.Linear(input_dim, 128)
+        self.fc2 = nn.Linear(128, 128)
+        self.fc3 = nn.Linear(128, 128)
+        self.fc4 = nn.Linear(128, output_dim)
+
+    def forward(self, x):
+        x = F.relu(self.fc1(x))
+        x = F.relu(self.fc2(x))
+        x = F.relu(self.fc3(x))
+        return self.fc4(x)
+
+
+def transition_dtype(state_size):
+    """전이 하나의 레코드 형식. align=True 라 필드 view 의 stride 가 원소 크기의 배수 (torch.from_numpy 가능)"""
+    return np.dtype([('state', np.float32, (state_size,)), ('action', np.int64), ('reward', np.float32),
+                     ('next_state', np.float32, (state_size,)), ('done', np.float32)], align=True)
+
+
+class RingSnapshot:
+    """링 버퍼 [0, size) 구간의 copy-on-write 사본
+
+    만든 시점에는 아무것도 복사하지 않는다. 그 뒤 학습 스레드가 구간 안의 칸을 덮어쓰기 직전에
+    그 칸의 원래 레코드만 preserve 로 보관하고, materialize 가 (체크포인트 쓰기 스레드에서)
+    구간 전체를 복사한 뒤 보관해 둔 레코드로 되돌린다. 메모리 맵 버퍼의 큰 디스크 읽기를 학습 루프 밖으로 빼기 위함.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.size = buffer.size
+        self._saved = set()
+        self._index = []
+        self._rows = []
+        self._done = False
+        self._lock = threading.Lock()
+        buffer._snapshots.append(self)
+
+    def preserve(self, index):
+        """index 칸들을 덮어쓰기 전에 호출 (학습 스레드)"""
+        index = [i for i in np.atleast_1d(index).tolist() if i < self.size and i not in self._saved]
+        if not index:
+            return
+        with self._lock:
+            if self._done:
+                return
+            self._saved.update(index)
+            self._index.append(np.array(index))
+            self._rows.append(self.buffer.memory[index])
+
+    def materialize(self, chunk=1 << 16):
+        """만든 시점의 [0, size) 내용 (쓰기 스레드). 한 번만 호출"""
+        memory = self.buffer.memory
+        copy = np.empty(self.size, dtype=memory.dtype)
+        for start in range(0, self.size, chunk):
+            stop = min(start + chunk, self.size)
+            copy[start:stop] = memory[start:stop]
+        with self._lock:
+            # 복사하는 동안 덮어써진 칸은 원래 레코드로 되돌림
+            if self._index:
+                copy[np.concatenate(self._index)] = np.concatenate(self._rows)
+        self.release()
+        return copy
+
+    def release(self):
+        """더 이상 보관하지 않음 (저장을 건너뛴 체크포인트 등)"""
+        with self._lock:
+            self._done = True
+            self._index, self._rows = [], []
+        if self in self.buffer._snapshots:
+            self.buffer._snapshots.remove(self)
+
+
+class ReplayBuffer:
+    """미리 할당한 구조화 배열 링 버퍼
+
+    capacity 개 레코드를 처음에 한 번 할당하고 position 위치부터 덮어쓴다. 샘플링은 인덱스 배열
+    한 번 뽑아 한 번에 모으고 (복원 추출), 필드별 torch.from_numpy view 로 반환한다 (추가 복사 없음).
+    path 를 주면 .npy 메모리 맵 파일을 쓰므로 수천만 개 용량도 RAM 에 다 올리지 않는다.
+    같은 형식 / 용량의 파일이 이미 있으면 지우지 않고 다시 연다 (체크포인트에서 이어서 학습할 때).
+    """
+
+    def __init__(self, capacity=1000, state_size=15, path=None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.path = path
+        dtype = transition_dtype(state_size)
+        self.memory = None
+        if path is None:
+            self.memory = np.zeros(capacity, dtype=dtype)
+        elif os.path.exists(path):
+            memory = np.lib.format.open_memmap(path, mode='r+')
+            if memory.dtype == dtype and memory.shape == (capacity,):
+                self.memory = memory
+        if self.memory is None:
+            self.memory = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(capacity,))
+        self.position = 0
+        self.size = 0
+        self._snapshots = []
+
+    def snapshot(self):
+        """현재 [0, size) 구간의 copy-on-write 사본 (RingSnapshot)"""
+        return RingSnapshot(self)
+
+    def add(self, state, action, reward, next_state, done):
+        for snapshot in list(self._snapshots):
+            snapshot.preserve(self.position)
+        self.memory[self.position] = (state, action, reward, next_state, done)
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """전이 여러 개를 한 번에 기록 (VecTradingEnv 한 스텝 분량 등)"""
+        n = len(actions)
+        if n > self.capacity:
+            # 덮어써질 앞부분은 버림 (같은 칸에 두 번 쓰지 않도록)
+            skip = n - self.capacity
+            self.position = (self.position + skip) % self.capacity
+            states, actions, rewards = states[skip:], actions[skip:], rewards[skip:]
+            next_states, dones = next_states[skip:], dones[skip:]
+            n = self.capacity
+        index = (self.position + np.arange(n)) % self.capacity
+        for snapshot in list(self._snapshots):
+            snapshot.preserve(index)
+        for name, values in zip(Transition._fields, (states, actions, rewards, next_states, dones)):
+            self.memory[name][index] = values
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size):
+        """Transition(state (B, S), action (B,), reward (B,), next_state (B, S), done (B,)) torch 텐서"""
+        index = np.random.randint(self.size, size=batch_size)
+        batch = np.asarray(self.memory[index])
+        return Transition(*(torch.from_numpy(batch[name]) for name in Transition._fields))
+
+    def flush(self):
+        if self.path is not None:
+            self.memory.flush()
+
+    def __len__(self):
+        return self.size
+
+
+class SumTree:
+    """배열 기반 합 트리. tree[1] 이 전체 합, 잎은 tree[leaf_start:] (잎 수는 capacity 이상의 2의 거듭제곱)
+
+    update / find 모두 배치 단위로 트리 높이만큼만 반복한다 (O(B log n), 파이썬 루프는 높이만큼).
+    """
+
+    def __init__(self, capacity):
+        self.depth = max(int(np.ceil(np.log2(capacity))), 1)
+        self.leaf_start = 1 << self.depth
+        self.tree = np.zeros(2 * self.leaf_start)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def update(self, index, priority):
+        node = np.asarray(index) + self.leaf_start
+        self.tree[node] = priority
+        for _ in range(self.depth):
+            # 부모 합은 더하기/빼기 누적이 아니라 두 자식 합으로 다시 계산 (부동소수 오차가 쌓이지 않음).
+            # 같은 부모가 여러 번 나와도 같은 값을 쓰므로 중복 제거는 필요 없음
+            node = node >> 1
+            left = node << 1
+            self.tree[node] = self.tree[left] + self.tree[left + 1]
+
+    def find(self, values):
+        """누적 합이 values 에 처음 도달하는 잎 인덱스"""
+        values = np.array(values, dtype=np.float64)
+        node = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = node << 1
+            left_sum = self.tree[left]
+            right = values > left_sum
+            values -= left_sum * right
+            node = left + right
+        return node - self.leaf_start
+
+    def get(self, index):
+        return self.tree[np.asarray(index) + self.leaf_start]
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """TD 오차 비례 우선순위 리플레이 (Schaul et al. 2016 proportional 방식)
+
+    전이 저장은 ReplayBuffer 와 같고, 우선순위 p^alpha 만 SumTree 에 따로 둔다. 새 전이는 지금까지의
+    최대 우선순위로 넣어 한 번은 뽑히게 한다. sample 은 전체 합을 batch_size 구간으로 나눠 구간마다
+    하나씩 뽑고 (stratified), 중요도 가중치 (N * P(i))^-beta 를 배치 최댓값으로 나눠 반환한다.
+    beta 는 beta_steps 번의 sample 동안 1 까지 선형으로 올린다.
+    """
+
+    def __init__(self, capacity=1000, state_size=15, path=None, alpha=0.6, beta=0.4, beta_steps=100000,
+                 epsilon=1e-6):
+        super().__init__(capacity, state_size, path)
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta_start = beta
+        self.beta_steps = beta_steps
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.sample_count = 0
+
+    @property
+    def beta(self):
+        fraction = min(self.sample_count / self.beta_steps, 1.0) if self.beta_steps else 1.0
+        return self.beta_start + fraction * (1.0 - self.beta_start)
+
+    def _written(self, count):
+        """방금 기록한 count 개 전이의 버퍼 인덱스"""
+        count = min(count, self.capacity)
+        return (self.position - count + np.arange(count)) % self.capacity
+
+    def add(self, *args):
+        super().add(*args)
+        self.tree.update(self._written(1), self.max_priority ** self.alpha)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(self._written(len(actions)), self.max_priority ** self.alpha)
+
+    def sample(self, batch_size):
+        """(Transition, 중요도 가중치 (B,) torch 텐서, 버퍼 인덱스 (B,))"""
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        # 부동소수 오차로 아직 안 채운 잎에 닿지 않도록 잘라 둠
+        index = np.minimum(self.tree.find(values), self.size - 1)
+
+        probabilities = self.tree.get(index) / self.tree.total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.sample_count += 1
+
+        batch = np.asarray(self.memory[index])
+        transition = Transition(*(torch.from_numpy(batch[name]) for name in Transition._fields))
+        return transition, torch.from_numpy(weights.astype(np.float32)), index
+
+    def update_priorities(self, index, td_errors):
+        priorities = np.abs(td_errors) + self.epsilon
+        # NaN 상태(지표 초기 구간)에서 나온 TD 오차가 트리 합 전체를 NaN 으로 만들지 않도록
+        finite = np.isfinite(priorities)
+        if finite.any():
+            self.max_priority = max(self.max_priority, float(priorities[finite].max()))
+        priorities = np.where(finite, priorities, self.max_priority)
+        self.tree.update(index, priorities ** self.alpha)
+
+
+class DequeReplayBuffer:
+    """main.ipynb 원래 구현 (namedtuple deque + random.sample). 비교용"""
+
+    def __init__(self, capacity=1000):
+        self.memory = deque(maxlen=capacity)
+
+    def add(self, *args):
+        self.memory.append(Transition(*args))
+
+    def sample(self, batch_size):
+        return random.sample(self.memory, batch_size)
+
+    def __len__(self):
+        return len(self.memory)
+
+
+class Agent:
+    def __init__(self, state_size, action_size, lr=0.001, gamma=0.001, epsilon=1.0, epsilon_min=0.01, epsilon_decay=0.995,
+                 buffer_size=1000, buffer_path=None, prioritized=False, alpha=0.6, beta=0.4, beta_steps=100000):
+        self.state_size = state_size
+        self.action_size = action_size
+        self.gamma = gamma
+
+        self.epsilon = epsilon
+        self.epsilon_min = epsilon_min
+        self.epsilon_decay = epsilon_decay
+
+        self.policy_net = DQN(state_size, action_size)
+        self.target_net = DQN(state_size, action_size)
+        self.optimizer = optim.Adam(self.policy_net.parameters(), lr=lr)
+
+        self.prioritized = prioritized
+        if prioritized:
+            self.buffer = PrioritizedReplayBuffer(buffer_size, state_size, path=buffer_path, alpha=alpha, beta=beta,
+                                                  beta_steps=beta_steps)
+        else:
+            self.buffer = ReplayBuffer(buffer_size, state_size, path=buffer_path)
+        self.update_target_net()
+
+    def update_target_net(self):
+        self.target_net.load_state_dict(self.policy_net.state_dict())
+
+    def act(self, state):
+        if np.random.rand() < self.epsilon:
+            return np.random.choice(self.action_size)
+        state = torch.FloatTensor(state).unsqueeze(0)
+        with torch.no_grad():
+            return self.policy_net(state).argmax().item()
+
+    def act_batch(self, states):
+        """상태 배치 (B, state_size) 에 대한 ε-greedy 행동. 탐욕 행동인 행만 모아 forward 한 번"""
+        n = len(states)
+        actions = np.random.randint(self.action_size, size=n)
+        greedy = np.random.rand(n) >= self.epsilon
+        if greedy.any():
+            with torch.no_grad():
+                q_values = self.policy_net(torch.from_numpy(np.ascontiguousarray(states[greedy], dtype=np.float32)))
+            actions[greedy] = q_values.argmax(1).numpy()
+        return actions
+
+    def remember(self, *args):
+        self.buffer.add(*args)
+
+    def remember_batch(self, *args):
+        self.buffer.add_batch(*args)
+
+    def replay(self, batch_size):
+        if len(self.buffer) < batch_size:
+            return
+
+        if self.prioritized:
+            batch, weights, index = self.buffer.sample(batch_size)
+        else:
+            batch = self.buffer.sample(batch_size)
+        reward_batch = batch.reward.unsqueeze(1)
+        done_batch = batch.done.unsqueeze(1)
+
+        current_q = self.policy_net(batch.state).gather(1, batch.action.unsqueeze(1))
+        next_q = self.target_net(batch.next_state).max(1)[0].detach().unsqueeze(1)
+        expected_q = reward_batch + self.gamma * next_q * (1 - done_batch)
+
+        if self.prioritized:
+            # 중요도 가중 MSE, 새 TD 오차로 우선순위 갱신
+            td_errors = (expected_q - current_q).squeeze(1)
+            loss = (weights * td_errors ** 2).mean()
+            self.buffer.update_priorities(index, td_errors.detach().numpy())
+        else:
+            loss = F.mse_loss(current_q, expected_q)
+
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+
+        # ε decay
+        if self.epsilon > self.epsilon_min:
+            self.epsilon *= self.epsilon_decay
+
+
+if __name__ == "__main__":
+    # 검증: python agent.py  -> 같은 전이를 골랐을 때 두 버퍼의 배치가 같은지, 샘플링 속도 비교
+    import tempfile
+    import time
+
+    state_size, batch_size = 15, 32
+    rng = np.random.default_rng(0)
+    states = rng.normal(size=(5000, state_size)).astype(np.float32)
+    states[:20] = np.nan  # 노트북처럼 지표 초기 구간 NaN 상태도 그대로 저장되는지
+    actions, rewards = rng.integers(0, 3, 5000), rng.normal(size=5000)
+    dones = rng.random(5000) < 0.01
+
+    old, new = DequeReplayBuffer(1000), ReplayBuffer(1000, state_size)
+    for i in range(len(actions) - 1):
+        args = (states[i], int(actions[i]), float(rewards[i]), states[i + 1], bool(dones[i]))
+        old.add(*args)
+        new.add(*args)
+
+    # 같은 인덱스의 전이를 예전 방식(torch.FloatTensor 리스트 변환)과 비교
+    order = [(new.position + k) % new.capacity for k in range(new.capacity)]  # 오래된 것부터
+    np.random.seed(1)
+    sampled = new.sample(batch_size)
+    np.random.seed(1)
+    index = np.random.randint(new.size, size=batch_size)
+    batch = Transition(*zip(*[old.memory[order.index(i)] for i in index]))
+    np.testing.assert_array_equal(sampled.state.numpy(), np.array(batch.state))
+    np.testing.assert_array_equal(sampled.next_state.numpy(), np.array(batch.next_state))
+    assert torch.equal(sampled.action, torch.LongTensor(batch.action))
+    assert torch.equal(sampled.reward, torch.FloatTensor(batch.reward))
+    assert torch.equal(sampled.done, torch.FloatTensor(batch.done))
+
+    # add_batch 와 add 를 번갈아 써도 같은 내용
+    batched = ReplayBuffer(1000, state_size)
+    for start in range(0, len(actions) - 1, 7):
+        end = min(start + 7, len(actions) - 1)
+        batched.add_batch(states[start:end], actions[start:end], rewards[start:end], states[start + 1:end + 1],
+                          dones[start:end])
+    assert batched.position == new.position and batched.size == new.size
+    np.testing.assert_array_equal(batched.memory, new.memory)
+    print("OK: ring buffer batches match the deque buffer")
+
+    for buffer in (old, new):
+        start = time.perf_counter()
+        for _ in range(2000):
+            if isinstance(buffer, DequeReplayBuffer):
+                batch = Transition(*zip(*buffer.sample(batch_size)))
+                torch.FloatTensor(np.array(batch.state)), torch.FloatTensor(np.array(batch.next_state))
+            else:
+                buffer.sample(batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{type(buffer).__name__}(1000): {elapsed / 2000 * 1e6:.1f} us/batch")
+
+    with tempfile.TemporaryDirectory() as root:
+        capacity = 10_000_000
+        path = os.path.join(root, 'replay.npy')
+        big = ReplayBuffer(capacity, state_size, path=path)
+        for start in range(0, 1_000_000, 10000):
+            count = 10000
+            big.add_batch(np.repeat(states[:1], count, 0), np.zeros(count, dtype=np.int64), np.zeros(count),
+                          np.repeat(states[1:2], count, 0), np.zeros(count))
+        start = time.perf_counter()
+        for _ in range(2000):
+            big.sample(batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"ReplayBuffer({capacity:,}, mmap {big.memory.nbytes / 2**30:.1f} GiB): "
+              f"{elapsed / 2000 * 1e6:.1f} us/batch with {len(big):,} transitions")
+        del big
+
+    # 합 트리: 배치 갱신 후 합이 직접 더한 값과 같은지, 뽑힌 빈도가 우선순위에 비례하는지
+    tree = SumTree(1000)
+    priorities = rng.random(1000) ** 3
+    tree.update(np.arange(1000), priorities)
+    tree.update(rng.integers(0, 1000, 64), 0.5)
+    priorities = tree.get(np.arange(1000))
+    assert np.isclose(tree.total, priorities.sum())
+    counts = np.bincount(tree.find(rng.random(1_000_000) * tree.total), minlength=1000)
+    expected = priorities / priorities.sum() * 1_000_000
+    assert np.abs(counts - expected).max() < 6 * np.sqrt(expected.max()) + 1
+    print("OK: sum tree sampling is proportional to priority")
+
+    capacity = 1_000_000
+    prioritized = PrioritizedReplayBuffer(capacity, state_size)
+    for start in range(0, capacity, 10000):
+        count = 10000
+        prioritized.add_batch(np.repeat(states[:1], count, 0), np.zeros(count, dtype=np.int64), np.zeros(count),
+                              np.repeat(states[1:2], count, 0), np.zeros(count))
+    start = time.perf_counter()
+    for _ in range(2000):
+        _, weights, index = prioritized.sample(batch_size)
+        prioritized.update_priorities(index, rng.normal(size=batch_size))
+    elapsed = time.perf_counter() - start
+    print(f"PrioritizedReplayBuffer({capacity:,}): {elapsed / 2000 * 1e6:.1f} us/batch (sample + priority update)")
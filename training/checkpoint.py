@@ -0,0 +1,318 @@
+"""학습 상태 체크포인트 (비동기 저장 + 이어서 학습)
+
+snapshot() 은 학습 스레드에서 매수 / 매도 Agent 의 정책망 / 타깃망 / Adam 상태 / ε / 리플레이 버퍼와
+random / NumPy / torch 난수 상태, 에피소드 번호를 메모리에 복사만 한다 (디스크 접근 없음).
+메모리 맵 리플레이 버퍼는 복사하지 않고 copy-on-write 사본(RingSnapshot)만 잡아 두며, 디스크에서 읽어 오는
+복사는 쓰기 스레드가 한다. 그동안 학습 스레드는 덮어쓰는 칸의 원래 레코드만 보관한다.
+CheckpointWriter 가 백그라운드 스레드에서 그 사본을 파일로 쓰므로 학습 루프는 디스크를 기다리지 않는다.
+쓰는 중에 다음 체크포인트가 들어오면 가장 최근 것만 남기고 이전 대기분은 건너뛴다.
+
+    python train.py --checkpoint-dir ckpt --checkpoint-every 5
+    python train.py --checkpoint-dir ckpt --resume
+"""
+import copy
+import os
+import random
+import threading
+
+import numpy as np
+import torch
+
+from agent import PrioritizedReplayBuffer, RingSnapshot
+
+LATEST = 'latest'
+
+
+def buffer_state(buffer):
+    """리플레이 버퍼 사본 ([0, size) 구간)
+
+    메모리 맵 버퍼도 내용을 저장한다. 파일은 체크포인트 뒤에도 계속 덮어써지므로 경로만 기록하면
+    가장 최근 것이 아닌 체크포인트를 복원할 때 position / size / 우선순위와 전이 내용이 어긋난다.
+    다만 수천만 개를 디스크에서 읽어 오는 복사는 학습 스레드에서 하지 않고 RingSnapshot 으로 미룬다
+    (write_checkpoint 에서 실제 배열로 바꿈).
+    """
+    memory = buffer.snapshot() if buffer.path is not None else np.array(buffer.memory[:buffer.size])
+    state = {'capacity': buffer.capacity, 'position': buffer.position, 'size': buffer.size, 'memory': memory}
+    if isinstance(buffer, PrioritizedReplayBuffer):
+        state['tree'] = buffer.tree.tree.copy()
+        state['max_priority'] = buffer.max_priority
+        state['sample_count'] = buffer.sample_count
+    return state
+
+
+def restore_buffer(buffer, state):
+    if state['capacity'] != buffer.capacity:
+        raise ValueError(f"Replay buffer capacity mismatch: checkpoint {state['capacity']}, agent {buffer.capacity}")
+    buffer.memory[:len(state['memory'])] = state['memory']
+    buffer.position = state['position']
+    buffer.size = state['size']
+    if isinstance(buffer, PrioritizedReplayBuffer) and 'tree' in state:
+        buffer.tree.tree[:] = state['tree']
+        buffer.max_priority = state['max_priority']
+        buffer.sample_count = state['sample_count']
+
+
+def agent_state(agent):
+    return {
+        'policy_net': {k: v.detach().clone() for k, v in agent.policy_net.state_dict().items()},
+        'target_net': {k: v.detach().clone() for k, v in agent.target_net.state_dict().items()},
+        'optimizer': copy.deepcopy(agent.optimizer.state_dict()),
+        'epsilon': agent.epsilon,
+        'buffer': buffer_state(agent.buffer),
+    }
+
+
+def restore_agent(agent, state):
+    agent.policy_net.load_state_dict(state['policy_net'])
+    agent.target_net.load_state_dict(state['target_net'])
+    agent.optimizer.load_state_dict(state['optimizer'])
+    agent.epsilon = state['epsilon']
+    restore_buffer(agent.buffer, state['buffer'])
+
+
+def snapshot(buy_agent, sell_agent, episode, **extra):
+    """학습 상태 전체의 메모리 사본. episode 는 이어서 시작할 에피소드 번호"""
+    return {
+        'episode': episode,
+        'buy': agent_state(buy_agent),
+        'sell': agent_state(sell_agent),
+        'rng': {'random': random.getstate(), 'numpy': np.random.get_state(), 'torch': torch.get_rng_state()},
+        **extra,
+    }
+
+
+def restore(state, buy_agent, sell_agent):
+    """snapshot 을 되돌리고 이어서 시작할 에피소드 번호를 반환"""
+    restore_agent(buy_agent, state['buy'])
+    restore_agent(sell_agent, state['sell'])
+    random.setstate(state['rng']['random'])
+    np.random.set_state(state['rng']['numpy'])
+    torch.set_rng_state(state['rng']['torch'])
+    return state['episode']
+
+
+def _buffer_states(state):
+    return [state[name]['buffer'] for name in ('buy', 'sell') if name in state]
+
+
+def release(state):
+    """쓰지 않고 버리는 snapshot 의 copy-on-write 보관 해제"""
+    for buffer in _buffer_states(state):
+        if isinstance(buffer['memory'], RingSnapshot):
+            buffer['memory'].release()
+
+
+def write_checkpoint(path, state):
+    """임시 파일에 쓴 뒤 이름을 바꿔서, 쓰는 도중에 죽어도 이전 파일이 깨지지 않게"""
+    for buffer in _buffer_states(state):
+        if isinstance(buffer['memory'], RingSnapshot):
+            buffer['memory'] = buffer['memory'].materialize()
+    torch.save(state, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def load_checkpoint(path):
+    return torch.load(path, weights_only=False)
+
+
+def latest_checkpoint(directory):
+    """directory 의 가장 최근 체크포인트 경로 (없으면 None)"""
+    try:
+        with open(os.path.join(directory, LATEST)) as f:
+            path = os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+class CheckpointWriter:
+    """백그라운드 스레드에서 체크포인트를 쓰고 최근 keep 개만 남김"""
+
+    def __init__(self, directory, keep=3):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keep = keep
+        self.written = []
+        self.skipped = 0
+        self.error = None
+        self._pending = None
+        self._closing = False
+        self._busy = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, state):
+        """state(snapshot 결과)를 저장 대기열에 넣고 바로 반환"""
+        with self._condition:
+            if self._pending is not None:
+                self.skipped += 1
+                release(self._pending)
+            self._pending = state
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closing:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                state, self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(state)
+            except Exception as e:
+                self.error = e
+                print(f"Checkpoint write failed: {e}")
+            finally:
+                release(state)
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, state):
+        name = f"checkpoint-{state['episode']:06d}.pt"
+        write_checkpoint(os.path.join(self.directory, name), state)
+        with open(os.path.join(self.directory, LATEST + '.tmp'), 'w') as f:
+            f.write(name)
+        os.replace(os.path.join(self.directory, LATEST + '.tmp'), os.path.join(self.directory, LATEST))
+
+        self.written.append(name)
+        for old in sorted(f for f in os.listdir(self.directory) if f.startswith('checkpoint-') and f.endswith('.pt'))[:-self.keep]:
+            os.remove(os.path.join(self.directory, old))
+
+    def flush(self):
+        """대기 중인 체크포인트까지 다 쓸 때까지 기다림. 그동안 저장이 실패했으면 그 예외를 다시 던짐"""
+        with self._condition:
+            while self._pending is not None or self._busy:
+                self._condition.wait()
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """남은 체크포인트를 쓰고 스레드 종료. 저장 실패가 있었으면 종료한 뒤 예외를 다시 던짐"""
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closing = True
+                self._condition.notify_all()
+            self._thread.join()
+
+
+if __name__ == "__main__":
+    # 검증: python checkpoint.py  -> 중간에 저장 / 복원해서 이어 학습해도 한 번에 학습한 것과 가중치가 같은지,
+    # 그리고 체크포인트 저장이 학습 루프를 얼마나 막는지 (동기 저장과 비교)
+    import tempfile
+    import time
+    from agent import Agent
+    from env import StockTradingEnv
+    from features import build_features, read_bars_csv
+    from train import ACTION_SIZE, STATE_SIZE, train
+
+    df = build_features(read_bars_csv("../backend/AAPL.csv"), dropna=True)
+
+    def fresh(prioritized=False):
+        random.seed(0)
+        np.random.seed(0)
+        torch.manual_seed(0)
+        return (Agent(STATE_SIZE, ACTION_SIZE, prioritized=prioritized),
+                Agent(STATE_SIZE, ACTION_SIZE, prioritized=prioritized))
+
+    with tempfile.TemporaryDirectory() as root:
+        for prioritized in (False, True):
+            buy, sell = fresh(prioritized)
+            train(StockTradingEnv(df), buy, sell, num_episodes=4)
+            expected = [agent.policy_net.state_dict() for agent in (buy, sell)]
+
+            buy, sell = fresh(prioritized)
+            writer = CheckpointWriter(os.path.join(root, str(prioritized)))
+            train(StockTradingEnv(df), buy, sell, num_episodes=2,
+                  on_episode_end=lambda episode, _: writer.submit(snapshot(buy, sell, episode + 1)))
+            writer.close()
+
+            # 완전히 새로 만든 에이전트 + 엉뚱한 난수 상태에서 복원
+            buy, sell = Agent(STATE_SIZE, ACTION_SIZE, prioritized=prioritized), \
+                Agent(STATE_SIZE, ACTION_SIZE, prioritized=prioritized)
+            np.random.seed(12345)
+            start = restore(load_checkpoint(latest_checkpoint(writer.directory)), buy, sell)
+            train(StockTradingEnv(df), buy, sell, num_episodes=4, start_episode=start)
+            for agent, state in zip((buy, sell), expected):
+                for key, value in agent.policy_net.state_dict().items():
+                    assert torch.equal(value, state[key]), (prioritized, key)
+            print(f"OK: resumed training matches uninterrupted training (prioritized={prioritized})")
+
+        # 메모리 맵 버퍼: 체크포인트 뒤에도 파일이 계속 바뀌므로 가장 최근 것이 아닌 체크포인트에서 이어도 같아야 함
+        buy, sell = fresh()
+        train(StockTradingEnv(df), buy, sell, num_episodes=4)
+        expected = [agent.policy_net.state_dict() for agent in (buy, sell)]
+
+        def mmap_agents():
+            return tuple(Agent(STATE_SIZE, ACTION_SIZE, buffer_path=os.path.join(root, f'{name}.npy'))
+                         for name in ('buy', 'sell'))
+
+        random.seed(0)
+        np.random.seed(0)
+        torch.manual_seed(0)
+        buy, sell = mmap_agents()
+        train(StockTradingEnv(df), buy, sell, num_episodes=2,
+              on_episode_end=lambda episode, _: write_checkpoint(os.path.join(root, f'mmap-{episode + 1}.pt'),
+                                                                 snapshot(buy, sell, episode + 1)))
+        del buy, sell
+        buy, sell = mmap_agents()
+        start = restore(load_checkpoint(os.path.join(root, 'mmap-1.pt')), buy, sell)
+        train(StockTradingEnv(df), buy, sell, num_episodes=4, start_episode=start)
+        for agent, state in zip((buy, sell), expected):
+            for key, value in agent.policy_net.state_dict().items():
+                assert torch.equal(value, state[key]), ('mmap', key)
+        print("OK: memory-mapped buffer resumes from an older checkpoint")
+
+        # copy-on-write: 스냅샷 뒤 (쓰기 스레드가 복사하기 전에) 덮어쓴 칸도 스냅샷 시점 내용으로 저장되어야 함
+        agent = Agent(STATE_SIZE, ACTION_SIZE, buffer_size=1000, buffer_path=os.path.join(root, 'cow.npy'))
+        rows = lambda n: (np.random.rand(n, STATE_SIZE), np.random.randint(2, size=n), np.random.rand(n),
+                          np.random.rand(n, STATE_SIZE), np.zeros(n))
+        agent.buffer.add_batch(*rows(1000))
+        expected = np.array(agent.buffer.memory)
+        state = {'buy': {'buffer': buffer_state(agent.buffer)}}
+        agent.buffer.add_batch(*rows(300))
+        agent.buffer.add(*(column[0] for column in rows(1)))
+        write_checkpoint(os.path.join(root, 'cow.pt'), state)
+        assert np.array_equal(load_checkpoint(os.path.join(root, 'cow.pt'))['buy']['buffer']['memory'], expected)
+        assert not agent.buffer._snapshots
+        print("OK: memory-mapped snapshot keeps rows overwritten before the write")
+
+        # 백그라운드 저장 실패는 close() 에서 다시 던져야 함 (체크포인트 없이 조용히 끝나지 않게)
+        import shutil
+        writer = CheckpointWriter(os.path.join(root, 'gone'))
+        shutil.rmtree(writer.directory)
+        writer.submit({'episode': 1})
+        try:
+            writer.close()
+        except (OSError, RuntimeError) as e:
+            print(f"OK: failed background write is re-raised from close() ({type(e).__name__})")
+        else:
+            raise AssertionError("close() did not raise the failed write")
+
+        # 버퍼가 큰 경우 (10만 전이) 에피소드 끝마다 저장할 때 학습 루프가 기다리는 시간
+        buy, sell = Agent(STATE_SIZE, ACTION_SIZE, buffer_size=100000), Agent(STATE_SIZE, ACTION_SIZE, buffer_size=100000)
+        for agent in (buy, sell):
+            agent.buffer.position = agent.buffer.size = 100000
+        directory = os.path.join(root, 'timing')
+        os.makedirs(directory)
+        for mode in ('sync', 'async'):
+            writer = CheckpointWriter(directory) if mode == 'async' else None
+            blocked = []
+            for episode in range(5):
+                start = time.perf_counter()
+                state = snapshot(buy, sell, episode)
+                if writer:
+                    writer.submit(state)
+                else:
+                    write_checkpoint(os.path.join(directory, f'sync-{episode}.pt'), state)
+                blocked.append(time.perf_counter() - start)
+                time.sleep(0.2)  # 학습 중인 시간
+            if writer:
+                writer.close()
+            print(f"{mode}: training loop blocked {np.mean(blocked) * 1e3:.1f} ms per checkpoint")
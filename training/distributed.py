@@ -0,0 +1,256 @@
+"""한 머신에서 actor 여러 프로세스 + learner 1개로 학습
+
+actor 프로세스마다 자기 몫의 종목으로 VecTradingEnv 를 돌리며 (torch 스레드 1개), 전이를
+공유 메모리 슬롯에 써서 슬롯 번호만 큐로 learner 에 넘긴다. learner 는 매수 / 매도 Agent 를
+가지고 받은 전이를 리플레이 버퍼에 넣어 학습하고, 일정 주기로 가중치와 ε 를 공유 메모리에 써서
+actor 들에게 방송한다.
+
+    python distributed.py [일봉 CSV]     # 짧게 돌려서 처리량 확인
+"""
+import ctypes
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from agent import Agent
+from vec_env import ROUTE_BUY, ROUTE_NONE, ROUTE_SELL, VecTradingEnv, act_routed
+
+
+def record_dtype(state_size):
+    """actor -> learner 로 보내는 전이 레코드 (agent: ROUTE_BUY / ROUTE_SELL)"""
+    return np.dtype([('state', np.float32, (state_size,)), ('action', np.int64), ('reward', np.float32),
+                     ('next_state', np.float32, (state_size,)), ('done', np.float32), ('agent', np.int64)],
+                    align=True)
+
+
+class TransitionChannel:
+    """전이 전달 통로. 레코드는 공유 메모리 (actor, slot, chunk_size) 배열에 쓰고 큐로는 번호만 보냄
+
+    actor 는 자기 free 큐에서 빈 슬롯을 받아 채운 뒤 ready 큐에 (actor, slot, count) 를 넣고,
+    learner 는 리플레이 버퍼로 복사한 뒤 슬롯을 그 actor 의 free 큐에 돌려준다.
+    빈 슬롯이 없으면 actor 가 기다리므로 learner 가 느릴 때 메모리가 무한히 늘지 않는다.
+    """
+
+    def __init__(self, ctx, num_actors, state_size, slots_per_actor=4, chunk_size=1024):
+        self.dtype = record_dtype(state_size)
+        self.shape = (num_actors, slots_per_actor, chunk_size)
+        self.buffer = ctx.RawArray(ctypes.c_char, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self.ready = ctx.Queue()
+        self.free = [ctx.Queue() for _ in range(num_actors)]
+        for free in self.free:
+            for slot in range(slots_per_actor):
+                free.put(slot)
+        self._records = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_records'] = None
+        return state
+
+    @property
+    def records(self):
+        if self._records is None:
+            self._records = np.frombuffer(self.buffer, dtype=self.dtype).reshape(self.shape)
+        return self._records
+
+    @property
+    def chunk_size(self):
+        return self.shape[2]
+
+    def acquire(self, actor_id, stop):
+        """빈 슬롯 번호. stop 이 설정되면 None"""
+        while not stop.is_set():
+            try:
+                return self.free[actor_id].get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def send(self, actor_id, slot, count):
+        self.ready.put((actor_id, slot, count))
+
+    def release(self, actor_id, slot):
+        self.free[actor_id].put(slot)
+
+
+class WeightBroadcast:
+    """매수 / 매도 정책망 가중치와 ε 를 공유 메모리로 방송. version 이 바뀐 경우에만 actor 가 복사"""
+
+    def __init__(self, ctx, agents):
+        self.sizes = [sum(p.numel() for p in agent.policy_net.parameters()) for agent in agents]
+        self.weights = ctx.RawArray(ctypes.c_float, sum(self.sizes))
+        self.epsilon = ctx.RawArray(ctypes.c_double, len(agents))
+        self.version = ctx.Value(ctypes.c_long, 0, lock=False)
+        self.lock = ctx.Lock()
+
+    def publish(self, agents):
+        vectors = [parameters_to_vector(agent.policy_net.parameters()).detach().numpy() for agent in agents]
+        with self.lock:
+            np.frombuffer(self.weights, dtype=np.float32)[:] = np.concatenate(vectors)
+            np.frombuffer(self.epsilon, dtype=np.float64)[:] = [agent.epsilon for agent in agents]
+            self.version.value += 1
+
+    def load(self, agents, version):
+        """새 버전이면 agents 에 복사하고 그 버전을 반환"""
+        if self.version.value == version:
+            return version
+        with self.lock:
+            version = self.version.value
+            weights = np.frombuffer(self.weights, dtype=np.float32).copy()
+            epsilon = np.frombuffer(self.epsilon, dtype=np.float64).copy()
+        offset = 0
+        for agent, size, eps in zip(agents, self.sizes, epsilon):
+            vector_to_parameters(torch.from_numpy(weights[offset:offset + size]), agent.policy_net.parameters())
+            agent.epsilon = float(eps)
+            offset += size
+        return version
+
+
+def run_actor(actor_id, datasets, state_size, action_size, envs_per_actor, seed, channel, weights, stop):
+    """actor 프로세스 본체: 방송된 가중치로 ε-greedy 행동, 매수 / 매도 차례인 전이만 learner 로 보냄"""
+    torch.set_num_threads(1)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    vec_env = VecTradingEnv(datasets, num_envs=envs_per_actor, random_start=True, seed=seed)
+    agents = [Agent(state_size, action_size, buffer_size=1) for _ in range(2)]
+    version = weights.load(agents, -1)
+
+    records = channel.records[actor_id]
+    slot = channel.acquire(actor_id, stop)
+    filled = 0
+    states = vec_env.observe()
+    while slot is not None and not stop.is_set():
+        version = weights.load(agents, version)
+        routes = vec_env.route()
+        actions = act_routed(vec_env, agents[0], agents[1], states, routes)
+        next_obs, rewards, dones = vec_env.step(actions)
+
+        index = np.flatnonzero(routes != ROUTE_NONE)
+        if filled + len(index) > channel.chunk_size:
+            channel.send(actor_id, slot, filled)
+            slot, filled = channel.acquire(actor_id, stop), 0
+            if slot is None:
+                break
+        chunk = records[slot, filled:filled + len(index)]
+        chunk['state'] = states[index]
+        chunk['action'] = actions[index]
+        chunk['reward'] = rewards[index]
+        chunk['next_state'] = next_obs[index]
+        chunk['done'] = dones[index]
+        chunk['agent'] = routes[index]
+        filled += len(index)
+        states = vec_env.observe()
+
+
+def split_datasets(datasets, num_actors):
+    """actor 마다 서로 다른 종목 (종목이 actor 보다 적으면 돌아가며 배정)"""
+    if len(datasets) >= num_actors:
+        return [datasets[i::num_actors] for i in range(num_actors)]
+    return [[datasets[i % len(datasets)]] for i in range(num_actors)]
+
+
+def train_distributed(datasets, buy_agent, sell_agent, num_actors=None, envs_per_actor=16,
+                      total_transitions=1_000_000, batch_size=32, replay_ratio=0.25, broadcast_every=50,
+                      target_update_steps=1000, chunk_size=1024, log_every=50, seed=0):
+    """actor num_actors 개 (기본: CPU 수 - 1) 를 띄워 학습
+
+    replay_ratio: 받은 전이 하나당 해당 에이전트 replay 횟수 (train() 은 1).
+    actor 가 많을수록 learner 가 병목이므로 기본값은 낮게 둠.
+    """
+    num_actors = num_actors or max((os.cpu_count() or 2) - 1, 1)
+    agents = [buy_agent, sell_agent]
+    state_size, action_size = buy_agent.state_size, buy_agent.action_size
+    chunk_size = max(chunk_size, envs_per_actor)
+
+    ctx = mp.get_context("spawn")
+    channel = TransitionChannel(ctx, num_actors, state_size, chunk_size=chunk_size)
+    weights = WeightBroadcast(ctx, agents)
+    weights.publish(agents)
+    stop = ctx.Event()
+
+    actors = [
+        ctx.Process(target=run_actor, daemon=True,
+                    args=(i, shard, state_size, action_size, envs_per_actor, seed + i, channel, weights, stop))
+        for i, shard in enumerate(split_datasets(datasets, num_actors))
+    ]
+    for actor in actors:
+        actor.start()
+
+    received = chunks = updates = 0
+    start = time.perf_counter()
+    try:
+        while received < total_transitions:
+            try:
+                actor_id, slot, count = channel.ready.get(timeout=1)
+            except queue.Empty:
+                if not any(actor.is_alive() for actor in actors):
+                    raise RuntimeError("All actor processes exited")
+                continue
+
+            records = channel.records[actor_id, slot, :count]
+            # 슬롯을 돌려준 뒤에는 액터가 바로 덮어쓰므로 records 는 release 전에만 읽음
+            route_counts = {}
+            for route, agent in ((ROUTE_BUY, buy_agent), (ROUTE_SELL, sell_agent)):
+                batch = records[records['agent'] == route]
+                route_counts[route] = len(batch)
+                if len(batch):
+                    agent.remember_batch(batch['state'], batch['action'], batch['reward'], batch['next_state'],
+                                         batch['done'])
+            channel.release(actor_id, slot)
+            received += count
+            chunks += 1
+
+            for route, agent in ((ROUTE_BUY, buy_agent), (ROUTE_SELL, sell_agent)):
+                for _ in range(int(route_counts[route] * replay_ratio)):
+                    agent.replay(batch_size)
+                    updates += 1
+                    if updates % broadcast_every == 0:
+                        weights.publish(agents)
+                    if updates % target_update_steps == 0:
+                        buy_agent.update_target_net()
+                        sell_agent.update_target_net()
+
+            if log_every and chunks % log_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"Transitions {received:,}/{total_transitions:,} - {received / elapsed:,.0f}/s - "
+                      f"updates: {updates:,} - epsilon: {buy_agent.epsilon:.3f}/{sell_agent.epsilon:.3f} - "
+                      f"weights v{weights.version.value}")
+    finally:
+        stop.set()
+        for actor in actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.terminate()
+
+    elapsed = time.perf_counter() - start
+    return {"transitions": received, "updates": updates, "seconds": elapsed, "actors": num_actors,
+            "transitions_per_second": received / elapsed}
+
+
+if __name__ == "__main__":
+    # 확인: python distributed.py [일봉 CSV]  -> actor 수별 처리량
+    import sys
+    from features import build_features, read_bars_csv, to_arrays
+    from train import ACTION_SIZE, STATE_SIZE
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "../backend/AAPL.csv"
+    df = build_features(read_bars_csv(path))
+    datasets = []
+    for scale in (1.0, 0.5, 2.0, 1000.0):
+        frame = df.copy()
+        frame['Close'] = frame['Close'] * scale
+        datasets.append(to_arrays(frame))
+
+    for num_actors in sorted({1, max((os.cpu_count() or 2) - 1, 1)}):
+        buy_agent = Agent(STATE_SIZE, ACTION_SIZE, buffer_size=100000)
+        sell_agent = Agent(STATE_SIZE, ACTION_SIZE, buffer_size=100000)
+        stats = train_distributed(datasets, buy_agent, sell_agent, num_actors=num_actors,
+                                  total_transitions=200_000, replay_ratio=0.01, log_every=0)
+        print(f"actors={num_actors}: {stats['transitions_per_second']:,.0f} transitions/s, "
+              f"{stats['updates']:,} updates in {stats['seconds']:.1f}s")
@@ -0,0 +1,215 @@
+import gymnasium as gym
+from gymnasium import spaces
+import numpy as np
+
+from features import to_arrays
+
+INITIAL_BALANCE = 1000000
+
+
+class StockTradingEnv(gym.Env):
+    """main.ipynb 의 매수/매도 환경을 NumPy 배열로 구현
+
+    관측값(float32)과 종가(float64)를 처음에 연속 배열로 한 번 만들어 두고, 매 스텝은
+    인덱스 접근만 한다. 보상 / 잔고 계산은 노트북 버전과 같은 float64 연산이라 결과가 같다.
+    관측값은 읽기 전용 배열의 행 view 로 반환한다 (복사 없음).
+
+    행동: 현금이 종가 이상이면 매수 에이전트 (0: 매수, 1: 관망),
+          주식을 보유 중이면 매도 에이전트 (0: 매도, 1: 보유), 둘 다 아니면 보상 0
+    """
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, df=None, observations=None, prices=None, initial_balance=INITIAL_BALANCE):
+        super().__init__()
+        if df is not None:
+            observations, prices = to_arrays(df)
+        self.df = df
+        self.observations = np.ascontiguousarray(observations, dtype=np.float32)
+        self.prices = np.ascontiguousarray(prices, dtype=np.float64)
+        self.observations.setflags(write=False)
+        self.prices.setflags(write=False)
+
+        self.n_steps = len(self.prices)
+        self.max_steps = self.n_steps - 1
+        self.current_step = 0
+        self.initial_balance = initial_balance
+        self.balance = self.initial_balance
+        self.shares_held = 0
+        self.avg_buy_price = 0
+
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(self.observations.shape[1],),
+                                            dtype=np.float32)
+        self.action_space = spaces.Discrete(2)
+
+    @classmethod
+    def from_arrays(cls, observations, prices, **kwargs):
+        return cls(observations=observations, prices=prices, **kwargs)
+
+    @property
+    def current_price(self):
+        return float(self.prices[self.current_step])
+
+    def _next_observation(self):
+        return self.observations[self.current_step]
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.balance = self.initial_balance
+        self.shares_held = 0
+        self.avg_buy_price = 0
+        self.current_step = 0
+        return self._next_observation(), {}
+
+    def step(self, action):
+        done = False
+        self.current_step += 1
+        step = self.current_step
+
+        current_price = float(self.prices[step])
+        next_price = float(self.prices[step + 1]) if step + 1 < self.n_steps else current_price
+
+        reward = 0
+
+        if self.balance >= current_price:
+            if action == 0:  # Buy
+                shares_bought = self.balance // current_price
+                self.avg_buy_price = current_price
+                self.shares_held += shares_bought
+                self.balance -= shares_bought * current_price
+                reward = next_price - current_price
+            elif action == 1:  # BuyHold
+                reward = (current_price - next_price) / current_price
+
+        elif self.shares_held > 0:
+            if action == 0:  # Sell
+                profit = (current_price - self.avg_buy_price) * self.shares_held
+                reward = profit / self.avg_buy_price
+                self.balance += self.shares_held * current_price
+                self.shares_held = 0
+                self.avg_buy_price = 0
+            elif action == 1:  # SellHold
+                profit = (next_price - self.avg_buy_price) * self.shares_held
+                reward = profit / self.avg_buy_price
+
+        if step >= self.max_steps - 1:
+            done = True
+
+        return self.observations[step], reward, done, False, {}
+
+    def render(self, mode='human', close=False):
+        profit = self.balance + self.shares_held * self.prices[self.current_step] - self.initial_balance
+        print(f'Step: {self.current_step}, Balance: {self.balance:.2f}, Shares: {self.shares_held}, Profit: {profit:.2f}')
+
+
+class PandasStockTradingEnv(gym.Env):
+    """main.ipynb 원래 구현 (df.iloc 사용). 배열 버전 회귀 검증용 기준"""
+    metadata = {'render.modes': ['human']}
+
+    def __init__(self, df):
+        super().__init__()
+        self.df = df
+        self.max_steps = len(df) - 1
+        self.current_step = 0
+        self.initial_balance = INITIAL_BALANCE
+        self.balance = self.initial_balance
+        self.shares_held = 0
+        self.avg_buy_price = 0
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(14,), dtype=np.float32)
+        self.action_space = spaces.Discrete(2)
+
+    def _next_observation(self):
+        return self.df.iloc[self.current_step].values.astype(np.float32)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.balance = self.initial_balance
+        self.shares_held = 0
+        self.avg_buy_price = 0
+        self.current_step = 0
+        return self._next_observation(), {}
+
+    def step(self, action):
+        done = False
+        self.current_step += 1
+
+        current_price = self.df['Close'].iloc[self.current_step]
+        next_price = self.df['Close'].iloc[self.current_step + 1] if self.current_step + 1 < len(self.df) else current_price
+
+        reward = 0
+
+        if self.balance >= current_price:
+            if action == 0:
+                shares_bought = self.balance // current_price
+                self.avg_buy_price = current_price
+                self.shares_held += shares_bought
+                self.balance -= shares_bought * current_price
+                reward = next_price - current_price
+            elif action == 1:
+                reward = (current_price - next_price) / current_price
+        elif self.shares_held > 0:
+            if action == 0:
+                profit = (current_price - self.avg_buy_price) * self.shares_held
+                reward = profit / self.avg_buy_price
+                self.balance += self.shares_held * current_price
+                self.shares_held = 0
+                self.avg_buy_price = 0
+            elif action == 1:
+                profit = (next_price - self.avg_buy_price) * self.shares_held
+                reward = profit / self.avg_buy_price
+        else:
+            reward = 0
+
+        if self.current_step >= self.max_steps - 1:
+            done = True
+
+        obs = self._next_observation()
+        return obs, reward, done, False, {}
+
+
+def check_parity(df, episodes=20, seed=0):
+    """같은 행동 열로 두 환경을 돌려 관측값 / 보상 / 종료 / 잔고 / 보유 수량이 모두 같은지 확인"""
+    rng = np.random.default_rng(seed)
+    fast, reference = StockTradingEnv(df), PandasStockTradingEnv(df)
+    steps = 0
+    for _ in range(episodes):
+        obs_a, _ = fast.reset()
+        obs_b, _ = reference.reset()
+        np.testing.assert_array_equal(obs_a, obs_b)
+        done = False
+        while not done:
+            # 0 / 1 에 노트북의 action_size=3 에서 나오는 2 도 섞어서 검증
+            action = int(rng.choice(3, p=[0.3, 0.6, 0.1]))
+            obs_a, reward_a, done_a, _, _ = fast.step(action)
+            obs_b, reward_b, done_b, _, _ = reference.step(action)
+            np.testing.assert_array_equal(obs_a, obs_b)
+            assert reward_a == reward_b, (fast.current_step, reward_a, reward_b)
+            assert done_a == done_b
+            assert fast.balance == reference.balance and fast.shares_held == reference.shares_held
+            assert fast.avg_buy_price == reference.avg_buy_price
+            done = done_a
+            steps += 1
+    return steps
+
+
+if __name__ == "__main__":
+    # 회귀 검증: python env.py [일봉 CSV]
+    import sys
+    import time
+    from features import build_features, read_bars_csv
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "../backend/AAPL.csv"
+    df = build_features(read_bars_csv(path))
+
+    steps = check_parity(df)
+    print(f"OK: array env matches pandas env over {steps} steps")
+
+    for env in (PandasStockTradingEnv(df), StockTradingEnv(df)):
+        rng = np.random.default_rng(0)
+        actions = rng.integers(0, 2, 100000)
+        env.reset()
+        start = time.perf_counter()
+        for action in actions:
+            if env.step(action)[2]:
+                env.reset()
+        elapsed = time.perf_counter() - start
+        print(f"{type(env).__name__}: {len(actions) / elapsed:,.0f} steps/s")
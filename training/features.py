@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# 학습 상태 벡터: 서빙용 14개 지표 + 종가 (main.ipynb 와 같은 순서)
+FEATURE_COLUMNS = [
+    'Open_Change', 'High_Change', 'Low_Change', 'Close_Change', 'Volume_Change',
+    'EWM20_Change', 'FastK', 'SlowD', 'SlowJ',
+    'MACD', 'MACDS', 'MACDO', 'CCI', 'RSI', 'Close'
+]
+
+
+def load_history(ticker, period='3y'):
+    """yfinance 일봉 (노트북과 같은 auto_adjust=False)"""
+    import yfinance as yf
+
+    return yf.Ticker(ticker).history(interval='1d', period=period, auto_adjust=False)
+
+
+def build_features(df_origin, dropna=False):
+    """일봉 -> 학습용 지표 DataFrame (main.ipynb 지표 셀과 동일, 앞부분 NaN 도 그대로 유지)
+
+    dropna=True 면 지표 초기 구간(NaN 이 있는 행)을 버림. NaN 상태가 섞이면 손실이 NaN 이 되어
+    가중치가 망가지므로 결과를 서로 비교해야 하는 경우(스윕 등)에 사용.
+    """
+    from ta.momentum import RSIIndicator, StochasticOscillator
+    from ta.trend import MACD, CCIIndicator, EMAIndicator
+
+    df = pd.DataFrame(index=df_origin.index)
+
+    # 기본적인 변화량(시가/고가/저가/종가/거래량)
+    df['Open_Change'] = df_origin['Open'].diff(1)
+    df['High_Change'] = df_origin['High'].diff(1)
+    df['Low_Change'] = df_origin['Low'].diff(1)
+    df['Close_Change'] = df_origin['Close'].diff(1)
+    df['Volume_Change'] = df_origin['Volume'].diff(1)
+
+    # 20일 지수 이동평균 변화량
+    ewm20 = EMAIndicator(close=df_origin['Close'], window=20).ema_indicator()
+    df['EWM20_Change'] = ewm20.diff(1)
+
+    # KDJ (Fast%K, Slow%D, Slow%J = 3K - 2D)
+    stoch = StochasticOscillator(high=df_origin['High'], low=df_origin['Low'], close=df_origin['Close'],
+                                 window=5, smooth_window=3)
+    df['FastK'] = stoch.stoch()
+    df['SlowD'] = stoch.stoch_signal()
+    df['SlowJ'] = 3 * df['FastK'] - 2 * df['SlowD']
+
+    # MACD (12, 26, 9)
+    macd = MACD(close=df_origin['Close'], window_slow=26, window_fast=12, window_sign=9)
+    df['MACD'] = macd.macd()
+    df['MACDS'] = macd.macd_signal()
+    df['MACDO'] = df['MACD'] - df['MACDS']
+
+    df['CCI'] = CCIIndicator(high=df_origin['High'], low=df_origin['Low'], close=df_origin['Close'],
+                             window=14, constant=0.015).cci()
+    df['RSI'] = RSIIndicator(close=df_origin['Close'], window=14).rsi()
+    df['Close'] = df_origin['Close']
+    df = df[FEATURE_COLUMNS]
+    return df.dropna() if dropna else df
+
+
+def read_bars_csv(path):
+    """저장된 일봉 CSV (backend/AAPL.csv 형식) 읽기"""
+    df = pd.read_csv(path, index_col=0)
+    df.index = pd.to_datetime(df.index.astype(str).str[:10])
+    return df
+
+
+def to_arrays(df):
+    """지표 DataFrame -> (관측값 float32 (T, 15), 종가 float64 (T,)) 연속 배열"""
+    observations = np.ascontiguousarray(df.to_numpy(dtype=np.float32))
+    prices = np.ascontiguousarray(df['Close'].to_numpy(dtype=np.float64))
+    return observations, prices
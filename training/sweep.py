@@ -0,0 +1,363 @@
+"""하이퍼파라미터 스윕: 시도(trial)를 여러 프로세스에서 병렬로 돌리고 결과를 SQLite 에 저장
+
+탐색 공간은 JSON 으로 받는다. 리스트는 후보값, 객체는 random 모드에서 쓰는 분포.
+    {"lr": {"log_uniform": [1e-4, 1e-2]}, "gamma": [0.001, 0.9, 0.99], "episodes": [50],
+     "epsilon_decay": {"uniform": [0.99, 0.999]}, "buffer_size": [1000, 100000], "target_update_freq": {"int": [1, 10]}}
+
+각 시도는 데이터 앞부분에서 학습하고 뒷부분(검증 구간)에서 탐욕 정책 수익으로 평가한다.
+report_every 에피소드마다 검증 수익을 기록하고 체크포인트를 남기며, 같은 에피소드에서 다른 시도들의
+중앙값보다 낮으면 중단(prune)한다. 같은 --name 으로 다시 실행하면 끝난 시도는 건너뛰고
+중간에 끊긴 시도는 체크포인트부터 이어서 돈다. 같은 이름인데 탐색 공간 / 모드 / seed 가 다르면 오류.
+
+    python sweep.py --name lr-gamma --space space.json --mode random --trials 32 --workers 8 --bars ../backend/AAPL.csv
+    python sweep.py --name lr-gamma --top 10
+    sqlite3 sweeps/sweeps.db "select number, value, params from trials where sweep='lr-gamma' order by value desc"
+"""
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import torch
+
+from agent import Agent
+from checkpoint import load_checkpoint, restore, snapshot, write_checkpoint
+from env import StockTradingEnv
+from features import build_features, load_history, read_bars_csv, to_arrays
+from train import ACTION_SIZE, STATE_SIZE, evaluate_agent, train
+
+# Agent.__init__ / train() 으로 넘기는 파라미터 이름
+AGENT_PARAMS = ('lr', 'gamma', 'epsilon', 'epsilon_min', 'epsilon_decay', 'buffer_size', 'prioritized', 'alpha',
+                'beta', 'beta_steps')
+TRAIN_PARAMS = ('episodes', 'batch_size', 'target_update_freq')
+# 탐색 공간에 없을 때 쓰는 train() 값
+TRAIN_DEFAULTS = {'episodes': 50, 'batch_size': 32, 'target_update_freq': 4}
+
+DEFAULT_SPACE = {
+    'lr': [0.0001, 0.001, 0.01],
+    'gamma': [0.001, 0.9, 0.99],
+    'epsilon_decay': [0.99, 0.995, 0.999],
+    'buffer_size': [1000, 100000],
+    'episodes': [50],
+    'target_update_freq': [1, 4, 10],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    name TEXT PRIMARY KEY,
+    config_hash TEXT NOT NULL,
+    config TEXT NOT NULL,
+    created_at REAL
+);
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY,
+    sweep TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    value REAL,
+    episode INTEGER,
+    worker INTEGER,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    UNIQUE (sweep, number)
+);
+CREATE TABLE IF NOT EXISTS reports (
+    trial_id INTEGER NOT NULL REFERENCES trials (id),
+    episode INTEGER NOT NULL,
+    value REAL,
+    reward REAL,
+    created_at REAL,
+    PRIMARY KEY (trial_id, episode)
+);
+"""
+
+
+class SweepStore:
+    """스윕 결과 SQLite 저장소. 워커 프로세스마다 따로 열어서 씀 (WAL)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def register(self, sweep, config):
+        """스윕 설정(탐색 공간 / 모드 / seed / 데이터 출처 / 고정 학습 설정)을 기록. 같은 이름에 다른 설정이 이미 있으면 ValueError
+
+        시도는 (스윕, 번호)로만 구분하므로 설정이 바뀐 채로 이어서 돌리면 예전 파라미터가 그대로 쓰인다.
+        """
+        text = json.dumps(config, sort_keys=True)
+        config_hash = hashlib.sha256(text.encode()).hexdigest()
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO sweeps VALUES (?, ?, ?, ?)", (sweep, config_hash, text, time.time()))
+        row = self.db.execute("SELECT config_hash, config FROM sweeps WHERE name = ?", (sweep,)).fetchone()
+        if row['config_hash'] != config_hash:
+            raise ValueError(f"Sweep {sweep!r} already exists with a different configuration: {row['config']} "
+                             f"(requested {text}). Use a new --name.")
+
+    def add_trials(self, sweep, trials):
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO trials (sweep, number, params) VALUES (?, ?, ?)",
+                                [(sweep, number, json.dumps(params, sort_keys=True)) for number, params in trials])
+
+    def unfinished(self, sweep):
+        """아직 안 끝난 시도 (이전 실행에서 running 으로 남은 것 포함)"""
+        rows = self.db.execute("SELECT id, number, params FROM trials WHERE sweep = ? AND status IN "
+                               "('pending', 'running') ORDER BY number", (sweep,))
+        return [(row['id'], row['number'], json.loads(row['params'])) for row in rows]
+
+    def start(self, trial_id, worker):
+        with self.db:
+            self.db.execute("UPDATE trials SET status = 'running', worker = ?, started_at = COALESCE(started_at, ?) "
+                            "WHERE id = ?", (worker, time.time(), trial_id))
+
+    def report(self, trial_id, episode, value, reward):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)",
+                            (trial_id, episode, value, reward, time.time()))
+            self.db.execute("UPDATE trials SET value = ?, episode = ? WHERE id = ?", (value, episode, trial_id))
+
+    def finish(self, trial_id, status, error=None):
+        with self.db:
+            self.db.execute("UPDATE trials SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                            (status, error, time.time(), trial_id))
+
+    def peer_values(self, sweep, trial_id, episode):
+        """같은 스윕의 다른 시도들이 같은 에피소드에서 기록한 검증 값"""
+        rows = self.db.execute("SELECT r.value FROM reports r JOIN trials t ON t.id = r.trial_id "
+                               "WHERE t.sweep = ? AND t.id != ? AND r.episode = ? AND r.value IS NOT NULL",
+                               (sweep, trial_id, episode))
+        return [row[0] for row in rows]
+
+    def top(self, sweep, limit=10):
+        rows = self.db.execute("SELECT number, status, value, episode, params FROM trials WHERE sweep = ? "
+                               "AND value IS NOT NULL ORDER BY value DESC LIMIT ?", (sweep, limit))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.db.close()
+
+
+def sample_value(spec, rng):
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    (kind, (low, high)), = spec.items()
+    if kind == 'uniform':
+        return float(rng.uniform(low, high))
+    if kind == 'log_uniform':
+        return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    if kind == 'int':
+        return int(rng.integers(low, high + 1))
+    raise ValueError(f"Unknown distribution: {kind} (expected uniform, log_uniform or int)")
+
+
+def generate_trials(space, mode='grid', count=None, seed=0):
+    """[(번호, 파라미터)]. 같은 공간 / seed 면 항상 같은 목록이라 다시 실행해도 번호가 같음"""
+    unknown = set(space) - set(AGENT_PARAMS) - set(TRAIN_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown hyperparameters: {sorted(unknown)}")
+    if mode == 'grid':
+        if any(not isinstance(spec, list) for spec in space.values()):
+            raise ValueError("Grid mode needs a list of values for every parameter")
+        names = sorted(space)
+        trials = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+        return list(enumerate(trials[:count] if count else trials))
+    if mode == 'random':
+        rng = np.random.default_rng(seed)
+        return [(number, {name: sample_value(space[name], rng) for name in sorted(space)})
+                for number in range(count or 20)]
+    raise ValueError(f"Unknown mode: {mode} (expected grid or random)")
+
+
+def split_arrays(observations, prices, validation_fraction=0.2):
+    """앞부분 학습 / 뒷부분 검증 (시간 순서 유지)"""
+    cut = int(len(prices) * (1 - validation_fraction))
+    return (observations[:cut], prices[:cut]), (observations[cut:], prices[cut:])
+
+
+def validate(env, buy_agent, sell_agent):
+    """검증 구간 탐욕 정책의 최종 수익"""
+    evaluate_agent(env, buy_agent, sell_agent, render=False, verbose=False)
+    return float(env.balance + env.shares_held * env.prices[env.current_step] - env.initial_balance)
+
+
+_worker_cpus = None
+
+
+def init_worker(cpu_sets, threads):
+    """워커마다 CPU 묶음 하나를 받아 고정 (Linux), torch 스레드 수도 그만큼으로"""
+    global _worker_cpus
+    cpus = cpu_sets.get()
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    _worker_cpus = cpus
+    torch.set_num_threads(threads)
+
+
+def run_trial(store_path, sweep, trial_id, number, params, data, checkpoint_dir, report_every=5,
+              prune_after=10, min_peers=3):
+    """시도 하나 (워커 프로세스에서 실행). 반환값: (번호, 상태, 검증 값)"""
+    store = SweepStore(store_path)
+    store.start(trial_id, os.getpid())
+    checkpoint = os.path.join(checkpoint_dir, f'{sweep}-{number}.pt')
+    log_path = os.path.join(checkpoint_dir, f'{sweep}-{number}.log')
+    result = {'status': 'complete', 'value': None}
+    try:
+        seed = zlib.crc32(f'{sweep}-{number}'.encode())
+        random.seed(seed)
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+
+        train_env = StockTradingEnv.from_arrays(*data['train'])
+        validation_env = StockTradingEnv.from_arrays(*data['validation'])
+        agent_kwargs = {name: params[name] for name in AGENT_PARAMS if name in params}
+        buy_agent = Agent(STATE_SIZE, ACTION_SIZE, **agent_kwargs)
+        sell_agent = Agent(STATE_SIZE, ACTION_SIZE, **agent_kwargs)
+        episodes = params.get('episodes', TRAIN_DEFAULTS['episodes'])
+        start_episode = restore(load_checkpoint(checkpoint), buy_agent, sell_agent) if os.path.exists(checkpoint) else 0
+
+        def on_episode_end(episode, total_reward):
+            done = episode + 1
+            if done % report_every and done != episodes:
+                return False
+            value = validate(validation_env, buy_agent, sell_agent)
+            result['value'] = value
+            store.report(trial_id, done, value, total_reward)
+            write_checkpoint(checkpoint, snapshot(buy_agent, sell_agent, done))
+            # 중앙값 기준 조기 중단: 충분히 학습한 뒤, 비교할 시도가 min_peers 개 이상일 때만
+            peers = store.peer_values(sweep, trial_id, done)
+            if done < episodes and done >= prune_after and len(peers) >= min_peers and value < np.median(peers):
+                result['status'] = 'pruned'
+                return True
+            return False
+
+        with open(log_path, 'a') as log, contextlib.redirect_stdout(log):
+            print(f"Trial {number} params={json.dumps(params, sort_keys=True)} start_episode={start_episode} "
+                  f"cpus={sorted(_worker_cpus) if _worker_cpus else None}")
+            if start_episode < episodes:
+                train(train_env, buy_agent, sell_agent, num_episodes=episodes, start_episode=start_episode,
+                      batch_size=params.get('batch_size', TRAIN_DEFAULTS['batch_size']),
+                      target_update_freq=params.get('target_update_freq', TRAIN_DEFAULTS['target_update_freq']),
+                      on_episode_end=on_episode_end)
+            if result['value'] is None:
+                result['value'] = validate(validation_env, buy_agent, sell_agent)
+                store.report(trial_id, start_episode, result['value'], None)
+        store.finish(trial_id, result['status'])
+    except Exception as e:
+        store.finish(trial_id, 'failed', error=repr(e))
+        result['status'] = 'failed'
+    finally:
+        store.close()
+    return number, result['status'], result['value']
+
+
+def cpu_sets(workers, threads):
+    """워커 i 에 CPU [i*threads, (i+1)*threads) (사용 가능한 CPU 안에서 돌아가며)"""
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    return [{available[(i * threads + j) % len(available)] for j in range(threads)} for i in range(workers)]
+
+
+def run_sweep(name, space, data, mode='grid', trials=None, workers=None, threads=1, seed=0, sweep_dir='sweeps',
+              report_every=5, prune_after=10, min_peers=3, source=None):
+    """스윕 실행 (이미 끝난 시도는 건너뜀). 검증 수익 상위 시도 목록 반환
+
+    source: 데이터 출처 / 분할 설명 (예: {'bars': 경로, 'validation_fraction': 0.2}). 설정에 같이 기록해서
+    같은 이름으로 다른 데이터를 돌려 비교할 수 없는 결과가 한 표에 섞이지 않게 함.
+    """
+    os.makedirs(sweep_dir, exist_ok=True)
+    store_path = os.path.join(sweep_dir, 'sweeps.db')
+    store = SweepStore(store_path)
+    try:
+        # --trials 는 시도를 늘리거나 줄이는 것뿐이라 (번호별 파라미터는 그대로) 설정에 넣지 않음
+        store.register(name, {'space': space, 'mode': mode, 'seed': seed, 'source': source,
+                              'train_defaults': TRAIN_DEFAULTS, 'report_every': report_every,
+                              'prune_after': prune_after, 'min_peers': min_peers})
+    except ValueError:
+        store.close()
+        raise
+    store.add_trials(name, generate_trials(space, mode, trials, seed))
+    pending = store.unfinished(name)
+    workers = workers or max((os.cpu_count() or 1) // threads, 1)
+    print(f"Sweep {name}: {len(pending)} trial(s) to run on {workers} worker(s) x {threads} thread(s)")
+
+    ctx = mp.get_context('spawn')
+    assignments = ctx.Queue()
+    for cpus in cpu_sets(workers, threads):
+        assignments.put(cpus)
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=init_worker,
+                             initargs=(assignments, threads)) as pool:
+        futures = [pool.submit(run_trial, store_path, name, trial_id, number, params, data, sweep_dir,
+                               report_every, prune_after, min_peers)
+                   for trial_id, number, params in pending]
+        for future in as_completed(futures):
+            number, status, value = future.result()
+            value = f"{value:.2f}" if value is not None else "-"
+            print(f"Trial {number}: {status} - validation profit {value}")
+
+    best = store.top(name)
+    store.close()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the buy/sell DQN agents")
+    parser.add_argument("--name", required=True, help="스윕 이름 (같은 이름으로 다시 실행하면 이어서)")
+    parser.add_argument("--space", help="탐색 공간 JSON 파일 (없으면 DEFAULT_SPACE)")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--trials", type=int, help="random 모드 시도 수 / grid 모드 최대 시도 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="병렬 워커 수 (기본: CPU 수 / --threads)")
+    parser.add_argument("--threads", type=int, default=1, help="워커당 CPU(torch 스레드) 수")
+    parser.add_argument("--ticker", default="AAPL")
+    parser.add_argument("--period", default="3y")
+    parser.add_argument("--bars", help="yfinance 대신 사용할 일봉 CSV")
+    parser.add_argument("--validation-fraction", type=float, default=0.2)
+    parser.add_argument("--report-every", type=int, default=5, help="검증 / 체크포인트 주기 (에피소드)")
+    parser.add_argument("--prune-after", type=int, default=10, help="이 에피소드 수 이후부터 중단 판정")
+    parser.add_argument("--dir", default="sweeps", help="SQLite 저장소 / 체크포인트 / 로그 디렉터리")
+    parser.add_argument("--top", type=int, help="실행하지 않고 상위 결과만 출력")
+    args = parser.parse_args()
+
+    if args.top:
+        store = SweepStore(os.path.join(args.dir, 'sweeps.db'))
+        best = store.top(args.name, args.top)
+        store.close()
+    else:
+        if args.space:
+            with open(args.space) as f:
+                space = json.load(f)
+        else:
+            space = DEFAULT_SPACE
+        df_origin = read_bars_csv(args.bars) if args.bars else load_history(args.ticker, args.period)
+        source = {'bars': os.path.abspath(args.bars)} if args.bars else {'ticker': args.ticker, 'period': args.period}
+        source['validation_fraction'] = args.validation_fraction
+        # 지표 초기 NaN 구간이 섞이면 가중치가 NaN 이 되어 시도끼리 비교할 수 없으므로 제외
+        train_arrays, validation_arrays = split_arrays(*to_arrays(build_features(df_origin, dropna=True)),
+                                                       args.validation_fraction)
+        try:
+            best = run_sweep(args.name, space, {'train': train_arrays, 'validation': validation_arrays},
+                             mode=args.mode, trials=args.trials, workers=args.workers, threads=args.threads,
+                             seed=args.seed, sweep_dir=args.dir, report_every=args.report_every,
+                             prune_after=args.prune_after, source=source)
+        except ValueError as e:
+            parser.error(str(e))
+
+    for row in best:
+        print(f"#{row['number']:<4} {row['status']:<9} episode {row['episode']:<4} value {row['value']:12.2f}  "
+              f"{row['params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import os
+
+import torch
+
+from agent import Agent
+from checkpoint import CheckpointWriter, latest_checkpoint, load_checkpoint, restore, snapshot
+from distributed import train_distributed
+from env import StockTradingEnv
+from features import FEATURE_COLUMNS, build_features, load_history, read_bars_csv, to_arrays
+from vec_env import VecTradingEnv, train_vectorized
+
+STATE_SIZE = len(FEATURE_COLUMNS)
+ACTION_SIZE = 3  # main.ipynb 와 같음 (0: 행동, 1: 관망/보유, 2: 행동 없음)
+
+
+def select_agent(env, buy_agent, sell_agent):
+    """현금이 종가 이상이면 매수 에이전트, 주식 보유 중이면 매도 에이전트, 둘 다 아니면 None"""
+    current_price = env.prices[env.current_step]
+    if env.balance >= current_price:
+        return buy_agent
+    if env.shares_held > 0:
+        return sell_agent
+    return None
+
+
+def train(env, buy_agent, sell_agent, num_episodes=20, batch_size=32, target_update_freq=4, start_episode=0,
+          on_episode_end=None):
+    """on_episode_end(episode, total_reward) 가 True 를 반환하면 그 에피소드에서 중단"""
+    for episode in range(start_episode, num_episodes):
+        state, _ = env.reset()
+        done = False
+        total_reward = 0
+        step = 0
+
+        while not done:
+            agent = select_agent(env, buy_agent, sell_agent)
+            if agent is None:
+                # 아무 행동도 할 수 없는 경우
+                next_state, reward, done, _, _ = env.step(1)
+                state = next_state
+                continue
+
+            # 행동 선택 및 환경 적용
+            action = agent.act(state)
+            next_state, reward, done, _, _ = env.step(action)
+
+            # 메모리에 기록 후 학습
+            agent.remember(state, action, reward, next_state, done)
+            agent.replay(batch_size)
+
+            state = next_state
+            total_reward += reward
+            step += 1
+
+        # 일정 주기로 target network 업데이트
+        if episode % target_update_freq == 0:
+            buy_agent.update_target_net()
+            sell_agent.update_target_net()
+
+        print(f"Episode {episode+1}/{num_episodes} - Total reward: {total_reward:.2f} - Steps: {step}")
+        if on_episode_end is not None and on_episode_end(episode, total_reward):
+            break
+
+
+def evaluate_agent(env, buy_agent, sell_agent, render=True, verbose=True):
+    state, _ = env.reset()
+    done = False
+    total_reward = 0
+
+    while not done:
+        agent = select_agent(env, buy_agent, sell_agent)
+        if agent is None:
+            next_state, reward, done, _, _ = env.step(1)
+            state = next_state
+            continue
+
+        # ε 없이 행동 선택 (탐색 x)
+        state_tensor = torch.tensor(state).unsqueeze(0)
+        with torch.no_grad():
+            action = agent.policy_net(state_tensor).argmax().item()
+
+        next_state, reward, done, _, _ = env.step(action)
+
+        if render:
+            env.render()
+
+        state = next_state
+        total_reward += reward
+
+    profit = env.balance + env.shares_held * env.prices[env.current_step] - env.initial_balance
+    if verbose:
+        print(f"\n[Evaluation Complete] Final Balance: {env.balance:.2f}, Total Profit: {profit:.2f}")
+    return total_reward
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train buy/sell DQN agents")
+    parser.add_argument("--ticker", nargs="+", default=["AAPL"], help="여러 개면 --num-envs 환경에 돌아가며 배정")
+    parser.add_argument("--period", default="3y")
+    parser.add_argument("--bars", nargs="+", help="yfinance 대신 사용할 일봉 CSV")
+    parser.add_argument("--episodes", type=int, default=50)
+    parser.add_argument("--num-envs", type=int, default=1, help="2 이상이면 VecTradingEnv 로 동시에 진행")
+    parser.add_argument("--vec-steps", type=int, default=10000, help="--num-envs 학습의 vec step 수")
+    parser.add_argument("--random-start", action="store_true", help="--num-envs 학습에서 에피소드 시작 위치를 무작위로")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--target-update-freq", type=int, default=4)
+    parser.add_argument("--actors", type=int, default=0, help="1 이상이면 actor 프로세스 + learner 로 학습")
+    parser.add_argument("--envs-per-actor", type=int, default=16)
+    parser.add_argument("--total-transitions", type=int, default=1000000, help="--actors 학습에서 받을 전이 수")
+    parser.add_argument("--replay-ratio", type=float, default=0.25, help="--actors 학습에서 전이당 replay 횟수")
+    parser.add_argument("--buffer-size", type=int, default=1000, help="에이전트별 리플레이 버퍼 용량")
+    parser.add_argument("--buffer-dir", help="리플레이 버퍼를 이 디렉터리의 메모리 맵 파일로 (큰 --buffer-size 용)")
+    parser.add_argument("--prioritized", action="store_true", help="TD 오차 우선순위 리플레이 사용")
+    parser.add_argument("--checkpoint-dir", help="학습 상태 체크포인트 디렉터리 (백그라운드 저장)")
+    parser.add_argument("--checkpoint-every", type=int, default=5, help="체크포인트 주기 (에피소드)")
+    parser.add_argument("--resume", action="store_true", help="--checkpoint-dir 의 최근 체크포인트에서 이어서 학습")
+    parser.add_argument("--buy-model", default="buy_model.pth")
+    parser.add_argument("--sell-model", default="sell_model.pth")
+    args = parser.parse_args()
+    # 체크포인트는 에피소드 단위 학습(train)에서만 지원
+    if (args.checkpoint_dir or args.resume) and (args.actors or args.num_envs > 1):
+        parser.error("--checkpoint-dir / --resume cannot be combined with --actors or --num-envs")
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume requires --checkpoint-dir")
+
+    if args.bars:
+        frames = [build_features(read_bars_csv(path)) for path in args.bars]
+    else:
+        frames = [build_features(load_history(ticker, args.period)) for ticker in args.ticker]
+    env = StockTradingEnv(frames[0])
+
+    buffer_paths = {name: os.path.join(args.buffer_dir, f"{name}_replay.npy") if args.buffer_dir else None
+                    for name in ("buy", "sell")}
+    buy_agent = Agent(STATE_SIZE, ACTION_SIZE, buffer_size=args.buffer_size, buffer_path=buffer_paths["buy"],
+                      prioritized=args.prioritized)
+    sell_agent = Agent(STATE_SIZE, ACTION_SIZE, buffer_size=args.buffer_size, buffer_path=buffer_paths["sell"],
+                       prioritized=args.prioritized)
+    if args.actors:
+        train_distributed([to_arrays(df) for df in frames], buy_agent, sell_agent, num_actors=args.actors,
+                          envs_per_actor=args.envs_per_actor, total_transitions=args.total_transitions,
+                          batch_size=args.batch_size, replay_ratio=args.replay_ratio)
+    elif args.num_envs > 1:
+        vec_env = VecTradingEnv.from_frames(frames, num_envs=args.num_envs, random_start=args.random_start)
+        train_vectorized(vec_env, buy_agent, sell_agent, total_steps=args.vec_steps, batch_size=args.batch_size)
+    else:
+        start_episode, on_episode_end, writer = 0, None, None
+        if args.resume:
+            path = latest_checkpoint(args.checkpoint_dir)
+            if path is None:
+                print("No checkpoint to resume from, starting from episode 1")
+            else:
+                start_episode = restore(load_checkpoint(path), buy_agent, sell_agent)
+                print(f"Resumed from {path} at episode {start_episode + 1}")
+        if args.checkpoint_dir:
+            writer = CheckpointWriter(args.checkpoint_dir)
+
+            def on_episode_end(episode, total_reward):
+                if (episode + 1) % args.checkpoint_every == 0 or episode + 1 == args.episodes:
+                    writer.submit(snapshot(buy_agent, sell_agent, episode + 1))
+
+        try:
+            train(env, buy_agent, sell_agent, num_episodes=args.episodes, batch_size=args.batch_size,
+                  target_update_freq=args.target_update_freq, start_episode=start_episode,
+                  on_episode_end=on_episode_end)
+        finally:
+            if writer is not None:
+                writer.close()
+    evaluate_agent(env, buy_agent, sell_agent, render=False)
+
+    torch.save(buy_agent.policy_net.state_dict(), args.buy_model)
+    torch.save(sell_agent.policy_net.state_dict(), args.sell_model)
+    print(f"Saved {args.buy_model}, {args.sell_model}")
+
+
+if __name__ == "__main__":
+    main()
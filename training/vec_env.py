@@ -0,0 +1,233 @@
+import numpy as np
+
+from env import INITIAL_BALANCE
+from features import to_arrays
+
+# 각 하위 환경이 지금 어느 에이전트 차례인지
+ROUTE_BUY, ROUTE_SELL, ROUTE_NONE = 0, 1, 2
+
+
+class VecTradingEnv:
+    """StockTradingEnv N개(종목 / 시작 위치가 다른 독립 에피소드)를 배열 연산으로 한 번에 진행
+
+    모든 종목의 관측값 / 종가를 하나의 연속 배열에 이어 붙이고, 환경마다 시작 위치(base)와
+    길이만 따로 가진다. 잔고 / 보유 수량 / 평균 매수가도 (N,) 배열이며 step 의 분기는
+    StockTradingEnv.step 과 같은 float64 연산을 마스크로 처리한다.
+    끝난 환경은 step 안에서 바로 reset 된다 (step 이 돌려주는 next_obs 는 reset 전 마지막 관측값).
+    auto_reset=False 면 끝난 환경은 마지막 상태 그대로 멈추고 (finished) 이후 step 에서 보상 0 (백테스트용).
+    """
+
+    def __init__(self, datasets, num_envs=None, random_start=False, min_episode_steps=30,
+                 initial_balance=INITIAL_BALANCE, seed=None, auto_reset=True):
+        """datasets: [(observations (T, F), prices (T,)), ...]. num_envs 가 더 크면 종목을 돌아가며 배정"""
+        num_envs = num_envs or len(datasets)
+        self.num_envs = num_envs
+        self.observations = np.ascontiguousarray(np.concatenate([obs for obs, _ in datasets]), dtype=np.float32)
+        self.prices = np.ascontiguousarray(np.concatenate([prices for _, prices in datasets]), dtype=np.float64)
+        lengths = np.array([len(prices) for _, prices in datasets])
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+        dataset = np.arange(num_envs) % len(datasets)
+        self.base = offsets[dataset]
+        self.length = lengths[dataset]
+        self.random_start = random_start
+        self.min_episode_steps = min_episode_steps
+        self.initial_balance = initial_balance
+        self.rng = np.random.default_rng(seed)
+        self.auto_reset = auto_reset
+        self.finished = np.zeros(num_envs, dtype=bool)
+
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self.balance = np.full(num_envs, float(initial_balance))
+        self.shares_held = np.zeros(num_envs)
+        self.avg_buy_price = np.zeros(num_envs)
+        self.episode_reward = np.zeros(num_envs)
+        self.reset()
+
+    @classmethod
+    def from_frames(cls, frames, **kwargs):
+        """지표 DataFrame 목록 (features.build_features 결과)으로 생성"""
+        return cls([to_arrays(df) for df in frames], **kwargs)
+
+    def reset(self, mask=None):
+        """mask 에 해당하는 환경만 (없으면 전부) 초기 상태로"""
+        index = np.arange(self.num_envs) if mask is None else np.flatnonzero(mask)
+        if self.random_start:
+            # 최소 min_episode_steps 스텝은 남도록 시작 위치를 고름
+            high = np.maximum(self.length[index] - 2 - self.min_episode_steps, 1)
+            self.current_step[index] = self.rng.integers(0, high)
+        else:
+            self.current_step[index] = 0
+        self.balance[index] = float(self.initial_balance)
+        self.shares_held[index] = 0
+        self.avg_buy_price[index] = 0
+        self.episode_reward[index] = 0
+        self.finished[index] = False
+        return self.observe()
+
+    def observe(self):
+        """현재 관측값 (N, F)"""
+        return self.observations[self.base + self.current_step]
+
+    def current_prices(self):
+        return self.prices[self.base + self.current_step]
+
+    def route(self):
+        """train() 과 같은 규칙: 현금이 종가 이상이면 매수, 보유 중이면 매도, 둘 다 아니면 행동 불가"""
+        price = self.current_prices()
+        routes = np.full(self.num_envs, ROUTE_NONE)
+        buy = self.balance >= price
+        routes[buy] = ROUTE_BUY
+        routes[~buy & (self.shares_held > 0)] = ROUTE_SELL
+        return routes
+
+    def step(self, actions):
+        """(next_obs, rewards, dones). 끝난 환경은 자동으로 reset"""
+        actions = np.asarray(actions)
+        live = ~self.finished
+        self.current_step += live
+        step = self.current_step
+        index = self.base + step
+
+        current_price = self.prices[index]
+        has_next = step + 1 < self.length
+        next_price = np.where(has_next, self.prices[np.where(has_next, index + 1, index)], current_price)
+
+        rewards = np.zeros(self.num_envs)
+        buy = live & (self.balance >= current_price)
+        sell = live & ~buy & (self.shares_held > 0)
+        act, hold = actions == 0, actions == 1
+
+        # 매수
+        mask = buy & act
+        if mask.any():
+            price = current_price[mask]
+            shares_bought = np.floor_divide(self.balance[mask], price)
+            self.avg_buy_price[mask] = price
+            self.shares_held[mask] += shares_bought
+            self.balance[mask] -= shares_bought * price
+            rewards[mask] = next_price[mask] - price
+
+        # 관망
+        mask = buy & hold
+        rewards[mask] = (current_price[mask] - next_price[mask]) / current_price[mask]
+
+        # 매도
+        mask = sell & act
+        if mask.any():
+            price = current_price[mask]
+            shares, avg = self.shares_held[mask], self.avg_buy_price[mask]
+            rewards[mask] = (price - avg) * shares / avg
+            self.balance[mask] += shares * price
+            self.shares_held[mask] = 0
+            self.avg_buy_price[mask] = 0
+
+        # 보유
+        mask = sell & hold
+        rewards[mask] = (next_price[mask] - self.avg_buy_price[mask]) * self.shares_held[mask] / self.avg_buy_price[mask]
+
+        dones = live & (step >= self.length - 2)
+        next_obs = self.observations[index]
+        self.episode_reward += rewards
+        if dones.any():
+            if self.auto_reset:
+                self.reset(dones)
+            else:
+                self.finished |= dones
+        return next_obs, rewards, dones
+
+
+def act_routed(vec_env, buy_agent, sell_agent, states, routes):
+    """하위 환경별로 매수 / 매도 에이전트에 나눠 각각 한 번의 배치 ε-greedy. 행동 불가 환경은 1 (관망)"""
+    actions = np.ones(vec_env.num_envs, dtype=np.int64)
+    for route, agent in ((ROUTE_BUY, buy_agent), (ROUTE_SELL, sell_agent)):
+        index = np.flatnonzero(routes == route)
+        if len(index):
+            actions[index] = agent.act_batch(states[index])
+    return actions
+
+
+def train_vectorized(vec_env, buy_agent, sell_agent, total_steps=10000, batch_size=32,
+                     replay_every=1, target_update_steps=1000, log_every=1000):
+    """N개 환경을 같이 진행하며 학습 (train() 의 벡터 버전)
+
+    한 번의 vec step 마다 에이전트별로 전이를 모아 넣고 replay 를 replay_every 번 당 한 번 수행한다.
+    total_steps 는 vec step 수 (환경 스텝 수는 total_steps * num_envs).
+    """
+    states = vec_env.observe()
+    finished = []
+    for step in range(1, total_steps + 1):
+        routes = vec_env.route()
+        actions = act_routed(vec_env, buy_agent, sell_agent, states, routes)
+        episode_reward = vec_env.episode_reward.copy()
+        next_obs, rewards, dones = vec_env.step(actions)
+
+        for route, agent in ((ROUTE_BUY, buy_agent), (ROUTE_SELL, sell_agent)):
+            index = np.flatnonzero(routes == route)
+            if not len(index):
+                continue
+            agent.remember_batch(states[index], actions[index], rewards[index], next_obs[index], dones[index])
+            if step % replay_every == 0:
+                agent.replay(batch_size)
+
+        finished.extend((episode_reward + rewards)[dones])
+        states = vec_env.observe()
+
+        if step % target_update_steps == 0:
+            buy_agent.update_target_net()
+            sell_agent.update_target_net()
+        if log_every and step % log_every == 0:
+            recent = np.mean(finished[-100:]) if finished else float("nan")
+            print(f"Step {step}/{total_steps} - episodes: {len(finished)} - mean episode reward: {recent:.2f} "
+                  f"- epsilon: {buy_agent.epsilon:.3f}/{sell_agent.epsilon:.3f}")
+    return finished
+
+
+if __name__ == "__main__":
+    # 검증: python vec_env.py [일봉 CSV]  -> 스칼라 환경 N개와 같은 결과인지, 속도 비교
+    import sys
+    import time
+    from env import StockTradingEnv
+    from features import build_features, read_bars_csv
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "../backend/AAPL.csv"
+    df = build_features(read_bars_csv(path))
+    rng = np.random.default_rng(0)
+    # 종목이 여러 개인 경우를 흉내 내도록 종가 배율을 바꾼 사본 (10000 배는 한 주도 못 사는 경우)
+    frames = []
+    for scale in (1.0, 0.5, 1000.0, 10000.0):
+        frame = df.copy()
+        frame['Close'] = frame['Close'] * scale
+        frames.append(frame)
+
+    num_envs = 8
+    vec_env = VecTradingEnv.from_frames(frames, num_envs=num_envs)
+    scalar_envs = [StockTradingEnv(frames[i % len(frames)]) for i in range(num_envs)]
+    for env in scalar_envs:
+        env.reset()
+
+    steps = 0
+    for _ in range(3 * len(df)):
+        actions = rng.choice(3, size=num_envs, p=[0.3, 0.6, 0.1])
+        routes = vec_env.route()
+        next_obs, rewards, dones = vec_env.step(actions)
+        for i, env in enumerate(scalar_envs):
+            expected_route = (ROUTE_BUY if env.balance >= env.prices[env.current_step]
+                              else ROUTE_SELL if env.shares_held > 0 else ROUTE_NONE)
+            assert routes[i] == expected_route
+            obs, reward, done, _, _ = env.step(int(actions[i]))
+            np.testing.assert_array_equal(next_obs[i], obs)
+            assert rewards[i] == reward and dones[i] == done, (i, env.current_step, rewards[i], reward)
+            if done:
+                env.reset()
+            assert vec_env.balance[i] == env.balance and vec_env.shares_held[i] == env.shares_held
+            steps += 1
+    print(f"OK: vectorized env matches {num_envs} scalar envs over {steps} env steps")
+
+    for num_envs in (1, 64, 1024):
+        vec_env = VecTradingEnv.from_frames(frames, num_envs=num_envs, random_start=True, seed=0)
+        start = time.perf_counter()
+        for _ in range(500):
+            vec_env.step(rng.integers(0, 2, num_envs))
+        elapsed = time.perf_counter() - start
+        print(f"num_envs={num_envs}: {500 * num_envs / elapsed:,.0f} env steps/s")
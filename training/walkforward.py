@@ -0,0 +1,238 @@
+"""워크포워드 검증: 종목마다 학습 구간 / 검증 구간을 굴려 가며 학습 -> 표본 외 백테스트
+
+지표 계산은 부모 프로세스에서 종목마다 한 번만 하고, 관측값 / 종가 배열을 공유 메모리에 올린다.
+워커 프로세스는 이름으로 붙어서 (복사 없이) 자기 구간의 view 로 StockTradingEnv 를 만든다.
+구간 결과는 끝나는 순서대로 JSONL 보고서에 한 줄씩 쓰고, 마지막에 종목별 요약을 출력한다.
+
+    python walkforward.py --ticker AAPL MSFT --period 10y --train-days 500 --test-days 60 --workers 8
+    python walkforward.py --bars ../backend/AAPL.csv --train-days 120 --test-days 40 --episodes 3
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import time
+import zlib
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import torch
+
+from agent import Agent
+from backtest import backtest
+from env import StockTradingEnv
+from features import build_features, load_history, read_bars_csv, to_arrays
+from train import ACTION_SIZE, STATE_SIZE, train
+
+
+class SharedArrays:
+    """여러 종목의 관측값 / 종가를 이어 붙인 공유 메모리 배열 두 개 + 종목별 (시작, 길이)
+
+    부모가 create() 로 만들고 close(unlink=True) 로 지우며, 워커는 spec 으로 attach() 한다.
+    """
+
+    def __init__(self, observations, prices, offsets, lengths, blocks):
+        self.observations = observations
+        self.prices = prices
+        self.offsets = offsets
+        self.lengths = lengths
+        self._blocks = blocks
+
+    @classmethod
+    def create(cls, datasets):
+        if not datasets:
+            raise ValueError("No datasets to share")
+        lengths = np.array([len(prices) for _, prices in datasets])
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        features = datasets[0][0].shape[1]
+        blocks = [SharedMemory(create=True, size=max(int(lengths.sum()) * features * 4, 1)),
+                  SharedMemory(create=True, size=max(int(lengths.sum()) * 8, 1))]
+        observations = np.ndarray((lengths.sum(), features), dtype=np.float32, buffer=blocks[0].buf)
+        prices = np.ndarray((lengths.sum(),), dtype=np.float64, buffer=blocks[1].buf)
+        for offset, (obs, price) in zip(offsets, datasets):
+            observations[offset:offset + len(price)] = obs
+            prices[offset:offset + len(price)] = price
+        return cls(observations, prices, offsets, lengths, blocks)
+
+    @property
+    def spec(self):
+        """워커에 넘길 정보 (배열 자체가 아니라 공유 메모리 이름과 모양)"""
+        return {'names': [block.name for block in self._blocks], 'shape': self.observations.shape,
+                'offsets': self.offsets, 'lengths': self.lengths}
+
+    @classmethod
+    def attach(cls, spec):
+        blocks = [SharedMemory(name=name) for name in spec['names']]
+        observations = np.ndarray(spec['shape'], dtype=np.float32, buffer=blocks[0].buf)
+        prices = np.ndarray((spec['shape'][0],), dtype=np.float64, buffer=blocks[1].buf)
+        observations.setflags(write=False)
+        prices.setflags(write=False)
+        return cls(observations, prices, spec['offsets'], spec['lengths'], blocks)
+
+    def ticker(self, k, start=0, stop=None):
+        """종목 k 의 [start, stop) 구간 view"""
+        offset, length = self.offsets[k], self.lengths[k]
+        stop = length if stop is None else min(stop, length)
+        return self.observations[offset + start:offset + stop], self.prices[offset + start:offset + stop]
+
+    def close(self, unlink=False):
+        # 공유 메모리를 가리키는 배열을 먼저 놓아야 close 가능
+        self.observations = self.prices = None
+        for block in self._blocks:
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+def make_windows(lengths, train_days, test_days, step_days=None):
+    """[(종목, 구간 번호, 학습 시작, 학습 끝, 검증 끝)]. 검증 구간끼리는 겹치지 않게 step_days(기본 test_days)씩 이동"""
+    step_days = step_days or test_days
+    windows = []
+    for k, length in enumerate(lengths):
+        start, number = 0, 0
+        while start + train_days + test_days <= length:
+            windows.append((k, number, start, start + train_days, start + train_days + test_days))
+            start += step_days
+            number += 1
+    return windows
+
+
+_shared = None
+
+
+def init_worker(spec, threads):
+    global _shared
+    torch.set_num_threads(threads)
+    _shared = SharedArrays.attach(spec)
+
+
+def run_window(window, episodes, batch_size, target_update_freq, agent_kwargs, seed=0):
+    """구간 하나: 학습 구간으로 학습하고 바로 뒤 검증 구간에서 백테스트"""
+    k, number, start, train_end, test_end = window
+    torch.manual_seed(zlib.crc32(f'{seed}-{k}-{number}'.encode()))
+    np.random.seed(zlib.crc32(f'{seed}-{k}-{number}'.encode()))
+
+    began = time.perf_counter()
+    env = StockTradingEnv.from_arrays(*_shared.ticker(k, start, train_end))
+    buy_agent = Agent(STATE_SIZE, ACTION_SIZE, **agent_kwargs)
+    sell_agent = Agent(STATE_SIZE, ACTION_SIZE, **agent_kwargs)
+    # 에피소드마다 찍는 학습 로그는 보고서에 필요 없음
+    with contextlib.redirect_stdout(io.StringIO()):
+        train(env, buy_agent, sell_agent, num_episodes=episodes, batch_size=batch_size,
+              target_update_freq=target_update_freq)
+    train_seconds = time.perf_counter() - began
+
+    result = backtest([_shared.ticker(k, train_end, test_end)], buy_agent.policy_net, sell_agent.policy_net)
+    row = result.summary.iloc[0].to_dict()
+    row.update({'ticker': k, 'window': number, 'train_start': start, 'train_end': train_end, 'test_end': test_end,
+                'train_seconds': train_seconds, 'seconds': time.perf_counter() - began})
+    return row
+
+
+def walk_forward(datasets, tickers, dates, report_path, train_days=500, test_days=60, step_days=None, episodes=10,
+                 batch_size=32, target_update_freq=4, agent_kwargs=None, workers=None, threads=1, seed=0):
+    """모든 종목 / 구간을 워커 풀에서 실행하고 끝나는 대로 report_path(JSONL) 에 기록. 전체 결과 DataFrame 반환
+
+    평가할 구간이 하나도 없으면 (종목 없음 / 모든 종목이 train_days + test_days 보다 짧음) ValueError.
+    """
+    if not datasets:
+        raise ValueError("No ticker produced a dataset to evaluate")
+    lengths = [len(prices) for _, prices in datasets]
+    windows = make_windows(lengths, train_days, test_days, step_days)
+    if not windows:
+        raise ValueError(f"No walk-forward windows: every series is shorter than train_days + test_days "
+                         f"({train_days} + {test_days}). Lengths: {dict(zip(tickers, lengths))}")
+    workers = workers or max((os.cpu_count() or 1) // threads, 1)
+    print(f"Walk-forward: {len(tickers)} ticker(s), {len(windows)} window(s) on {workers} worker(s)")
+
+    shared = SharedArrays.create(datasets)
+    rows = []
+    began = time.perf_counter()
+    try:
+        ctx = mp.get_context('spawn')
+        args = [(window, episodes, batch_size, target_update_freq, agent_kwargs or {}, seed) for window in windows]
+        with ctx.Pool(workers, initializer=init_worker, initargs=(shared.spec, threads)) as pool, \
+                open(report_path, 'w') as report:
+            for row in pool.imap_unordered(_run_window_args, args):
+                k = row['ticker']
+                row['ticker'] = tickers[k]
+                # 구간 경계는 인덱스 대신 날짜로 (검증 시작 = 학습 끝 다음 날, 검증 끝 = 구간 마지막 날)
+                row['train_start'] = str(dates[k][row.pop('train_start')].date())
+                row['test_start'] = str(dates[k][row.pop('train_end')].date())
+                row['test_end'] = str(dates[k][row.pop('test_end') - 1].date())
+                report.write(json.dumps(row) + '\n')
+                report.flush()
+                rows.append(row)
+                print(f"[{len(rows)}/{len(windows)}] {row['ticker']} window {row['window']} "
+                      f"({row['test_start']} ~ {row['test_end']}): return {row['return']:.4f}, "
+                      f"sharpe {row['sharpe']:.2f}, {row['seconds']:.1f}s")
+    finally:
+        shared.close(unlink=True)
+
+    print(f"Done in {time.perf_counter() - began:.1f}s -> {report_path}")
+    return pd.DataFrame(rows)
+
+
+def _run_window_args(args):
+    return run_window(*args)
+
+
+def summarize_windows(rows):
+    """종목별 표본 외 성과 요약"""
+    if rows.empty:
+        return rows
+    grouped = rows.groupby('ticker')
+    return pd.DataFrame({
+        'windows': grouped.size(),
+        'mean_return': grouped['return'].mean(),
+        'hit_rate': grouped['return'].apply(lambda r: float((r > 0).mean())),
+        'compounded_return': grouped['return'].apply(lambda r: float(np.prod(1 + r) - 1)),
+        'mean_sharpe': grouped['sharpe'].mean(),
+        'worst_drawdown': grouped['max_drawdown'].min(),
+        'trades': grouped['trades'].sum(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process walk-forward evaluation")
+    parser.add_argument("--ticker", nargs="+", default=["AAPL"])
+    parser.add_argument("--period", default="10y")
+    parser.add_argument("--bars", nargs="+", help="yfinance 대신 사용할 일봉 CSV")
+    parser.add_argument("--train-days", type=int, default=500)
+    parser.add_argument("--test-days", type=int, default=60)
+    parser.add_argument("--step-days", type=int, help="구간 이동 폭 (기본: --test-days)")
+    parser.add_argument("--episodes", type=int, default=10, help="구간마다 학습 에피소드 수")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--target-update-freq", type=int, default=4)
+    parser.add_argument("--workers", type=int, help="워커 프로세스 수 (기본: CPU 수 / --threads)")
+    parser.add_argument("--threads", type=int, default=1, help="워커당 torch 스레드 수")
+    parser.add_argument("--report", default="walkforward.jsonl", help="구간별 결과 (끝나는 대로 한 줄씩)")
+    parser.add_argument("--summary", help="종목별 요약 CSV")
+    args = parser.parse_args()
+
+    if args.bars:
+        tickers, histories = args.bars, [read_bars_csv(path) for path in args.bars]
+    else:
+        tickers, histories = args.ticker, [load_history(ticker, args.period) for ticker in args.ticker]
+    # 구간마다 새로 학습하므로 NaN 초기 구간이 들어가면 가중치가 망가짐 -> 제외
+    frames = [build_features(df, dropna=True) for df in histories]
+
+    if not make_windows([len(df) for df in frames], args.train_days, args.test_days, args.step_days):
+        parser.error(f"No walk-forward windows: every series is shorter than --train-days + --test-days "
+                     f"({args.train_days} + {args.test_days}). Lengths: {dict(zip(tickers, map(len, frames)))}")
+
+    rows = walk_forward([to_arrays(df) for df in frames], tickers, [df.index for df in frames], args.report,
+                        train_days=args.train_days, test_days=args.test_days, step_days=args.step_days,
+                        episodes=args.episodes, batch_size=args.batch_size,
+                        target_update_freq=args.target_update_freq, workers=args.workers, threads=args.threads)
+    summary = summarize_windows(rows)
+    print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
+    if args.summary:
+        summary.to_csv(args.summary)
+
+
+if __name__ == "__main__":
+    main()